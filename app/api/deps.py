@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from fastapi import Request
+from redis.asyncio import Redis
+
+from app.queue.connection import create_redis_pool, redis_from_pool
+from app.queue.notifications import TaskEventHub
+
+
+def _pool(request: Request):
+    state = request.app.state
+    pool = getattr(state, "redis_pool", None)
+    if pool is None:
+        pool = state.redis_pool = create_redis_pool()
+    return pool
+
+
+async def get_redis(request: Request) -> Redis:
+    """
+    A client on the app-wide connection pool created in the lifespan hook. If the
+    app runs without lifespan events (e.g. a bare TestClient), the pool is
+    created on first use and kept on app.state.
+    """
+    return redis_from_pool(_pool(request))
+
+
+async def get_event_hub(request: Request) -> TaskEventHub:
+    """
+    The process-wide task event subscription, started by the lifespan hook or on
+    first use.
+    """
+    state = request.app.state
+    hub = getattr(state, "event_hub", None)
+    if hub is None:
+        hub = state.event_hub = TaskEventHub(_pool(request))
+        hub.start()
+    return hub
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.db.models import TaskStatus
+from app.settings import settings
+
+TERMINAL_STATUSES = frozenset({TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED})
+
+
+def task_etag(task_id: str, updated_at: datetime, status: TaskStatus) -> str:
+    # Every state change bumps updated_at; status guards against same-tick updates
+    raw = f"{task_id}|{updated_at.isoformat()}|{status.value}".encode("utf-8")
+    return '"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+
+
+@dataclass(frozen=True)
+class CachedTask:
+    updated_at: datetime
+    status: TaskStatus
+    etag: str
+    body: bytes
+
+    @property
+    def terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+
+class TaskResponseCache:
+    """
+    Bounded LRU of serialized GET /v1/tasks/{id} responses.
+
+    Terminal tasks never change, so their entries are served as-is. Other entries
+    are only served after the caller confirms updated_at still matches the row;
+    that covers changes made by workers in other processes. Changes made in this
+    process (e.g. cancel) invalidate the entry directly.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedTask] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def get(self, task_id: str) -> CachedTask | None:
+        entry = self._entries.get(task_id)
+        if entry is not None:
+            self._entries.move_to_end(task_id)
+        return entry
+
+    def put(self, task_id: str, entry: CachedTask) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[task_id] = entry
+        self._entries.move_to_end(task_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, task_id: str) -> None:
+        self._entries.pop(task_id, None)
+
+
+task_response_cache = TaskResponseCache(settings.task_response_cache_size)
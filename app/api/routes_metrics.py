@@ -1,10 +1,29 @@
 from fastapi import APIRouter, Depends, Response
+from redis.asyncio import Redis
+
+from app.api.deps import get_redis
 from app.core.security import require_api_key
-from app.core.metrics import metrics, prometheus_text
+from app.core.metrics import MetricsFlusher, aggregated_view, metrics, process_id
+from app.core.queue_stats import queue_stats
+from app.db.session import AsyncSessionLocal
+from app.queue.redis_queue import RedisQueue
+from app.settings import settings
 
 router = APIRouter()
 
 @router.get("/v1/metrics", dependencies=[Depends(require_api_key)])
-async def get_metrics() -> Response:
-    snap = await metrics.snapshot()
-    return Response(content=prometheus_text(snap), media_type="text/plain; version=0.0.4")
\ No newline at end of file
+async def get_metrics(redis: Redis = Depends(get_redis)) -> Response:
+    """
+    Totals across every process that flushes to Redis. If Redis is unavailable,
+    falls back to this API process's own metrics. Task counts and queue depths
+    are cluster-wide values from a shared snapshot (QUEUE_STATS_CACHE_SECONDS).
+    """
+    totals, gauges = metrics.local_view()
+    if await MetricsFlusher(metrics, redis, process_id("api"), settings.metrics_flush_interval_seconds).flush():
+        try:
+            totals, gauges = await aggregated_view(redis, settings.metrics_flush_interval_seconds)
+        except Exception:
+            pass
+    stats = await queue_stats.get(AsyncSessionLocal, RedisQueue(redis))
+    gauges = {**gauges, **stats.gauges(metrics)}
+    return Response(content=metrics.render(totals, gauges), media_type="text/plain; version=0.0.4")
@@ -1,23 +1,43 @@
 from __future__ import annotations
 
+import asyncio
 import base64
-import json
-import uuid
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from redis.asyncio import Redis
-from sqlalchemy import and_, or_, select
+from sqlalchemy import and_, func, select, tuple_, update
+from sqlalchemy.orm import defer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.schemas import CancelResponse, TaskCreateRequest, TaskListResponse, TaskResponse
-from app.core.idempotency import find_by_idempotency_key
+from app.api.deps import get_event_hub, get_redis
+from app.api.response_cache import TERMINAL_STATUSES, CachedTask, task_etag, task_response_cache
+from app.api.schemas import (
+    CancelResponse,
+    StreamLineError,
+    TaskBatchCreateRequest,
+    TaskBatchItemResult,
+    TaskBatchResponse,
+    TaskCreateRequest,
+    TaskEventListResponse,
+    TaskEventResponse,
+    TaskListResponse,
+    TaskResponse,
+    TaskStreamIngestResponse,
+)
 from app.core.metrics import metrics
-from app.core.security import require_api_key
-from app.core.state_machine import can_transition
-from app.db.models import Task, TaskEvent, TaskStatus
-from app.db.session import AsyncSessionLocal
+from app.core import serialization
+from app.core.results import decode_result, iter_result, load_results
+from app.core.security import require_api_key, require_api_key_batch, require_api_key_stream
+from app.core.submission import submit_tasks
+from app.db.archive import archived_result_json, task_archive
+from app.db.events import decode_events, history_month, load_task_events
+from app.db.models import Task, TaskCount, TaskEvent, TaskResult, TaskStatus
+from app.db.session import AsyncSessionLocal, engine
+from app.queue.notifications import RESYNC, TaskEventHub, publish_cancel, publish_transitions, transition
 from app.queue.redis_queue import RedisQueue
 from app.settings import settings
 
@@ -33,16 +53,16 @@ async def get_session() -> AsyncSession:
         yield session
 
 
-async def get_redis() -> Redis:
-    r = Redis.from_url(settings.redis_url)
-    try:
-        yield r
-    finally:
-        await r.aclose()
+# TaskResponse never includes the payload
+_NO_PAYLOAD = defer(Task.payload_json, raiseload=True)
 
 
-def _task_to_response(t: Task) -> TaskResponse:
-    result = json.loads(t.result_json) if t.result_json else None
+def _task_to_response(t: Task, result_json: str | None = None) -> TaskResponse:
+    """
+    `result_json` supplies an offloaded result (see _task_responses).
+    """
+    result_json = result_json or t.result_json
+    result = serialization.loads_exact(result_json) if result_json else None
     return TaskResponse(
         id=t.id,
         task_type=t.task_type,
@@ -59,6 +79,14 @@ def _task_to_response(t: Task) -> TaskResponse:
     )
 
 
+async def _task_responses(session: AsyncSession, tasks: list[Task]) -> list[TaskResponse]:
+    """
+    Like _task_to_response, loading any offloaded results in one query.
+    """
+    results = await load_results(session, [t.id for t in tasks if t.result_offloaded])
+    return [_task_to_response(t, results.get(t.id)) for t in tasks]
+
+
 def _encode_cursor(dt: datetime, task_id: str) -> str:
     raw = f"{dt.isoformat()}|{task_id}".encode("utf-8")
     return base64.urlsafe_b64encode(raw).decode("utf-8")
@@ -73,6 +101,33 @@ def _decode_cursor(cursor: str) -> tuple[datetime, str]:
         raise HTTPException(status_code=400, detail="Invalid cursor") from e
 
 
+def _as_naive_utc(dt: datetime) -> datetime:
+    # Stored datetimes are naive UTC
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _task_filters(
+    status: str | None = None,
+    task_type: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> list:
+    filters = []
+    if status:
+        try:
+            st = TaskStatus(status)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid status")
+        filters.append(Task.status == st)
+    if task_type:
+        filters.append(Task.task_type == task_type)
+    if created_after:
+        filters.append(Task.created_at >= _as_naive_utc(created_after))
+    if created_before:
+        filters.append(Task.created_at < _as_naive_utc(created_before))
+    return filters
+
+
 async def _event(session: AsyncSession, task_id: str, from_s: TaskStatus, to_s: TaskStatus, msg: str) -> None:
     session.add(
         TaskEvent(
@@ -95,93 +150,483 @@ async def create_task(
     import app.tasks  # noqa: F401
 
     # Idempotency: if same key used, return existing task
-    if req.idempotency_key:
-        existing = await find_by_idempotency_key(session, req.task_type, req.idempotency_key)
-        if existing:
-            return _task_to_response(existing)
-
-    tid = str(uuid.uuid4())
-    now = _now()
-
-    t = Task(
-        id=tid,
-        task_type=req.task_type,
-        payload_json=json.dumps(req.payload),
-        status=TaskStatus.PENDING,
-        priority=req.priority or 0,
-        idempotency_key=req.idempotency_key,
-        attempts=0,
-        max_attempts=settings.default_max_attempts,
-        created_at=now,
-        updated_at=now,
-        next_run_at=now,
-        locked_until=None,
-        last_error=None,
-        result_json=None,
+    [res] = await submit_tasks(session, RedisQueue(redis), [req])
+    if res.created:
+        metrics.inc("tasks_created_total", 1)
+    [response] = await _task_responses(session, [res.task])
+    return response
+
+
+@router.post("/v1/tasks:batch", dependencies=[Depends(require_api_key_batch)], response_model=TaskBatchResponse)
+async def create_tasks_batch(
+    req: TaskBatchCreateRequest,
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+) -> TaskBatchResponse:
+    import app.tasks  # noqa: F401
+
+    if len(req.items) > settings.max_batch_items:
+        raise HTTPException(status_code=413, detail=f"At most {settings.max_batch_items} items per batch")
+
+    results = await submit_tasks(session, RedisQueue(redis), req.items)
+    created = sum(r.created for r in results)
+    if created:
+        metrics.inc("tasks_created_total", created)
+    responses = await _task_responses(session, [r.task for r in results])
+    return TaskBatchResponse(
+        items=[
+            TaskBatchItemResult(index=i, created=r.created, task=task)
+            for i, (r, task) in enumerate(zip(results, responses))
+        ]
     )
-    session.add(t)
-    await _event(session, t.id, TaskStatus.PENDING, TaskStatus.PENDING, "created")
 
-    # Transition to QUEUED + enqueue
-    if not can_transition(TaskStatus.PENDING, TaskStatus.QUEUED):
-        raise HTTPException(status_code=500, detail="Invalid state transition (PENDING->QUEUED)")
 
-    t.status = TaskStatus.QUEUED
-    t.updated_at = _now()
-    await _event(session, t.id, TaskStatus.PENDING, TaskStatus.QUEUED, "enqueued")
-    await session.commit()
+def _line_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'line'}: {err['msg']}" for err in e.errors())
+
+
+@router.post(
+    "/v1/tasks/stream", dependencies=[Depends(require_api_key_stream)], response_model=TaskStreamIngestResponse
+)
+async def ingest_tasks_stream(request: Request, redis: Redis = Depends(get_redis)) -> TaskStreamIngestResponse:
+    """
+    NDJSON ingest, one TaskCreateRequest per line, of any total length. Lines are
+    submitted and committed every stream_chunk_size lines, so memory is bounded
+    by one chunk. Invalid lines are skipped and reported; chunks committed before
+    a failure stay committed.
+    """
+    import app.tasks  # noqa: F401
 
     q = RedisQueue(redis)
-    await q.enqueue(t.id, priority=t.priority)
+    summary = TaskStreamIngestResponse(received=0, created=0, duplicates=0, rejected=0, errors=[])
+    pending: list[TaskCreateRequest] = []
+
+    async def flush() -> None:
+        if not pending:
+            return
+        async with AsyncSessionLocal() as session:
+            results = await submit_tasks(session, q, pending)
+        created = sum(r.created for r in results)
+        summary.created += created
+        summary.duplicates += len(results) - created
+        pending.clear()
+        if created:
+            metrics.inc("tasks_created_total", created)
+
+    async def handle(line_no: int, raw: bytes) -> None:
+        if not raw.strip():
+            return
+        summary.received += 1
+        try:
+            pending.append(TaskCreateRequest.model_validate_json(raw))
+        except ValidationError as e:
+            summary.rejected += 1
+            if len(summary.errors) < settings.stream_max_reported_errors:
+                summary.errors.append(StreamLineError(line=line_no, error=_line_error(e)))
+        if len(pending) >= settings.stream_chunk_size:
+            await flush()
+
+    async def reject_long_line(line_no: int) -> None:
+        await flush()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Line {line_no} exceeds {settings.max_request_bytes} bytes; "
+            f"{summary.created} tasks were created before it",
+        )
+
+    line_no = 0
+    # The unterminated line so far, as the chunks it arrived in: only new data is
+    # searched for newlines and each line is joined once, so long lines cost
+    # linear time
+    parts: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            line_no += 1
+            if size + end - start > settings.max_request_bytes:
+                await reject_long_line(line_no)
+            parts.append(chunk[start:end])
+            await handle(line_no, b"".join(parts))
+            parts.clear()
+            size = 0
+            start = end + 1
+        if size + len(chunk) - start > settings.max_request_bytes:
+            await reject_long_line(line_no + 1)
+        if start < len(chunk):
+            parts.append(chunk[start:])
+            size += len(chunk) - start
+    await handle(line_no + 1, b"".join(parts))
+    await flush()
+    return summary
+
+
+_EXPORT_COLUMNS = (
+    Task.id,
+    Task.task_type,
+    Task.status,
+    Task.priority,
+    Task.idempotency_key,
+    Task.payload_json,
+    Task.attempts,
+    Task.max_attempts,
+    Task.created_at,
+    Task.updated_at,
+    Task.next_run_at,
+    Task.last_error,
+    Task.result_json,
+    TaskResult.data.label("result_data"),
+    TaskResult.encoding.label("result_encoding"),
+)
+
+
+def _export_line(row: Any) -> bytes:
+    # Stored payload/result JSON is embedded as-is rather than parsed and re-encoded
+    result_json = row.result_json
+    if result_json is None and row.result_data is not None:
+        result_json = decode_result(row.result_data, row.result_encoding)
+    return serialization.dumpb(
+        {
+            "id": row.id,
+            "task_type": row.task_type,
+            "status": row.status.value,
+            "priority": row.priority,
+            "idempotency_key": row.idempotency_key,
+            "payload": serialization.raw(row.payload_json),
+            "attempts": row.attempts,
+            "max_attempts": row.max_attempts,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "next_run_at": row.next_run_at,
+            "last_error": row.last_error,
+            "result": serialization.raw(result_json) if result_json else None,
+        }
+    ) + b"\n"
+
+
+async def _export_lines(stmt: Any):
+    # Opens its own connection: request dependencies are torn down before a
+    # streaming body is sent.
+    async with engine.connect() as conn:
+        result = await conn.stream(stmt)
+        async for rows in result.partitions():
+            yield b"".join(_export_line(r) for r in rows)
+
+
+@router.get("/v1/tasks/export", dependencies=[Depends(require_api_key)])
+async def export_tasks(
+    status: str | None = None,
+    task_type: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> StreamingResponse:
+    """
+    Streams every matching task (oldest first) as NDJSON from a server-side
+    cursor, export_fetch_size rows at a time.
+    """
+    filters = _task_filters(status, task_type, created_after, created_before)
+    stmt = (
+        select(*_EXPORT_COLUMNS)
+        .outerjoin(TaskResult, TaskResult.task_id == Task.id)
+        .where(*filters)
+        .order_by(Task.created_at.asc(), Task.id.asc())
+        .execution_options(yield_per=settings.export_fetch_size)
+    )
+    return StreamingResponse(_export_lines(stmt), media_type="application/x-ndjson")
 
-    await metrics.inc("tasks_created_total", 1)
-    return _task_to_response(t)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = {c.strip().removeprefix("W/") for c in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
 
 
 @router.get("/v1/tasks/{task_id}", dependencies=[Depends(require_api_key)], response_model=TaskResponse)
-async def get_task(task_id: str, session: AsyncSession = Depends(get_session)) -> TaskResponse:
-    t = await session.get(Task, task_id)
-    if not t:
+async def get_task(
+    task_id: str,
+    if_none_match: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    """
+    Cached terminal tasks are served without touching SQLite. A cached
+    non-terminal task costs one (updated_at, status) lookup to validate it. The
+    ETag is derived from the same columns, so pollers sending If-None-Match get a
+    bodiless 304 until the task changes. Archived tasks are read from the archive.
+    """
+    cache = task_response_cache
+    entry = cache.get(task_id)
+    if entry is not None and not entry.terminal:
+        stmt = select(Task.updated_at, Task.status).where(Task.id == task_id)
+        row = (await session.execute(stmt)).first()
+        if row is None:
+            # Archived (or deleted) since it was cached; the miss path checks the archive
+            cache.invalidate(task_id)
+            entry = None
+        elif task_etag(task_id, row.updated_at, row.status) != entry.etag:
+            entry = None
+
+    if entry is None:
+        cache.misses += 1
+        t = await session.get(Task, task_id, options=[_NO_PAYLOAD])
+        if t:
+            [response] = await _task_responses(session, [t])
+        else:
+            t = await task_archive.get(task_id)
+            if t is None:
+                raise HTTPException(status_code=404, detail="Not found")
+            response = _task_to_response(t, archived_result_json(t))
+        entry = CachedTask(
+            updated_at=t.updated_at,
+            status=t.status,
+            etag=task_etag(t.id, t.updated_at, t.status),
+            body=response.model_dump_json().encode("utf-8"),
+        )
+        if len(entry.body) <= settings.task_response_cache_max_body_bytes:
+            cache.put(task_id, entry)
+    else:
+        cache.hits += 1
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+
+@router.get("/v1/tasks/{task_id}/result", dependencies=[Depends(require_api_key)])
+async def get_task_result(task_id: str, session: AsyncSession = Depends(get_session)) -> Response:
+    """
+    The task's result document alone. Offloaded results are streamed and
+    inflated chunk by chunk.
+    """
+    stmt = select(Task.result_json, Task.result_offloaded).where(Task.id == task_id)
+    row = (await session.execute(stmt)).first()
+    if row is None:
+        row = await task_archive.get(task_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        if row.result_data is not None:
+            return _stream_result(row.result_data, row.result_encoding, row.result_size)
+    if row.result_json is not None:
+        return Response(content=row.result_json, media_type="application/json")
+    blob = None
+    if row.result_offloaded:
+        stmt = select(TaskResult.data, TaskResult.encoding, TaskResult.size).where(TaskResult.task_id == task_id)
+        blob = (await session.execute(stmt)).first()
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Task has no result")
+    return _stream_result(blob.data, blob.encoding, blob.size)
+
+
+def _stream_result(data: bytes, encoding: str, size: int) -> StreamingResponse:
+    return StreamingResponse(
+        iter_result(data, encoding), media_type="application/json", headers={"Content-Length": str(size)}
+    )
+
+
+@router.get("/v1/tasks/{task_id}/events", dependencies=[Depends(require_api_key)], response_model=TaskEventListResponse)
+async def list_task_events(
+    task_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_session),
+) -> TaskEventListResponse:
+    """
+    The task's status transitions, oldest first. The cursor is the id of the
+    last event returned; each page is an index seek on (task_id, id), or a
+    primary-key lookup once the task's events have been compacted or archived.
+    """
+    limit = max(1, min(limit, 500))
+    after_id = 0
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after_id = int(cursor)
+    stmt = select(Task.updated_at, Task.events_compacted_at).where(Task.id == task_id)
+    t = (await session.execute(stmt)).first()
+    if t is not None:
+        history = history_month(t.updated_at) if t.events_compacted_at else None
+        events = await load_task_events(session, task_id, after_id, limit + 1, history)
+    else:
+        archived = await task_archive.get(task_id)
+        if archived is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        events = decode_events(archived.events_json, after_id, limit + 1) if archived.events_json else []
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = str(events[-1].id)
+    return TaskEventListResponse(
+        items=[
+            TaskEventResponse(
+                id=e.id, timestamp=e.timestamp, from_status=e.from_status, to_status=e.to_status, message=e.message
+            )
+            for e in events
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+async def _read_task(task_id: str) -> TaskResponse | None:
+    # Short-lived session: waiters must not hold a pooled connection (or a read
+    # transaction) while they sleep.
+    async with AsyncSessionLocal() as session:
+        t = await session.get(Task, task_id, options=[_NO_PAYLOAD])
+        if t:
+            return (await _task_responses(session, [t]))[0]
+    archived = await task_archive.get(task_id)
+    return _task_to_response(archived, archived_result_json(archived)) if archived else None
+
+
+@router.get("/v1/tasks/{task_id}/wait", dependencies=[Depends(require_api_key)], response_model=TaskResponse)
+async def wait_task(
+    task_id: str,
+    timeout: float = 30.0,
+    hub: TaskEventHub = Depends(get_event_hub),
+) -> TaskResponse:
+    """
+    Long-poll: returns as soon as the task is terminal, or its current state after
+    `timeout` seconds (capped at task_wait_max_seconds). Wake-ups come from the
+    process's pub/sub subscription; SQLite is only re-read for terminal
+    transitions and resyncs.
+    """
+    timeout = max(0.0, min(timeout, settings.task_wait_max_seconds))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    # Subscribe before reading so a transition in between is not missed
+    with hub.subscribe(task_id) as events:
+        t = await _read_task(task_id)
+        if not t:
+            raise HTTPException(status_code=404, detail="Not found")
+        while TaskStatus(t.status) not in TERMINAL_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if event is RESYNC or TaskStatus(event["to_status"]) in TERMINAL_STATUSES:
+                t = await _read_task(task_id) or t
+    return t
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _task_stream(task_id: str, hub: TaskEventHub):
+    with hub.subscribe(task_id) as events:
+        t = await _read_task(task_id)
+        if not t:
+            return
+        yield _sse("task", t.model_dump_json())
+        status = TaskStatus(t.status)
+        while status not in TERMINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=settings.task_stream_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is RESYNC:
+                t = await _read_task(task_id)
+                if not t:
+                    return
+                if t.status != status:
+                    status = TaskStatus(t.status)
+                    yield _sse("task", t.model_dump_json())
+                continue
+            if TaskStatus(event["to_status"]) == status:
+                continue
+            status = TaskStatus(event["to_status"])
+            yield _sse("transition", serialization.dumps(event))
+
+        # Final snapshot carries the result / error
+        t = await _read_task(task_id)
+        if t:
+            yield _sse("task", t.model_dump_json())
+
+
+@router.get("/v1/tasks/{task_id}/stream", dependencies=[Depends(require_api_key)])
+async def stream_task(task_id: str, hub: TaskEventHub = Depends(get_event_hub)) -> StreamingResponse:
+    """
+    Server-sent events for one task: a `task` snapshot, a `transition` event per
+    state change, and a final `task` snapshot once terminal, after which the
+    stream ends. Comment lines are sent as keep-alives.
+    """
+    if not await _read_task(task_id):
         raise HTTPException(status_code=404, detail="Not found")
-    return _task_to_response(t)
+    return StreamingResponse(
+        _task_stream(task_id, hub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# fields= projection: response field -> columns it needs
+_FIELD_COLUMNS = {name: (getattr(Task, name),) for name in TaskResponse.model_fields if name != "result"}
+_FIELD_COLUMNS["result"] = (Task.result_json, Task.result_offloaded)
+
+
+def _parse_fields(fields: str) -> list[str]:
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [n for n in names if n not in _FIELD_COLUMNS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields requested"
+        )
+    return names
 
 
 @router.get("/v1/tasks", dependencies=[Depends(require_api_key)], response_model=TaskListResponse)
 async def list_tasks(
     status: str | None = None,
+    task_type: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
     limit: int = 20,
     cursor: str | None = None,
+    fields: str | None = None,
     session: AsyncSession = Depends(get_session),
-) -> TaskListResponse:
+) -> TaskListResponse | Response:
+    """
+    Newest first. Every filter combination is served by an index ending in
+    (created_at, id) and the cursor is a row-value seek into it, so a page
+    costs the same at any depth and table size.
+
+    `fields=id,status,...` returns only those TaskResponse fields and reads
+    only their columns; results (inline or offloaded) are loaded only when
+    `result` is requested.
+    """
     limit = max(1, min(limit, 100))
-    filters = []
-
-    if status:
-        try:
-            st = TaskStatus(status)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid status")
-        filters.append(Task.status == st)
-
-    stmt = select(Task)
+    filters = _task_filters(status, task_type, created_after)
+    names = _parse_fields(fields) if fields is not None else None
+
+    if names is None:
+        stmt = select(Task).options(_NO_PAYLOAD)
+    else:
+        columns = {Task.id: None, Task.created_at: None}
+        for name in names:
+            columns.update(dict.fromkeys(_FIELD_COLUMNS[name]))
+        stmt = select(*columns)
     if filters:
         stmt = stmt.where(and_(*filters))
 
     # Cursor pagination: created_at desc, id desc
     stmt = stmt.order_by(Task.created_at.desc(), Task.id.desc())
 
+    # created_before and the cursor are both upper bounds; SQLite seeks on only
+    # one, so pass the tighter one as a single row value ("" sorts before any id)
+    upper = (_as_naive_utc(created_before), "") if created_before else None
     if cursor:
         dt, tid = _decode_cursor(cursor)
-        stmt = stmt.where(
-            or_(
-                Task.created_at < dt,
-                and_(Task.created_at == dt, Task.id < tid),
-            )
-        )
+        upper = min(upper, (_as_naive_utc(dt), tid)) if upper else (_as_naive_utc(dt), tid)
+    if upper:
+        stmt = stmt.where(tuple_(Task.created_at, Task.id) < tuple_(*upper))
 
     stmt = stmt.limit(limit + 1)
     res = await session.execute(stmt)
-    rows = list(res.scalars().all())
+    rows = list(res.scalars().all() if names is None else res.all())
 
     next_cursor = None
     if len(rows) > limit:
@@ -189,23 +634,84 @@ async def list_tasks(
         next_cursor = _encode_cursor(last.created_at, last.id)
         rows = rows[:limit]
 
-    return TaskListResponse(items=[_task_to_response(t) for t in rows], next_cursor=next_cursor)
+    total = None
+    if not (task_type or created_after or created_before):
+        stmt = select(func.coalesce(func.sum(TaskCount.count), 0))
+        if status:
+            stmt = stmt.where(TaskCount.status == TaskStatus(status).value)
+        total = await session.scalar(stmt)
 
+    if names is None:
+        return TaskListResponse(
+            items=await _task_responses(session, rows), next_cursor=next_cursor, approximate_total=total
+        )
 
-@router.post("/v1/tasks/{task_id}/cancel", dependencies=[Depends(require_api_key)], response_model=CancelResponse)
-async def cancel_task(task_id: str, session: AsyncSession = Depends(get_session)) -> CancelResponse:
-    t = await session.get(Task, task_id)
-    if not t:
-        raise HTTPException(status_code=404, detail="Not found")
+    results = {}
+    if "result" in names:
+        results = await load_results(session, [r.id for r in rows if r.result_offloaded])
+    items = []
+    for r in rows:
+        item = {}
+        for name in names:
+            if name == "result":
+                result_json = r.result_json or results.get(r.id)
+                item[name] = serialization.raw(result_json) if result_json else None
+            elif name == "status":
+                item[name] = r.status.value
+            else:
+                item[name] = getattr(r, name)
+        items.append(item)
+    body = serialization.dumpb({"items": items, "next_cursor": next_cursor, "approximate_total": total})
+    return Response(content=body, media_type="application/json")
+
+
+# Reads retried when the task changes state between the read and the update
+_CANCEL_ATTEMPTS = 3
 
-    if t.status in {TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED}:
-        raise HTTPException(status_code=409, detail="Task is terminal")
 
-    from_s = t.status
-    t.status = TaskStatus.CANCELED
-    t.updated_at = _now()
-    await _event(session, t.id, from_s, TaskStatus.CANCELED, "canceled via API")
-    await session.commit()
+@router.post("/v1/tasks/{task_id}/cancel", dependencies=[Depends(require_api_key)], response_model=CancelResponse)
+async def cancel_task(
+    task_id: str,
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+) -> CancelResponse:
+    """
+    The status change is a conditional UPDATE on the status just read, so it
+    never overwrites a transition committed in between (a worker finishing the
+    task, say); the read is retried instead. Workers running the task are told
+    to interrupt its handler.
+    """
+    for _ in range(_CANCEL_ATTEMPTS):
+        from_s = await session.scalar(select(Task.status).where(Task.id == task_id))
+        # End the read transaction so the UPDATE starts a write transaction on
+        # the latest snapshot
+        await session.commit()
+        if from_s is None:
+            if await task_archive.get(task_id) is not None:
+                raise HTTPException(status_code=409, detail="Task is terminal")
+            raise HTTPException(status_code=404, detail="Not found")
+        if from_s in TERMINAL_STATUSES:
+            raise HTTPException(status_code=409, detail="Task is terminal")
+
+        res = await session.execute(
+            update(Task)
+            .where(Task.id == task_id, Task.status == from_s)
+            .values(status=TaskStatus.CANCELED, updated_at=_now(), locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount:
+            break
+        await session.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Task is changing state; retry")
 
-    await metrics.inc("tasks_canceled_total", 1)
-    return CancelResponse(id=t.id, status="CANCELED")
\ No newline at end of file
+    await _event(session, task_id, from_s, TaskStatus.CANCELED, "canceled via API")
+    await session.commit()
+    task_response_cache.invalidate(task_id)
+    if from_s == TaskStatus.RUNNING:
+        await publish_cancel(redis, task_id)
+    if settings.publish_task_events:
+        await publish_transitions(redis, [transition(task_id, from_s.value, TaskStatus.CANCELED.value)])
+
+    metrics.inc("tasks_canceled_total", 1)
+    return CancelResponse(id=task_id, status="CANCELED")
\ No newline at end of file
@@ -1,6 +1,17 @@
+import math
 from datetime import datetime
 from typing import Any, Literal
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+
+
+def _is_finite(value: Any) -> bool:
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, dict):
+        return all(_is_finite(v) for v in value.values())
+    if isinstance(value, list):
+        return all(_is_finite(v) for v in value)
+    return True
 
 
 class TaskCreateRequest(BaseModel):
@@ -10,6 +21,32 @@ class TaskCreateRequest(BaseModel):
     idempotency_key: str | None = Field(default=None, min_length=1, max_length=128)
     priority: int | None = Field(default=None, ge=-100, le=100)
 
+    @field_validator("payload")
+    @classmethod
+    def _payload_is_finite(cls, payload: dict[str, Any]) -> dict[str, Any]:
+        # Not valid JSON, and the payload encoder would store them as null
+        if not _is_finite(payload):
+            raise ValueError("payload must not contain NaN or Infinity")
+        return payload
+
+
+class TaskBatchCreateRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    items: list[TaskCreateRequest] = Field(min_length=1)
+
+
+class StreamLineError(BaseModel):
+    line: int
+    error: str
+
+
+class TaskStreamIngestResponse(BaseModel):
+    received: int
+    created: int
+    duplicates: int
+    rejected: int
+    errors: list[StreamLineError]
+
 
 class TaskResponse(BaseModel):
     id: str
@@ -26,9 +63,35 @@ class TaskResponse(BaseModel):
     idempotency_key: str | None
 
 
+class TaskBatchItemResult(BaseModel):
+    index: int
+    created: bool
+    task: TaskResponse
+
+
+class TaskBatchResponse(BaseModel):
+    items: list[TaskBatchItemResult]
+
+
 class TaskListResponse(BaseModel):
     items: list[TaskResponse]
     next_cursor: str | None
+    # Tasks matching the status filter (all tasks without one), from the
+    # maintained task counts; None when other filters are applied
+    approximate_total: int | None = None
+
+
+class TaskEventResponse(BaseModel):
+    id: int
+    timestamp: datetime
+    from_status: str
+    to_status: str
+    message: str
+
+
+class TaskEventListResponse(BaseModel):
+    items: list[TaskEventResponse]
+    next_cursor: str | None
 
 
 class CancelResponse(BaseModel):
@@ -1,11 +1,116 @@
 from __future__ import annotations
 
+import logging
+from collections import OrderedDict
+
+from redis.asyncio import Redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import Task
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+IdempotencyPair = tuple[str, str]
 
 
 async def find_by_idempotency_key(session: AsyncSession, task_type: str, key: str) -> Task | None:
     stmt = select(Task).where(Task.task_type == task_type, Task.idempotency_key == key).limit(1)
     res = await session.execute(stmt)
-    return res.scalar_one_or_none()
\ No newline at end of file
+    return res.scalar_one_or_none()
+
+
+async def find_many_by_idempotency_keys(
+    session: AsyncSession, pairs: set[IdempotencyPair], chunk_size: int = 500
+) -> dict[IdempotencyPair, Task]:
+    """
+    Resolves many (task_type, idempotency_key) pairs through the unique
+    (task_type, idempotency_key) index: one query per task type and `chunk_size`
+    keys (SQLite caps bound parameters per statement).
+    """
+    by_type: dict[str, list[str]] = {}
+    for task_type, key in pairs:
+        by_type.setdefault(task_type, []).append(key)
+
+    found: dict[IdempotencyPair, Task] = {}
+    for task_type, keys in by_type.items():
+        keys.sort()
+        for i in range(0, len(keys), chunk_size):
+            stmt = select(Task).where(Task.task_type == task_type, Task.idempotency_key.in_(keys[i : i + chunk_size]))
+            for t in (await session.execute(stmt)).scalars():
+                found[(t.task_type, t.idempotency_key)] = t
+    return found
+
+
+def _redis_key(pair: IdempotencyPair) -> str:
+    return f"{settings.queue_name}:idem:{pair[0]}:{pair[1]}"
+
+
+class IdempotencyCache:
+    """
+    Bounded LRU of (task_type, idempotency_key) -> task ID, so repeated
+    submissions of a known key skip the index lookup and the insert attempt.
+
+    When `redis_ttl_seconds` is set, entries are mirrored to Redis with that TTL so
+    a key seen by one API process is known to the others. The mirror is best
+    effort: Redis errors fall back to SQLite. Entries never go stale in a harmful
+    way (keys are unique and tasks keep their ID); a cached ID whose row is gone
+    is simply treated as a miss by the caller.
+    """
+
+    def __init__(self, max_entries: int, redis_ttl_seconds: int = 0):
+        self.max_entries = max_entries
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._entries: OrderedDict[IdempotencyPair, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def discard(self, pair: IdempotencyPair) -> None:
+        self._entries.pop(pair, None)
+
+    async def get_many(self, pairs: set[IdempotencyPair], redis: Redis | None = None) -> dict[IdempotencyPair, str]:
+        hits: dict[IdempotencyPair, str] = {}
+        for pair in pairs:
+            task_id = self._entries.get(pair)
+            if task_id is not None:
+                self._entries.move_to_end(pair)
+                hits[pair] = task_id
+
+        misses = [p for p in pairs if p not in hits]
+        if misses and redis is not None and self.redis_ttl_seconds:
+            try:
+                values = await redis.mget([_redis_key(p) for p in misses])
+            except Exception:
+                logger.warning("idempotency_cache_redis_unavailable", exc_info=True)
+                return hits
+            remote = {p: v.decode() if isinstance(v, bytes) else v for p, v in zip(misses, values) if v is not None}
+            self._put_local(remote)
+            hits.update(remote)
+        return hits
+
+    async def put_many(self, mapping: dict[IdempotencyPair, str], redis: Redis | None = None) -> None:
+        self._put_local(mapping)
+        if mapping and redis is not None and self.redis_ttl_seconds:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for pair, task_id in mapping.items():
+                        pipe.set(_redis_key(pair), task_id, ex=self.redis_ttl_seconds)
+                    await pipe.execute()
+            except Exception:
+                logger.warning("idempotency_cache_redis_unavailable", exc_info=True)
+
+    def _put_local(self, mapping: dict[IdempotencyPair, str]) -> None:
+        if self.max_entries <= 0:
+            return
+        for pair, task_id in mapping.items():
+            self._entries[pair] = task_id
+            self._entries.move_to_end(pair)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+idempotency_cache = IdempotencyCache(settings.idempotency_cache_size, settings.idempotency_cache_redis_ttl_seconds)
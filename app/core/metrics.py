@@ -1,42 +1,326 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass, field
+import bisect
+import contextlib
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+from redis.asyncio import Redis
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _counters_key() -> str:
+    return f"{settings.queue_name}:metrics:counters"
+
+
+def _gauges_key(process: str) -> str:
+    return f"{settings.queue_name}:metrics:gauges:{process}"
+
+
+def _processes_key() -> str:
+    return f"{settings.queue_name}:metrics:processes"
+
+
+@dataclass(frozen=True)
+class MetricFamily:
+    name: str
+    kind: str  # counter | gauge | histogram
+    help: str
+    labelnames: tuple[str, ...] = ()
+    buckets: tuple[float, ...] = ()
+
+
+def _series(name: str, labels: dict[str, str]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f"{name}{{{inner}}}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value: float) -> str:
+    if float(value).is_integer() and abs(value) < 2**53:
+        return str(int(value))
+    return repr(value)
 
 
-@dataclass
 class Metrics:
-    tasks_created_total: int = 0
-    tasks_completed_total: int = 0
-    tasks_failed_total: int = 0
-    tasks_retried_total: int = 0
-    tasks_canceled_total: int = 0
-    worker_exceptions_total: int = 0
-
-    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
-
-    async def inc(self, name: str, amount: int = 1) -> None:
-        async with self._lock:
-            setattr(self, name, getattr(self, name) + amount)
-
-    async def snapshot(self) -> dict:
-        async with self._lock:
-            return {
-                "tasks_created_total": self.tasks_created_total,
-                "tasks_completed_total": self.tasks_completed_total,
-                "tasks_failed_total": self.tasks_failed_total,
-                "tasks_retried_total": self.tasks_retried_total,
-                "tasks_canceled_total": self.tasks_canceled_total,
-                "worker_exceptions_total": self.worker_exceptions_total,
-            }
+    """
+    Process-local metrics with Prometheus semantics: counters, gauges, and
+    fixed-bucket histograms, each optionally labelled.
+
+    Updates are plain dict writes from the event loop (no locks, no awaits).
+    Counter and histogram updates also accumulate as deltas that a
+    MetricsFlusher adds into shared Redis hashes, so /v1/metrics can report
+    totals across the API, scheduler and every worker. Gauges are per process
+    and are summed across live processes at export.
+
+    Series keys are the Prometheus sample names themselves, e.g.
+    `task_execution_seconds_bucket{task_type="cpu_burn",le="0.5"}`.
+    """
+
+    def __init__(self) -> None:
+        self.families: dict[str, MetricFamily] = {}
+        self._totals: dict[str, float] = {}
+        self._deltas: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.families[name] = MetricFamily(name, "counter", help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.families[name] = MetricFamily(name, "gauge", help, labelnames)
+
+    def histogram(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        self.families[name] = MetricFamily(name, "histogram", help, labelnames, tuple(sorted(buckets)))
+
+    def _family(self, name: str, kind: str, labels: dict[str, str]) -> MetricFamily:
+        family = self.families[name]
+        if family.kind != kind:
+            raise ValueError(f"{name} is a {family.kind}, not a {kind}")
+        if set(labels) != set(family.labelnames):
+            raise ValueError(f"{name} expects labels {family.labelnames}, got {tuple(labels)}")
+        return family
+
+    def _add(self, series: str, amount: float) -> None:
+        self._totals[series] = self._totals.get(series, 0.0) + amount
+        self._deltas[series] = self._deltas.get(series, 0.0) + amount
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        family = self._family(name, "counter", labels)
+        self._add(_series(name, {k: labels[k] for k in family.labelnames}), amount)
+
+    def gauge_series(self, name: str, **labels: str) -> str:
+        """
+        The series key of a gauge sample, for gauges computed at export time
+        rather than set per process.
+        """
+        family = self._family(name, "gauge", labels)
+        return _series(name, {k: labels[k] for k in family.labelnames})
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        self._gauges[self.gauge_series(name, **labels)] = value
+
+    def add(self, name: str, amount: float, **labels: str) -> None:
+        series = self.gauge_series(name, **labels)
+        self._gauges[series] = self._gauges.get(series, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        family = self._family(name, "histogram", labels)
+        base = {k: labels[k] for k in family.labelnames}
+        # Per-bucket (non-cumulative) counts; cumulated at export
+        i = bisect.bisect_left(family.buckets, value)
+        le = _fmt(family.buckets[i]) if i < len(family.buckets) else "+Inf"
+        self._add(_series(f"{name}_bucket", {**base, "le": le}), 1)
+        self._add(_series(f"{name}_sum", base), value)
+        self._add(_series(f"{name}_count", base), 1)
+
+    @contextlib.contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def value(self, series: str) -> float:
+        return self._totals.get(series, self._gauges.get(series, 0.0))
+
+    def take_deltas(self) -> dict[str, float]:
+        deltas, self._deltas = self._deltas, {}
+        return deltas
+
+    def restore_deltas(self, deltas: dict[str, float]) -> None:
+        for series, amount in deltas.items():
+            self._deltas[series] = self._deltas.get(series, 0.0) + amount
+
+    def local_view(self) -> tuple[dict[str, float], dict[str, float]]:
+        return dict(self._totals), dict(self._gauges)
+
+    def render(self, totals: dict[str, float], gauges: dict[str, float]) -> str:
+        """
+        Prometheus text exposition of aggregated counter/histogram totals and
+        gauge values.
+        """
+        by_family: dict[str, list[tuple[str, float]]] = {}
+        for series, value in [*totals.items(), *gauges.items()]:
+            name = series.split("{", 1)[0]
+            family = name
+            if family not in self.families:
+                for suffix in ("_bucket", "_sum", "_count"):
+                    if name.endswith(suffix) and name[: -len(suffix)] in self.families:
+                        family = name[: -len(suffix)]
+                        break
+            by_family.setdefault(family, []).append((series, value))
+
+        lines: list[str] = []
+        for name in sorted(set(self.families) | set(by_family)):
+            family = self.families.get(name)
+            samples = by_family.get(name, [])
+            if family is None:
+                lines.append(f"# TYPE {name} untyped")
+            else:
+                lines.append(f"# HELP {name} {family.help}")
+                lines.append(f"# TYPE {name} {family.kind}")
+                if family.kind == "histogram":
+                    samples = _cumulate_buckets(name, family, samples)
+                elif not samples and not family.labelnames:
+                    samples = [(name, 0.0)]
+            if family is None or family.kind != "histogram":
+                samples = sorted(samples)
+            for series, value in samples:
+                lines.append(f"{series} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _cumulate_buckets(name: str, family: MetricFamily, samples: list[tuple[str, float]]) -> list[tuple[str, float]]:
+    """
+    Orders a histogram's samples per label set: cumulative buckets in ascending
+    `le`, then _sum and _count.
+    """
+    les = [_fmt(b) for b in family.buckets] + ["+Inf"]
+    groups: dict[str, dict[str, float]] = {}  # label text -> {le or suffix: value}
+    for series, value in samples:
+        base, _, inner = series.partition("{")
+        inner = inner[:-1]
+        if base == f"{name}_bucket":
+            labels, _, le = inner.rpartition('le="')
+            groups.setdefault(labels.rstrip(","), {})[le.rstrip('"')] = value
+        else:
+            groups.setdefault(inner, {})[base[len(name) :]] = value
+
+    out = []
+    for labels in sorted(groups):
+        values = groups[labels]
+        prefix = f"{labels}," if labels else ""
+        running = 0.0
+        for le in les:
+            running += values.get(le, 0.0)
+            out.append((f'{name}_bucket{{{prefix}le="{le}"}}', running))
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append((f"{name}_sum{suffix}", values.get("_sum", 0.0)))
+        out.append((f"{name}_count{suffix}", values.get("_count", 0.0)))
+    return out
 
 
 metrics = Metrics()
 
+metrics.counter("tasks_created_total", "Tasks created through the API")
+metrics.counter("tasks_completed_total", "Tasks completed")
+metrics.counter("tasks_failed_total", "Tasks failed permanently")
+metrics.counter("tasks_retried_total", "Task attempts that were scheduled for retry")
+metrics.counter("tasks_canceled_total", "Tasks canceled through the API")
+metrics.counter("tasks_interrupted_total", "Running handlers stopped because their task was canceled")
+metrics.counter("worker_exceptions_total", "Unexpected exceptions in the worker runtime")
+metrics.counter("scheduler_enqueued_total", "Tasks handed to Redis by the reconciliation pass")
+metrics.counter("scheduler_duplicates_suppressed_total", "Reconciliation re-sends skipped within the requeue window or already queued")
+metrics.counter("delayed_promoted_total", "Delayed tasks promoted to the ready queue")
+metrics.counter("tasks_throttled_total", "Dequeued tasks deferred by their type's concurrency or rate limit", ("task_type",))
+metrics.counter("leases_expired_total", "RUNNING tasks recovered after their lease expired")
+metrics.counter("task_events_compacted_total", "Task events folded into event history tables")
+metrics.counter("tasks_archived_total", "Terminal tasks moved to the archive database")
+metrics.gauge("worker_in_flight_tasks", "Tasks currently executing in worker processes")
+metrics.gauge("tasks_current", "Tasks per type and status, from the maintained task counts", ("task_type", "status"))
+metrics.gauge("queue_ready_depth", "Task IDs waiting in the Redis ready queue")
+metrics.gauge("queue_delayed_depth", "Task IDs waiting in the Redis delayed set")
+metrics.gauge("queue_oldest_ready_age_seconds", "How long the longest-waiting due QUEUED task has been due")
+metrics.histogram("task_queue_wait_seconds", "Time from a task becoming due to being claimed", ("task_type",))
+metrics.histogram("task_execution_seconds", "Handler execution time", ("task_type", "outcome"))
+metrics.histogram("task_total_seconds", "Worker time per task, from claim to the outcome being committed", ("task_type",))
+metrics.histogram("db_commit_seconds", "SQLite commit time", ("operation",))
+
+
+def process_id(role: str) -> str:
+    return f"{role}:{socket.gethostname()}:{os.getpid()}"
+
+
+class MetricsFlusher:
+    """
+    Periodically adds this process's counter/histogram deltas into one shared
+    Redis hash (HINCRBYFLOAT) and publishes its gauges under a per-process key
+    that expires if the process dies. Deltas that fail to flush are kept and
+    retried, so counts are not lost while Redis is unavailable.
+    """
+
+    def __init__(self, registry: Metrics, redis: Redis, process: str, interval_seconds: float):
+        self.registry = registry
+        self.redis = redis
+        self.process = process
+        self.interval_seconds = interval_seconds
+        self._runner: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.flush()
+
+    async def flush(self) -> bool:
+        deltas = self.registry.take_deltas()
+        _, gauges = self.registry.local_view()
+        gauges_key = _gauges_key(self.process)
+        ttl = max(1, int(self.interval_seconds * 3))
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for series, amount in deltas.items():
+                    pipe.hincrbyfloat(_counters_key(), series, amount)
+                pipe.delete(gauges_key)
+                if gauges:
+                    pipe.hset(gauges_key, mapping=gauges)
+                    pipe.expire(gauges_key, ttl)
+                pipe.zadd(_processes_key(), {self.process: time.time()})
+                await pipe.execute()
+            return True
+        except Exception:
+            self.registry.restore_deltas(deltas)
+            logger.warning("metrics_flush_failed", exc_info=True)
+            return False
+
+
+async def aggregated_view(redis: Redis, interval_seconds: float) -> tuple[dict[str, float], dict[str, float]]:
+    """
+    Cluster-wide totals and gauges (summed over processes seen recently).
+    """
+    cutoff = time.time() - interval_seconds * 3
+    await redis.zremrangebyscore(_processes_key(), "-inf", cutoff)
+    processes = await redis.zrange(_processes_key(), 0, -1)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hgetall(_counters_key())
+        for p in processes:
+            pipe.hgetall(_gauges_key(p.decode() if isinstance(p, bytes) else p))
+        counters_raw, *gauge_maps = await pipe.execute()
+
+    def _decode(raw: dict) -> dict[str, float]:
+        return {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
+
+    gauges: dict[str, float] = {}
+    for raw in gauge_maps:
+        for series, value in _decode(raw).items():
+            gauges[series] = gauges.get(series, 0.0) + value
+    return _decode(counters_raw), gauges
 
-def prometheus_text(snapshot: dict) -> str:
-    lines = []
-    for k, v in snapshot.items():
-        lines.append(f"# TYPE {k} counter")
-        lines.append(f"{k} {v}")
-    return "\n".join(lines) + "\n"
\ No newline at end of file
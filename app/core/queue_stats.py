@@ -0,0 +1,106 @@
+"""
+Point-in-time backlog figures for autoscaling: tasks per (task_type, status),
+Redis queue depths, and how long the oldest due task has been waiting.
+
+Every figure is a constant-cost read: the counts come from the trigger-
+maintained task_counts table, the depths are ZCARDs, and the oldest due task
+is the first entry of idx_tasks_status_next_run_enqueued. They are cluster-wide
+values, so /v1/metrics reports them directly instead of summing per-process
+gauges, and QueueStatsCache shares one snapshot between frequent scrapes.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import Metrics
+from app.db.models import Task, TaskCount, TaskStatus
+from app.queue.redis_queue import RedisQueue
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    counts: dict[tuple[str, str], int]  # (task_type, status) -> tasks
+    oldest_ready_age_seconds: float
+    # None when Redis could not be reached
+    ready_depth: int | None
+    delayed_depth: int | None
+
+    def gauges(self, registry: Metrics) -> dict[str, float]:
+        out = {
+            registry.gauge_series("tasks_current", task_type=task_type, status=status): float(n)
+            for (task_type, status), n in self.counts.items()
+        }
+        out[registry.gauge_series("queue_oldest_ready_age_seconds")] = self.oldest_ready_age_seconds
+        if self.ready_depth is not None:
+            out[registry.gauge_series("queue_ready_depth")] = float(self.ready_depth)
+        if self.delayed_depth is not None:
+            out[registry.gauge_series("queue_delayed_depth")] = float(self.delayed_depth)
+        return out
+
+
+async def collect_queue_stats(session: AsyncSession, queue: RedisQueue, now: datetime) -> QueueStats:
+    rows = (await session.execute(select(TaskCount))).scalars()
+    counts = {(r.task_type, r.status): r.count for r in rows}
+    oldest = await session.scalar(
+        select(Task.next_run_at)
+        .where(Task.status == TaskStatus.QUEUED, Task.next_run_at <= now)
+        .order_by(Task.next_run_at)
+        .limit(1)
+    )
+    age = 0.0
+    if oldest is not None:
+        due = oldest if oldest.tzinfo else oldest.replace(tzinfo=timezone.utc)
+        age = max(0.0, (now - due).total_seconds())
+
+    try:
+        ready, delayed = await queue.depth(), await queue.delayed_depth()
+    except Exception:
+        logger.warning("queue_depth_unavailable", exc_info=True)
+        ready = delayed = None
+    return QueueStats(counts=counts, oldest_ready_age_seconds=age, ready_depth=ready, delayed_depth=delayed)
+
+
+class QueueStatsCache:
+    """
+    The latest QueueStats, recomputed at most every `ttl_seconds`. Concurrent
+    callers during a refresh wait for it instead of starting their own.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._stats: QueueStats | None = None
+        self._taken_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> QueueStats | None:
+        if time.monotonic() - self._taken_at < self.ttl_seconds:
+            return self._stats
+        return None
+
+    async def get(self, sessions: async_sessionmaker[AsyncSession], queue: RedisQueue) -> QueueStats:
+        stats = self._fresh()
+        if stats is not None:
+            return stats
+        async with self._lock:
+            stats = self._fresh()
+            if stats is None:
+                async with sessions() as session:
+                    stats = await collect_queue_stats(session, queue, datetime.now(timezone.utc))
+                self._stats, self._taken_at = stats, time.monotonic()
+        return stats
+
+    def clear(self) -> None:
+        self._stats, self._taken_at = None, float("-inf")
+
+
+queue_stats = QueueStatsCache(settings.queue_stats_cache_seconds)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.retry import compute_next_run
+from app.core.state_machine import can_transition
+from app.db.models import Task, TaskEvent, TaskStatus
+from app.settings import settings
+
+
+async def reap_expired_leases(
+    session: AsyncSession, now: datetime, limit: int
+) -> tuple[list[tuple[str, datetime, int]], list[str]]:
+    """
+    Recovers RUNNING tasks whose lease (locked_until) has expired, i.e. whose
+    worker stopped renewing it. Each counts as a failed attempt: the task is
+    requeued with backoff, or FAILED once max_attempts is reached.
+
+    Every update is conditional on the lease still being expired, so a worker that
+    renews at the last moment keeps its task. Returns the requeued tasks as
+    (task_id, next_run_at, priority) for the delayed set, and the failed task IDs.
+    """
+    # Tasks claimed before leases existed have no locked_until; fall back to updated_at.
+    legacy_cutoff = now - timedelta(seconds=settings.task_lease_seconds)
+    expired = or_(
+        Task.locked_until < now,
+        and_(Task.locked_until.is_(None), Task.updated_at < legacy_cutoff),
+    )
+    stmt = (
+        select(Task.id, Task.attempts, Task.max_attempts, Task.priority)
+        .where(Task.status == TaskStatus.RUNNING, expired)
+        .order_by(Task.locked_until.asc())
+        .limit(limit)
+    )
+    rows = (await session.execute(stmt)).all()
+    # End the read transaction so the first UPDATE starts a write transaction
+    # (and waits on busy_timeout) instead of upgrading a read snapshot, which
+    # fails at once if another connection committed in between. The updates
+    # re-check the lease, so nothing renewed meanwhile is reaped.
+    await session.commit()
+
+    requeued: list[tuple[str, datetime, int]] = []
+    failed: list[str] = []
+    for r in rows:
+        attempts = r.attempts + 1
+        if attempts >= r.max_attempts:
+            to_status, next_run = TaskStatus.FAILED, None
+            values = dict(status=to_status, attempts=attempts, last_error="lease expired")
+        else:
+            to_status, next_run = TaskStatus.QUEUED, compute_next_run(attempts)
+            values = dict(
+                status=to_status,
+                attempts=attempts,
+                last_error="lease expired",
+                next_run_at=next_run,
+                enqueued_at=next_run,
+            )
+        if not can_transition(TaskStatus.RUNNING, to_status):
+            continue
+
+        res = await session.execute(
+            update(Task)
+            .where(Task.id == r.id, Task.status == TaskStatus.RUNNING, expired)
+            .values(updated_at=now, locked_until=None, **values)
+        )
+        if res.rowcount != 1:
+            continue
+
+        session.add(
+            TaskEvent(
+                task_id=r.id,
+                timestamp=now,
+                from_status=TaskStatus.RUNNING.value,
+                to_status=to_status.value,
+                message="lease expired: worker stopped renewing",
+            )
+        )
+        if next_run is None:
+            failed.append(r.id)
+        else:
+            requeued.append((r.id, next_run, r.priority))
+
+    await session.commit()
+    return requeued, failed
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import TaskResult
+from app.settings import settings
+
+ENCODING_IDENTITY = "identity"
+ENCODING_ZLIB = "zlib"
+
+
+@dataclass(frozen=True)
+class EncodedResult:
+    """
+    A result too large to keep inline in tasks.result_json; written to the
+    task_results table by the completion batcher.
+    """
+
+    data: bytes
+    encoding: str
+    size: int  # uncompressed bytes
+
+    def row(self, task_id: str) -> TaskResult:
+        return TaskResult(task_id=task_id, encoding=self.encoding, size=self.size, data=self.data)
+
+
+def offload_result(result_json: str) -> EncodedResult | None:
+    """
+    Returns None if the result fits inline (result_inline_max_bytes); otherwise
+    its out-of-row form, zlib-compressed unless that does not save space.
+    """
+    raw = result_json.encode("utf-8")
+    if len(raw) <= settings.result_inline_max_bytes:
+        return None
+    packed = zlib.compress(raw, settings.result_compression_level)
+    if len(packed) < len(raw):
+        return EncodedResult(packed, ENCODING_ZLIB, len(raw))
+    return EncodedResult(raw, ENCODING_IDENTITY, len(raw))
+
+
+def decode_result(data: bytes, encoding: str) -> str:
+    if encoding == ENCODING_ZLIB:
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+def iter_result(data: bytes, encoding: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Yields the result JSON in chunks of at most `chunk_size` bytes, inflating
+    incrementally so the whole document is never held uncompressed.
+    """
+    if encoding != ENCODING_ZLIB:
+        for i in range(0, len(data), chunk_size):
+            yield data[i : i + chunk_size]
+        return
+    inflater = zlib.decompressobj()
+    pending = data
+    while pending:
+        chunk = inflater.decompress(pending, chunk_size)
+        pending = inflater.unconsumed_tail
+        if chunk:
+            yield chunk
+    tail = inflater.flush()
+    if tail:
+        yield tail
+
+
+async def load_results(session: AsyncSession, task_ids: list[str]) -> dict[str, str]:
+    """
+    Loads and decodes offloaded results for `task_ids` with one query.
+    """
+    if not task_ids:
+        return {}
+    stmt = select(TaskResult.task_id, TaskResult.data, TaskResult.encoding).where(TaskResult.task_id.in_(task_ids))
+    return {r.task_id: decode_result(r.data, r.encoding) for r in await session.execute(stmt)}
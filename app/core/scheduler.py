@@ -1,48 +1,232 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime, timezone
+import logging
+from datetime import datetime, timedelta, timezone
 
-from redis.asyncio import Redis
-from sqlalchemy import select
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import MetricsFlusher, metrics, process_id
+from app.core.reaper import reap_expired_leases
+from app.db.archive import task_archive
+from app.db.events import compact_events, drop_expired_history
 from app.db.models import Task, TaskStatus
 from app.db.session import AsyncSessionLocal
+from app.logging_config import setup_logging
+from app.queue.connection import create_redis_pool, redis_from_pool
+from app.queue.notifications import publish_transitions, transition
 from app.queue.redis_queue import RedisQueue
 from app.settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-async def scheduler_loop() -> None:
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite returns naive datetimes; they are stored as UTC.
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+async def _mark_enqueued(session: AsyncSession, task_ids: list[str], enqueued_at) -> list[str]:
+    stmt = (
+        update(Task)
+        .where(Task.id.in_(task_ids), Task.status == TaskStatus.QUEUED)
+        .values(enqueued_at=enqueued_at)
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list((await session.execute(stmt)).scalars())
+
+
+async def schedule_due(session: AsyncSession, queue: RedisQueue, now: datetime) -> tuple[int, int]:
     """
-    Periodically scans for tasks that are QUEUED and eligible (next_run_at <= now),
-    then enqueues them into Redis for workers to pick up.
+    Reconciliation pass: hands QUEUED tasks to the transport if they are not
+    already there in the current eligibility window. Tasks due now go to the ready
+    queue; tasks due before the next pass go to the delayed set. Returns
+    (handed off, duplicates suppressed). Suppressed are the candidates skipped
+    because they were handed off within the window, counted off the (status,
+    next_run_at, enqueued_at) index in the same read, plus stale tasks re-sent
+    after scheduler_requeue_after_seconds that were still in the ready queue,
+    which keeps one entry per ID.
+
+    The enqueued_at marker is committed before pushing: if the push fails, the
+    task is picked up again once scheduler_requeue_after_seconds has passed.
     """
-    redis = Redis.from_url(settings.redis_url)
-    q = RedisQueue(redis)
+    stale = now - timedelta(seconds=settings.scheduler_requeue_after_seconds)
+    horizon = now + timedelta(seconds=settings.scheduler_interval_seconds)
+    eligible = (Task.status == TaskStatus.QUEUED, Task.next_run_at <= horizon)
+    stmt = (
+        select(Task.id, Task.priority, Task.next_run_at)
+        .where(*eligible, or_(Task.enqueued_at.is_(None), Task.enqueued_at <= stale))
+        .order_by(Task.next_run_at.asc())
+        .limit(settings.scheduler_batch_size)
+    )
+    rows = (await session.execute(stmt)).all()
+    in_window = await session.scalar(select(func.count()).where(*eligible, Task.enqueued_at > stale))
+    # End the read transaction before writing (see reap_expired_leases); tasks
+    # claimed or canceled in between are not marked, and not handed off
+    await session.commit()
+    if not rows:
+        return 0, in_window
 
-    try:
-        while True:
+    marked: set[str] = set()
+    due = [r for r in rows if _as_utc(r.next_run_at) <= now]
+    later = [r for r in rows if _as_utc(r.next_run_at) > now]
+
+    if due:
+        marked.update(await _mark_enqueued(session, [r.id for r in due], now))
+    if later:
+        # Marked with their run time so the window starts once they become due
+        marked.update(await _mark_enqueued(session, [r.id for r in later], Task.next_run_at))
+    await session.commit()
+    due = [r for r in due if r.id in marked]
+    later = [r for r in later if r.id in marked]
+
+    added = await queue.enqueue_many([(r.id, r.priority) for r in due]) if due else 0
+    await queue.schedule_many([(r.id, r.next_run_at, r.priority) for r in later])
+    return added + len(later), in_window + len(due) - added
+
+
+async def promoter_loop(q: RedisQueue) -> None:
+    """
+    Moves due retries from the delayed set onto the ready queue.
+    """
+    while True:
+        try:
+            moved = await q.promote_due(_now(), settings.delayed_promote_batch_size)
+        except Exception:
+            logger.exception("delayed_promote_failed")
+            moved = 0
+        if moved:
+            metrics.inc("delayed_promoted_total", moved)
+        if moved < settings.delayed_promote_batch_size:
+            await asyncio.sleep(settings.delayed_promote_interval_seconds)
+
+
+async def reconcile_loop(q: RedisQueue) -> None:
+    while True:
+        try:
             async with AsyncSessionLocal() as session:
-                stmt = (
-                    select(Task)
-                    .where(Task.status == TaskStatus.QUEUED, Task.next_run_at <= _now())
-                    .order_by(Task.next_run_at.asc())
-                    .limit(200)
+                enqueued, suppressed = await schedule_due(session, q, _now())
+        except Exception:
+            logger.exception("reconcile_failed")
+            enqueued = suppressed = 0
+
+        if enqueued:
+            metrics.inc("scheduler_enqueued_total", enqueued)
+        if suppressed:
+            metrics.inc("scheduler_duplicates_suppressed_total", suppressed)
+
+        await asyncio.sleep(settings.scheduler_interval_seconds)
+
+
+async def reaper_loop(q: RedisQueue) -> None:
+    """
+    Requeues or fails RUNNING tasks whose worker stopped renewing the lease.
+    """
+    while True:
+        requeued, failed = [], []
+        try:
+            async with AsyncSessionLocal() as session:
+                requeued, failed = await reap_expired_leases(session, _now(), settings.reaper_batch_size)
+
+            # Requeued tasks are QUEUED in SQLite already; if this push fails the
+            # reconciliation pass hands them over instead
+            await q.schedule_many(requeued)
+            if settings.publish_task_events:
+                await publish_transitions(
+                    q.redis,
+                    [transition(tid, "RUNNING", "QUEUED") for tid, _, _ in requeued]
+                    + [transition(tid, "RUNNING", "FAILED") for tid in failed],
+                )
+        except Exception:
+            logger.exception("reaper_failed")
+        if requeued or failed:
+            metrics.inc("leases_expired_total", len(requeued) + len(failed))
+        if requeued:
+            metrics.inc("tasks_retried_total", len(requeued))
+        if failed:
+            metrics.inc("tasks_failed_total", len(failed))
+
+        await asyncio.sleep(settings.reaper_interval_seconds)
+
+
+async def compactor_loop() -> None:
+    """
+    Folds the events of long-finished tasks into event history tables and drops
+    history tables past their retention.
+    """
+    while True:
+        tasks = 0
+        try:
+            async with AsyncSessionLocal() as session:
+                tasks, events = await compact_events(
+                    session, _now(), settings.event_compact_after_seconds, settings.event_compact_batch_size
+                )
+            if events:
+                metrics.inc("task_events_compacted_total", events)
+            if tasks < settings.event_compact_batch_size:
+                async with AsyncSessionLocal() as session:
+                    await session.run_sync(
+                        lambda s: drop_expired_history(s.connection(), _now(), settings.event_history_retention_months)
+                    )
+                    await session.commit()
+        except Exception:
+            logger.exception("event_compaction_failed")
+            tasks = 0
+        if tasks < settings.event_compact_batch_size:
+            await asyncio.sleep(settings.event_compact_interval_seconds)
+
+
+async def archiver_loop() -> None:
+    """
+    Moves long-finished tasks to the archive database, one bounded batch (and
+    one short hot-database write transaction) at a time.
+    """
+    if not settings.archive_after_seconds:
+        return
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                archived = await task_archive.archive(
+                    session, _now(), settings.archive_after_seconds, settings.archive_batch_size
                 )
-                res = await session.execute(stmt)
-                tasks = list(res.scalars().all())
+        except Exception:
+            logger.exception("archive_failed")
+            archived = 0
+        if archived:
+            metrics.inc("tasks_archived_total", archived)
+        if archived < settings.archive_batch_size:
+            await asyncio.sleep(settings.archive_interval_seconds)
 
-            for t in tasks:
-                await q.enqueue(t.id, priority=t.priority)
 
-            await asyncio.sleep(settings.scheduler_interval_seconds)
+async def scheduler_loop() -> None:
+    """
+    Promotes due delayed tasks every delayed_promote_interval_seconds, reaps
+    expired RUNNING leases, less often scans SQLite for QUEUED tasks missing
+    from Redis (crash recovery), compacts the events of finished tasks and
+    archives long-finished ones.
+
+    Each loop logs and retries its own failures after its interval, so a
+    transient Redis or SQLite error in one never stops the others.
+    """
+    redis = redis_from_pool(create_redis_pool())
+    q = RedisQueue(redis)
+    flusher = MetricsFlusher(metrics, redis, process_id("scheduler"), settings.metrics_flush_interval_seconds)
+
+    flusher.start()
+    try:
+        await asyncio.gather(promoter_loop(q), reconcile_loop(q), reaper_loop(q), compactor_loop(), archiver_loop())
     finally:
-        await redis.aclose()
+        await flusher.close()
+        await task_archive.aclose()
+        await redis.connection_pool.aclose()
 
 
 if __name__ == "__main__":
-    asyncio.run(scheduler_loop())
\ No newline at end of file
+    setup_logging()
+    asyncio.run(scheduler_loop())
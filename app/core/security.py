@@ -4,15 +4,32 @@ from fastapi import Header, HTTPException, Request
 from app.settings import settings
 
 
-async def require_api_key(request: Request, x_api_key: str | None = Header(default=None)) -> None:
+def _check_content_length(request: Request, limit: int) -> None:
     # best-effort request size guard
     content_length = request.headers.get("content-length")
     if content_length:
         try:
-            if int(content_length) > settings.max_request_bytes:
+            if int(content_length) > limit:
                 raise HTTPException(status_code=413, detail="Request too large")
         except ValueError:
             pass
 
+
+def _check_api_key(x_api_key: str | None) -> None:
     if not x_api_key or x_api_key != settings.api_key:
-        raise HTTPException(status_code=401, detail="Unauthorized")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+async def require_api_key(request: Request, x_api_key: str | None = Header(default=None)) -> None:
+    _check_content_length(request, settings.max_request_bytes)
+    _check_api_key(x_api_key)
+
+
+async def require_api_key_stream(x_api_key: str | None = Header(default=None)) -> None:
+    # Streaming bodies are unbounded; the route limits each line instead.
+    _check_api_key(x_api_key)
+
+
+async def require_api_key_batch(request: Request, x_api_key: str | None = Header(default=None)) -> None:
+    _check_content_length(request, settings.max_batch_request_bytes)
+    _check_api_key(x_api_key)
@@ -0,0 +1,85 @@
+"""
+JSON encoding for every hot path (API bodies, queue/pub-sub messages, task
+payloads and results, log lines), backed by orjson.
+
+Output is compact UTF-8 and non-string dict keys are stringified, as the
+stdlib does. Values orjson cannot encode but the stdlib can (integers beyond
+64 bits) fall back to the stdlib encoder, so nothing that used to serialize
+starts failing. Documents orjson rejects (the NaN and Infinity the stdlib
+writes) are decoded by the stdlib.
+
+orjson decodes integers beyond 64 bits as floats. Internal messages never
+carry them, so only task payloads and results, which may, are decoded with
+loads_exact.
+
+orjson encodes NaN and Infinity as null; task payloads are checked for them
+on submission instead (see TaskCreateRequest).
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+import orjson
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# The longest integer orjson decodes exactly (2**64 - 1) has 20 digits. Digits
+# map to "0" and the characters that make a number a float are kept, so runs
+# are found with substring searches instead of a regex scan.
+_NUMBER_SHAPE = bytes(0x30 if 0x30 <= b <= 0x39 else b if b in b".eE" else 0x20 for b in range(256))
+_LONG_DIGITS = b"0" * 20
+
+
+def _has_long_integer(data: str | bytes) -> bool:
+    """
+    True if the document may hold an integer orjson would decode as a float: a
+    run of 20+ digits that is not part of a fraction or exponent. Runs inside
+    strings cannot be told apart and count too.
+    """
+    raw = data.encode("utf-8", "surrogatepass") if isinstance(data, str) else data
+    shape = raw.translate(_NUMBER_SHAPE)
+    start = shape.find(_LONG_DIGITS)
+    while start != -1:
+        end = start + len(_LONG_DIGITS)
+        while end < len(shape) and shape[end] == 0x30:
+            end += 1
+        if (start == 0 or shape[start - 1] != 0x2E) and shape[end : end + 1] not in (b".", b"e", b"E"):
+            return True
+        start = shape.find(_LONG_DIGITS, end)
+    return False
+
+
+def dumpb(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    try:
+        return orjson.dumps(obj, default=default, option=_OPTIONS)
+    except orjson.JSONEncodeError:
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> str:
+    return dumpb(obj, default).decode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+
+
+def loads_exact(data: str | bytes) -> Any:
+    """
+    Like loads, but integers beyond 64 bits decode to int.
+    """
+    if _has_long_integer(data):
+        return json.loads(data)
+    return loads(data)
+
+
+def raw(json_text: str | bytes) -> orjson.Fragment:
+    """
+    Embeds already-serialized JSON in a document passed to dumps/dumpb without
+    parsing and re-encoding it.
+    """
+    return orjson.Fragment(json_text)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas import TaskCreateRequest
+from app.core import serialization
+from app.core.idempotency import IdempotencyPair, find_many_by_idempotency_keys, idempotency_cache
+from app.core.metrics import metrics
+from app.core.state_machine import can_transition
+from app.db.models import Task, TaskEvent, TaskStatus
+from app.queue.redis_queue import RedisQueue
+from app.settings import settings
+
+
+@dataclass
+class Submitted:
+    task: Task
+    created: bool
+
+
+async def _resolve_keys(
+    session: AsyncSession, pairs: set[IdempotencyPair], redis: Redis | None
+) -> dict[IdempotencyPair, Task]:
+    known: dict[IdempotencyPair, Task] = {}
+    cached = await idempotency_cache.get_many(pairs, redis)
+    if cached:
+        ids = list(cached.values())
+        by_id: dict[str, Task] = {}
+        for i in range(0, len(ids), 500):
+            stmt = select(Task).where(Task.id.in_(ids[i : i + 500]))
+            by_id.update((t.id, t) for t in (await session.execute(stmt)).scalars())
+        for pair, task_id in cached.items():
+            if task_id in by_id:
+                known[pair] = by_id[task_id]
+            else:
+                idempotency_cache.discard(pair)
+    missing = pairs - known.keys()
+    if missing:
+        known.update(await find_many_by_idempotency_keys(session, missing))
+    return known
+
+
+async def submit_tasks(session: AsyncSession, queue: RedisQueue, reqs: list[TaskCreateRequest]) -> list[Submitted]:
+    """
+    Creates tasks for `reqs` and hands them to the queue, returning one result per
+    request in order.
+
+    A key that already exists (or repeats within `reqs`) returns the existing task
+    instead of creating one. Keys are resolved through the idempotency cache,
+    then one indexed query. The lookup's read transaction ends before the insert,
+    so the write starts its own transaction and waits on SQLite's busy_timeout
+    instead of failing on a stale snapshot.
+
+    New tasks are inserted with ON CONFLICT DO NOTHING on the unique
+    (task_type, idempotency_key) index, so a concurrent submission of the same key
+    loses cleanly and returns the winner's task. Tasks and their PENDING/QUEUED
+    events commit in one transaction and are then enqueued with one Redis round
+    trip. If the enqueue fails, the scheduler's reconciliation pass picks the
+    tasks up from SQLite.
+    """
+    if not can_transition(TaskStatus.PENDING, TaskStatus.QUEUED):
+        raise RuntimeError("Invalid state transition (PENDING->QUEUED)")
+
+    redis = queue.redis if idempotency_cache.redis_ttl_seconds else None
+    keyed = {(r.task_type, r.idempotency_key) for r in reqs if r.idempotency_key}
+    known = await _resolve_keys(session, keyed, redis) if keyed else {}
+
+    now = datetime.now(timezone.utc)
+    pending: list[tuple[IdempotencyPair | None, Task]] = []
+    new_by_pair: dict[IdempotencyPair, Task] = {}
+    task_rows: list[dict] = []
+    for r in reqs:
+        pair = (r.task_type, r.idempotency_key) if r.idempotency_key else None
+        if pair in known:
+            pending.append((pair, known[pair]))
+            continue
+        if pair in new_by_pair:
+            pending.append((pair, new_by_pair[pair]))
+            continue
+
+        row = dict(
+            id=str(uuid.uuid4()),
+            task_type=r.task_type,
+            payload_json=serialization.dumps(r.payload),
+            status=TaskStatus.QUEUED,
+            priority=r.priority or 0,
+            idempotency_key=r.idempotency_key,
+            attempts=0,
+            max_attempts=settings.default_max_attempts,
+            created_at=now,
+            updated_at=now,
+            next_run_at=now,
+            enqueued_at=now,
+            locked_until=None,
+            last_error=None,
+            result_json=None,
+        )
+        task_rows.append(row)
+        t = Task(**row)
+        if pair:
+            new_by_pair[pair] = t
+        pending.append((pair, t))
+
+    inserted: set[str] = set()
+    if task_rows:
+        if keyed:
+            await session.commit()  # end the read transaction before writing
+        stmt = sqlite_insert(Task).on_conflict_do_nothing(index_elements=["task_type", "idempotency_key"])
+        inserted = set((await session.execute(stmt.returning(Task.id), task_rows)).scalars())
+
+        lost = {pair for pair, t in new_by_pair.items() if t.id not in inserted}
+        if lost:
+            # Inserted concurrently by another request since our lookup
+            known.update(await find_many_by_idempotency_keys(session, lost))
+
+        event_rows = []
+        for row in task_rows:
+            if row["id"] in inserted:
+                event_rows += [
+                    dict(task_id=row["id"], timestamp=now, from_status="PENDING", to_status="PENDING", message="created"),
+                    dict(task_id=row["id"], timestamp=now, from_status="PENDING", to_status="QUEUED", message="enqueued"),
+                ]
+        if event_rows:
+            await session.execute(insert(TaskEvent), event_rows)
+        with metrics.time("db_commit_seconds", operation="submit"):
+            await session.commit()
+
+    results: list[Submitted] = []
+    resolved: dict[IdempotencyPair, str] = {}
+    for pair, t in pending:
+        if t.id not in inserted and pair in known:
+            t = known[pair]
+        # A key repeated within reqs reports created only for its first occurrence
+        created = t.id in inserted and (pair is None or pair not in resolved)
+        results.append(Submitted(task=t, created=created))
+        if pair:
+            resolved[pair] = t.id
+
+    if resolved:
+        await idempotency_cache.put_many(resolved, redis)
+    if inserted:
+        await queue.enqueue_many([(row["id"], row["priority"]) for row in task_rows if row["id"] in inserted])
+    return results
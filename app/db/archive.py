@@ -0,0 +1,145 @@
+"""
+Archive of long-finished tasks in a separate SQLite file (ARCHIVE_SQLITE_PATH).
+
+The archiver moves tasks terminal for archive_after_seconds out of the hot
+database in batches: each archived task becomes one append-only row holding
+its task columns, its result as stored, and its events. A batch is first
+committed to the archive and then deleted from the hot tables in one short
+transaction; both steps are idempotent, so a crash in between only repeats
+the batch.
+
+Archived tasks are found by primary key, so lookups stay cheap however large
+the archive grows.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, MetaData, String, Table, Text, delete, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.results import decode_result
+from app.db.events import encode_events, history_month, history_table, load_history_json
+from app.db.models import Task, TaskEvent, TaskResult, TaskStatus
+from app.db.session import build_engine
+from app.settings import settings
+
+_TERMINAL = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED)
+
+archive_metadata = MetaData()
+
+archived_tasks = Table(
+    "archived_tasks",
+    archive_metadata,
+    # The task columns without their hot-table indexes: lookups are by id only
+    *(Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in Task.__table__.columns),
+    # Offloaded results keep their stored encoding (result_json stays NULL)
+    Column("result_encoding", String(16), nullable=True),
+    Column("result_data", LargeBinary, nullable=True),
+    Column("result_size", Integer, nullable=True),
+    Column("events_json", Text, nullable=True),
+    Column("archived_at", DateTime),
+)
+
+
+def archived_result_json(row: Row) -> str | None:
+    if row.result_data is not None:
+        return decode_result(row.result_data, row.result_encoding)
+    return row.result_json
+
+
+class TaskArchive:
+    def __init__(self, path: str):
+        self.path = path
+        self._engine: AsyncEngine | None = None
+
+    async def _get_engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = build_engine(f"sqlite+aiosqlite:///{self.path}")
+            async with self._engine.begin() as conn:
+                await conn.run_sync(archive_metadata.create_all)
+        return self._engine
+
+    async def get(self, task_id: str) -> Row | None:
+        """
+        The archived row of `task_id`, or None. Does not create the archive
+        file if nothing has been archived yet.
+        """
+        if self._engine is None and not os.path.exists(self.path):
+            return None
+        engine = await self._get_engine()
+        async with engine.connect() as conn:
+            return (await conn.execute(select(archived_tasks).where(archived_tasks.c.id == task_id))).first()
+
+    async def archive(self, session: AsyncSession, now: datetime, older_than_seconds: float, limit: int) -> int:
+        """
+        Moves up to `limit` tasks terminal for `older_than_seconds` to the
+        archive. Returns how many were moved.
+
+        Candidates are read straight off the (status, updated_at) index, oldest
+        first per status; a global ORDER BY would sort every old task per batch.
+        """
+        cutoff = now - timedelta(seconds=older_than_seconds)
+        stmt = select(Task).where(Task.status.in_(_TERMINAL), Task.updated_at < cutoff).limit(limit)
+        tasks = list((await session.execute(stmt)).scalars())
+        if not tasks:
+            return 0
+        task_ids = [t.id for t in tasks]
+
+        stmt = select(TaskResult).where(TaskResult.task_id.in_([t.id for t in tasks if t.result_offloaded]))
+        blobs = {r.task_id: r for r in (await session.execute(stmt)).scalars()}
+
+        live: dict[str, list] = {}
+        stmt = (
+            select(TaskEvent.task_id, TaskEvent.id, TaskEvent.timestamp, TaskEvent.from_status, TaskEvent.to_status, TaskEvent.message)
+            .where(TaskEvent.task_id.in_(task_ids))
+            .order_by(TaskEvent.task_id, TaskEvent.id)
+        )
+        for r in await session.execute(stmt):
+            live.setdefault(r.task_id, []).append(r)
+
+        compacted: dict[str, list[str]] = {}
+        for t in tasks:
+            if t.events_compacted_at is not None:
+                compacted.setdefault(history_month(t.updated_at), []).append(t.id)
+        history: dict[str, str] = {}
+        for month, ids in compacted.items():
+            history.update(await load_history_json(session, month, ids))
+        await session.commit()  # end the read transaction before writing
+
+        rows = []
+        for t in tasks:
+            row = {c.name: getattr(t, c.key) for c in Task.__table__.columns}
+            blob = blobs.get(t.id)
+            row.update(
+                result_encoding=blob.encoding if blob else None,
+                result_data=blob.data if blob else None,
+                result_size=blob.size if blob else None,
+                events_json=history.get(t.id) or (encode_events(live[t.id]) if t.id in live else None),
+                archived_at=now,
+            )
+            rows.append(row)
+        engine = await self._get_engine()
+        async with engine.begin() as conn:
+            await conn.execute(archived_tasks.insert().prefix_with("OR REPLACE"), rows)
+
+        await session.execute(delete(TaskEvent).where(TaskEvent.task_id.in_(task_ids)))
+        await session.execute(delete(TaskResult).where(TaskResult.task_id.in_(task_ids)))
+        for month, ids in compacted.items():
+            found = [i for i in ids if i in history]  # its partition may have been dropped
+            if found:
+                table = history_table(month)
+                await session.execute(delete(table).where(table.c.task_id.in_(found)))
+        await session.execute(delete(Task).where(Task.id.in_(task_ids)))
+        await session.commit()
+        return len(tasks)
+
+    async def aclose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+
+task_archive = TaskArchive(settings.archive_sqlite_path)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Mapping
+
+from sqlalchemy import ColumnElement, and_, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import metrics
+from app.core.state_machine import can_transition
+from app.db.models import Task, TaskEvent, TaskStatus
+
+
+async def claim_tasks(
+    session: AsyncSession,
+    task_ids: list[str],
+    now: datetime,
+    lease_seconds: float,
+    message: str = "picked up by worker",
+) -> list[Task]:
+    """
+    Atomically moves eligible tasks from QUEUED to RUNNING with a single
+    conditional UPDATE ... RETURNING, and sets locked_until as the claim's lease.
+
+    Only rows that are still QUEUED and due are claimed, so two workers racing on
+    the same ID cannot both win. Commits and returns the claimed tasks in the
+    order of `task_ids`.
+
+    A claimed task's `attempts` identifies the claim (see `held`): lease
+    renewals and outcomes carry it, so they apply nothing once the task has
+    been reaped and claimed again.
+    """
+    if not task_ids or not can_transition(TaskStatus.QUEUED, TaskStatus.RUNNING):
+        return []
+
+    stmt = (
+        update(Task)
+        .where(
+            Task.id.in_(task_ids),
+            Task.status == TaskStatus.QUEUED,
+            Task.next_run_at <= now,
+        )
+        .values(
+            status=TaskStatus.RUNNING,
+            updated_at=now,
+            locked_until=now + timedelta(seconds=lease_seconds),
+        )
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = list((await session.execute(stmt)).scalars())
+    if not claimed:
+        await session.rollback()
+        return []
+
+    session.add_all(
+        TaskEvent(
+            task_id=t.id,
+            timestamp=now,
+            from_status=TaskStatus.QUEUED.value,
+            to_status=TaskStatus.RUNNING.value,
+            message=message,
+        )
+        for t in claimed
+    )
+    with metrics.time("db_commit_seconds", operation="claim"):
+        await session.commit()
+
+    order = {tid: i for i, tid in enumerate(task_ids)}
+    claimed.sort(key=lambda t: order[t.id])
+    return claimed
+
+
+def held(claims: Mapping[str, int]) -> ColumnElement[bool]:
+    """
+    Matches tasks still RUNNING under the given claims: task ID -> the
+    `attempts` value it was claimed with. Every return to QUEUED (a retry, or
+    the reaper recovering an expired lease) counts an attempt, so a stale
+    worker's claim never matches the task's next one.
+    """
+    return and_(
+        Task.status == TaskStatus.RUNNING,
+        Task.id.in_(list(claims)),
+        tuple_(Task.id, Task.attempts).in_(list(claims.items())),
+    )
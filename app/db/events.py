@@ -0,0 +1,215 @@
+"""
+Event storage. Live events are rows in `task_events`. Once a task has been
+terminal for event_compact_after_seconds, the compactor folds its events into
+a single row of a monthly history table (`task_event_history_YYYYMM`, by the
+month the task finished) and deletes them from `task_events`, which therefore
+only holds the history of active and recently finished tasks.
+
+Retention drops whole monthly tables, which is O(1) where deleting rows from
+one large table would rewrite its indexes.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text, delete, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import serialization
+from app.db.models import Task, TaskEvent, TaskStatus
+
+HISTORY_PREFIX = "task_event_history_"
+
+_TERMINAL = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED)
+
+_history_metadata = MetaData()
+
+
+def history_table(month: str) -> Table:
+    """
+    The history partition for `month` ("YYYYMM"): one row per compacted task
+    holding its events as JSON.
+    """
+    name = f"{HISTORY_PREFIX}{month}"
+    if name in _history_metadata.tables:
+        return _history_metadata.tables[name]
+    return Table(
+        name,
+        _history_metadata,
+        Column("task_id", String(36), primary_key=True),
+        Column("first_timestamp", DateTime),
+        Column("last_timestamp", DateTime),
+        Column("event_count", Integer),
+        # [[id, timestamp, from_status, to_status, message], ...] in id order
+        Column("events_json", Text),
+    )
+
+
+def history_month(finished_at: datetime) -> str:
+    """
+    The partition holding the history of a task that finished at `finished_at`.
+    """
+    return f"{finished_at.year:04d}{finished_at.month:02d}"
+
+
+@dataclass(frozen=True)
+class EventRecord:
+    id: int
+    timestamp: datetime
+    from_status: str
+    to_status: str
+    message: str
+
+
+async def load_task_events(
+    session: AsyncSession, task_id: str, after_id: int, limit: int, history: str | None = None
+) -> list[EventRecord]:
+    """
+    Up to `limit` events of one task with id > after_id, in id order: an index
+    seek on (task_id, id), or for a compacted task (pass its history_month() as
+    `history`) a primary-key lookup of its history row. Neither depends on how
+    many events are stored.
+    """
+    if history is None:
+        stmt = (
+            select(TaskEvent.id, TaskEvent.timestamp, TaskEvent.from_status, TaskEvent.to_status, TaskEvent.message)
+            .where(TaskEvent.task_id == task_id, TaskEvent.id > after_id)
+            .order_by(TaskEvent.id.asc())
+            .limit(limit)
+        )
+        return [EventRecord(*r) for r in await session.execute(stmt)]
+
+    table = history_table(history)
+    try:
+        events_json = await session.scalar(select(table.c.events_json).where(table.c.task_id == task_id))
+    except OperationalError as e:
+        if "no such table" not in str(e.orig):
+            raise
+        return []  # dropped by retention
+    return decode_events(events_json, after_id, limit) if events_json else []
+
+
+def encode_events(events: list) -> str:
+    """
+    Serializes event rows (id, timestamp, from_status, to_status, message), in
+    id order, as stored in history tables and the archive.
+    """
+    return serialization.dumps([[e.id, e.timestamp.isoformat(), e.from_status, e.to_status, e.message] for e in events])
+
+
+def decode_events(events_json: str, after_id: int, limit: int) -> list[EventRecord]:
+    events = [
+        EventRecord(eid, datetime.fromisoformat(ts), from_s, to_s, msg)
+        for eid, ts, from_s, to_s, msg in serialization.loads(events_json)
+        if eid > after_id
+    ]
+    return events[:limit]
+
+
+async def load_history_json(session: AsyncSession, month: str, task_ids: list[str]) -> dict[str, str]:
+    """
+    The history rows of `task_ids` in one partition, as {task_id: events_json}.
+    """
+    table = history_table(month)
+    stmt = select(table.c.task_id, table.c.events_json).where(table.c.task_id.in_(task_ids))
+    try:
+        return dict((await session.execute(stmt)).all())
+    except OperationalError as e:
+        if "no such table" not in str(e.orig):
+            raise
+        return {}
+
+
+async def compact_events(session: AsyncSession, now: datetime, older_than_seconds: float, limit: int) -> tuple[int, int]:
+    """
+    Folds the events of up to `limit` tasks that have been terminal for
+    `older_than_seconds` into history rows, in one write transaction. Returns
+    (tasks compacted, events folded).
+
+    Candidates come from a partial index over tasks not yet compacted, so the
+    scan does not grow with the number of compacted tasks.
+    """
+    cutoff = now - timedelta(seconds=older_than_seconds)
+    stmt = (
+        select(Task.id, Task.updated_at)
+        .where(
+            Task.events_compacted_at.is_(None),
+            Task.status.in_(_TERMINAL),
+            Task.updated_at < cutoff,
+        )
+        .limit(limit)
+    )
+    finished = dict((await session.execute(stmt)).all())
+    task_ids = list(finished)
+    if not task_ids:
+        return 0, 0
+
+    stmt = (
+        select(TaskEvent.task_id, TaskEvent.id, TaskEvent.timestamp, TaskEvent.from_status, TaskEvent.to_status, TaskEvent.message)
+        .where(TaskEvent.task_id.in_(task_ids))
+        .order_by(TaskEvent.task_id, TaskEvent.id)
+    )
+    by_task: dict[str, list] = {}
+    for r in await session.execute(stmt):
+        by_task.setdefault(r.task_id, []).append(r)
+    await session.commit()  # end the read transaction before writing
+
+    # Writing first makes this a write transaction from the start; tasks archived
+    # or compacted since the read are left out
+    stmt = (
+        update(Task)
+        .where(Task.id.in_(task_ids), Task.events_compacted_at.is_(None))
+        .values(events_compacted_at=now)
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    task_ids = list((await session.execute(stmt)).scalars())
+    if not task_ids:
+        await session.commit()
+        return 0, 0
+    by_task = {task_id: by_task[task_id] for task_id in task_ids if task_id in by_task}
+
+    by_month: dict[str, list[dict]] = {}
+    for task_id, events in by_task.items():
+        by_month.setdefault(history_month(finished[task_id]), []).append(
+            {
+                "task_id": task_id,
+                "first_timestamp": events[0].timestamp,
+                "last_timestamp": events[-1].timestamp,
+                "event_count": len(events),
+                "events_json": encode_events(events),
+            }
+        )
+
+    for month, rows in by_month.items():
+        table = history_table(month)
+        await session.run_sync(lambda s: table.create(s.connection(), checkfirst=True))
+        await session.execute(table.insert(), rows)
+    await session.execute(delete(TaskEvent).where(TaskEvent.task_id.in_(task_ids)))
+    await session.commit()
+    return len(task_ids), sum(len(e) for e in by_task.values())
+
+
+def drop_expired_history(conn: Connection, now: datetime, retention_months: int) -> list[str]:
+    """
+    Drops history partitions entirely older than `retention_months` months.
+    """
+    if retention_months <= 0:
+        return []
+    index = now.year * 12 + now.month - 1 - retention_months
+    oldest_kept = f"{index // 12:04d}{index % 12 + 1:02d}"
+    names = conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :pattern"),
+        {"pattern": f"{HISTORY_PREFIX}%"},
+    ).scalars().all()
+    dropped = []
+    for name in names:
+        month = name[len(HISTORY_PREFIX) :]
+        if month.isdigit() and month < oldest_kept:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+            _history_metadata.remove(history_table(month))
+            dropped.append(name)
+    return dropped
@@ -1,12 +1,73 @@
 import asyncio
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
 from app.db.session import engine
 from app.db.models import Base
 
 
+def _upgrade_existing(conn: Connection) -> None:
+    """
+    create_all only creates missing tables. For tables created by an older
+    version, add new (nullable) columns and any missing indexes in place.
+    """
+    insp = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in existing:
+                col_type = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"))
+        if table.name == "tasks":
+            _prepare_idempotency_index(conn)
+            # Replaced by the composite indexes that lead with the same column
+            for name in (
+                "ix_tasks_updated_at",
+                "ix_tasks_status",
+                "ix_tasks_task_type",
+                "ix_tasks_created_at",
+                "idx_tasks_status_next_run",
+            ):
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        if table.name == "task_events":
+            # Replaced by idx_task_events_task_id_id; nothing queries by timestamp
+            conn.execute(text("DROP INDEX IF EXISTS ix_task_events_task_id"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_task_events_timestamp"))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _prepare_idempotency_index(conn: Connection) -> None:
+    """
+    Older databases could hold several tasks with the same (task_type,
+    idempotency_key), which would fail the unique index. Keep the key on the
+    oldest task and clear it on the others. The single-column index is replaced
+    by the composite one.
+    """
+    if "uq_tasks_task_type_idempotency_key" in {i["name"] for i in inspect(conn).get_indexes("tasks")}:
+        return
+    conn.execute(
+        text(
+            """
+            UPDATE tasks SET idempotency_key = NULL
+            WHERE idempotency_key IS NOT NULL AND rowid NOT IN (
+                SELECT min(rowid) FROM tasks WHERE idempotency_key IS NOT NULL
+                GROUP BY task_type, idempotency_key
+            )
+            """
+        )
+    )
+    conn.execute(text("DROP INDEX IF EXISTS ix_tasks_idempotency_key"))
+
+
 async def main() -> None:
     async with engine.begin() as conn:
+        await conn.run_sync(_upgrade_existing)
         await conn.run_sync(Base.metadata.create_all)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
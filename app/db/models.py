@@ -1,6 +1,7 @@
 import enum
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, Enum, Text, Index
+from sqlalchemy import Boolean, String, Integer, DateTime, Enum, LargeBinary, Text, Index, event, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -21,35 +22,144 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    task_type: Mapped[str] = mapped_column(String(64), index=True)
+    task_type: Mapped[str] = mapped_column(String(64))
     payload_json: Mapped[str] = mapped_column(Text)
-    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), index=True)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus))
 
     priority: Mapped[int] = mapped_column(Integer, default=0, index=True)
-    idempotency_key: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)
+    idempotency_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
 
     attempts: Mapped[int] = mapped_column(Integer, default=0)
     max_attempts: Mapped[int] = mapped_column(Integer, default=5)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
     next_run_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    # Last time the task was handed to the queue transport; the scheduler skips
+    # tasks enqueued within the current eligibility window.
+    enqueued_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     locked_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Small results are stored inline; larger ones live in task_results and
+    # result_offloaded is set (result_json stays NULL)
     result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
-
-
-Index("idx_tasks_status_next_run", Task.status, Task.next_run_at)
+    result_offloaded: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # Set once the task's events have been folded into an event history table
+    events_compacted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+# Idempotency: at most one task per (task_type, key); NULL keys never conflict
+Index("uq_tasks_task_type_idempotency_key", Task.task_type, Task.idempotency_key, unique=True)
+# Due-task scans; enqueued_at lets reconciliation filter and count its requeue
+# window without reading rows
+Index("idx_tasks_status_next_run_enqueued", Task.status, Task.next_run_at, Task.enqueued_at)
+# Task listings, newest first: one index per supported filter, each ending in
+# the (created_at, id) sort key so pages are index seeks with no sort step
+Index("idx_tasks_created_id", Task.created_at, Task.id)
+Index("idx_tasks_status_created_id", Task.status, Task.created_at, Task.id)
+Index("idx_tasks_type_created_id", Task.task_type, Task.created_at, Task.id)
+Index("idx_tasks_status_locked_until", Task.status, Task.locked_until)
+# Archiving (terminal tasks by age) and the reaper's legacy-lease fallback
+Index("idx_tasks_status_updated_at", Task.status, Task.updated_at)
+# Compaction candidates only; compacted tasks drop out of the index
+Index(
+    "idx_tasks_events_uncompacted",
+    Task.status,
+    Task.updated_at,
+    sqlite_where=Task.events_compacted_at.is_(None),
+)
 
 
 class TaskEvent(Base):
     __tablename__ = "task_events"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    task_id: Mapped[str] = mapped_column(String(36), index=True)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, index=True)
+    task_id: Mapped[str] = mapped_column(String(36))
+    timestamp: Mapped[datetime] = mapped_column(DateTime)
     from_status: Mapped[str] = mapped_column(String(32))
     to_status: Mapped[str] = mapped_column(String(32))
-    message: Mapped[str] = mapped_column(Text)
\ No newline at end of file
+    message: Mapped[str] = mapped_column(Text)
+
+
+# One task's events in id order, seekable by id for cursor pagination
+Index("idx_task_events_task_id_id", TaskEvent.task_id, TaskEvent.id)
+
+
+class TaskResult(Base):
+    """
+    Out-of-row result storage: the result JSON, compressed per `encoding`.
+    """
+
+    __tablename__ = "task_results"
+
+    task_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    encoding: Mapped[str] = mapped_column(String(16))
+    size: Mapped[int] = mapped_column(Integer)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+class TaskCount(Base):
+    """
+    Number of tasks per (task_type, status), kept current by triggers on
+    `tasks` inside the writing transaction (see install_task_count_triggers),
+    so totals and queue gauges never need a count(*) scan.
+    """
+
+    __tablename__ = "task_counts"
+
+    task_type: Mapped[str] = mapped_column(String(64), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+_TASK_COUNT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_task_counts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_counts (task_type, status, count) VALUES (NEW.task_type, NEW.status, 1)
+        ON CONFLICT (task_type, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_task_counts_delete AFTER DELETE ON tasks BEGIN
+        UPDATE task_counts SET count = count - 1 WHERE task_type = OLD.task_type AND status = OLD.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_task_counts_update AFTER UPDATE OF status ON tasks
+    WHEN OLD.status IS NOT NEW.status BEGIN
+        UPDATE task_counts SET count = count - 1 WHERE task_type = OLD.task_type AND status = OLD.status;
+        INSERT INTO task_counts (task_type, status, count) VALUES (NEW.task_type, NEW.status, 1)
+        ON CONFLICT (task_type, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+]
+
+
+def install_task_count_triggers(conn: Connection) -> None:
+    """
+    Seeds task_counts from `tasks` and installs the triggers that keep it
+    current. Run in the same transaction as the seeding so no transition is
+    missed; a no-op once the triggers exist.
+    """
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_task_counts_insert'")
+    ).first()
+    if exists:
+        return
+    conn.execute(text("DELETE FROM task_counts"))
+    conn.execute(
+        text(
+            "INSERT INTO task_counts (task_type, status, count) "
+            "SELECT task_type, status, count(*) FROM tasks GROUP BY task_type, status"
+        )
+    )
+    for ddl in _TASK_COUNT_TRIGGERS:
+        conn.execute(text(ddl))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(_target, conn: Connection, **_kw) -> None:
+    if conn.dialect.name == "sqlite":
+        install_task_count_triggers(conn)
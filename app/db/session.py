@@ -1,7 +1,64 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from app.settings import settings
 
 DATABASE_URL = f"sqlite+aiosqlite:///{settings.sqlite_path}"
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
\ No newline at end of file
+_BEGIN_MODES = {"DEFERRED", "IMMEDIATE", "EXCLUSIVE"}
+
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size_bytes}",
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def build_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Async SQLite engine with the performance profile from settings: WAL so
+    readers never block the single writer, busy_timeout so writers wait for the
+    lock instead of failing with "database is locked", and larger page/mmap caches.
+
+    The driver's implicit transaction handling is disabled and SQLAlchemy emits
+    BEGIN itself (the pattern recommended for aiosqlite), which is what makes
+    sqlite_begin_mode possible.
+    """
+    begin_mode = settings.sqlite_begin_mode.upper()
+    if begin_mode not in _BEGIN_MODES:
+        raise ValueError(f"SQLITE_BEGIN_MODE must be one of {sorted(_BEGIN_MODES)}")
+
+    kwargs = {}
+    if ":memory:" not in url:
+        # Older aiosqlite dialects default file databases to NullPool, which opens
+        # a connection (and re-runs the PRAGMAs) for every session.
+        kwargs = dict(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.sqlite_pool_size,
+            max_overflow=settings.sqlite_max_overflow,
+            pool_timeout=settings.sqlite_pool_timeout_seconds,
+        )
+    engine = create_async_engine(url, echo=False, future=True, **kwargs)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, _record) -> None:
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(conn) -> None:
+        conn.exec_driver_sql(f"BEGIN {begin_mode}")
+
+    return engine
+
+
+engine = build_engine()
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
@@ -1,9 +1,10 @@
-import json
 import logging
 import os
 import sys
 from datetime import datetime, timezone
 
+from app.core import serialization
+
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
@@ -18,7 +19,7 @@ class JsonFormatter(logging.Formatter):
                 payload[key] = getattr(record, key)
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(payload, ensure_ascii=False)
+        return serialization.dumps(payload, default=str)
 
 
 def setup_logging() -> None:
@@ -1,13 +1,45 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.logging_config import setup_logging
 from app.api.routes_tasks import router as tasks_router
 from app.api.routes_health import router as health_router
 from app.api.routes_metrics import router as metrics_router
+from app.core.metrics import MetricsFlusher, metrics, process_id
+from app.db.archive import task_archive
+from app.queue.connection import create_redis_pool, redis_from_pool
+from app.queue.notifications import TaskEventHub
+from app.settings import settings
 
 setup_logging()
 
-app = FastAPI(title="distributed-task-orchestrator")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.redis_pool = create_redis_pool()
+    app.state.event_hub = TaskEventHub(app.state.redis_pool)
+    app.state.event_hub.start()
+    flusher = MetricsFlusher(
+        metrics,
+        redis_from_pool(app.state.redis_pool),
+        process_id("api"),
+        settings.metrics_flush_interval_seconds,
+    )
+    flusher.start()
+    try:
+        yield
+    finally:
+        await flusher.close()
+        await app.state.event_hub.close()
+        app.state.event_hub = None
+        await app.state.redis_pool.aclose()
+        app.state.redis_pool = None
+        await task_archive.aclose()
+
+
+app = FastAPI(title="distributed-task-orchestrator", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.include_router(tasks_router)
 app.include_router(health_router)
-app.include_router(metrics_router)
\ No newline at end of file
+app.include_router(metrics_router)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.settings import settings
+
+
+def create_redis_pool() -> BlockingConnectionPool:
+    """
+    One pool per process, shared by every Redis client in it. When all
+    connections are busy, callers wait up to redis_pool_timeout_seconds instead of
+    failing, which also caps the connections a process can open.
+    """
+    return BlockingConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout_seconds,
+        health_check_interval=settings.redis_health_check_interval_seconds,
+        socket_keepalive=True,
+    )
+
+
+def redis_from_pool(pool: BlockingConnectionPool) -> Redis:
+    # Clients built on an existing pool are cheap and never close the pool.
+    return Redis(connection_pool=pool)
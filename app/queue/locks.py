@@ -1,17 +1,68 @@
 from __future__ import annotations
 
+import uuid
+
 from redis.asyncio import Redis
 from app.settings import settings
 
+# Delete only keys still holding our token, so an expired lock that another
+# worker has since taken is left alone.
+_RELEASE_LUA = """
+local released = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        released = released + redis.call('DEL', key)
+    end
+end
+return released
+"""
+
+_EXTEND_LUA = """
+local extended = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        extended = extended + redis.call('EXPIRE', key, ARGV[2])
+    end
+end
+return extended
+"""
+
+
+def _key(task_id: str) -> str:
+    return f"dto:lock:{task_id}"
+
 
 class RedisLock:
     def __init__(self, redis: Redis):
         self.redis = redis
+        self.token = uuid.uuid4().hex
+        self._release_script = redis.register_script(_RELEASE_LUA)
+        self._extend_script = redis.register_script(_EXTEND_LUA)
 
     async def acquire(self, task_id: str) -> bool:
-        key = f"dto:lock:{task_id}"
-        return bool(await self.redis.set(key, "1", nx=True, ex=settings.task_lock_ttl_seconds))
+        return bool(await self.redis.set(_key(task_id), self.token, nx=True, ex=settings.task_lock_ttl_seconds))
 
     async def release(self, task_id: str) -> None:
-        key = f"dto:lock:{task_id}"
-        await self.redis.delete(key)
\ No newline at end of file
+        await self.release_many([task_id])
+
+    async def acquire_many(self, task_ids: list[str]) -> list[str]:
+        """
+        Pipelined acquire; returns the IDs whose lock was taken.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.set(_key(task_id), self.token, nx=True, ex=settings.task_lock_ttl_seconds)
+            results = await pipe.execute()
+        return [tid for tid, ok in zip(task_ids, results) if ok]
+
+    async def release_many(self, task_ids: list[str]) -> None:
+        if task_ids:
+            await self._release_script(keys=[_key(tid) for tid in task_ids], args=[self.token])
+
+    async def extend_many(self, task_ids: list[str]) -> None:
+        """
+        Resets the TTL of locks this instance still holds.
+        """
+        if task_ids:
+            keys = [_key(tid) for tid in task_ids]
+            await self._extend_script(keys=keys, args=[self.token, settings.task_lock_ttl_seconds])
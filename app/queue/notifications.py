@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from datetime import datetime, timezone
+from typing import Iterator
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.core import serialization
+from app.queue.connection import redis_from_pool
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Delivered to waiters when the subscription was (re)established and events may
+# have been missed; they should re-read the task from SQLite.
+RESYNC = {"type": "resync"}
+
+
+def events_channel() -> str:
+    return f"{settings.queue_name}:events"
+
+
+def cancel_channel() -> str:
+    return f"{settings.queue_name}:cancel"
+
+
+def transition(task_id: str, from_status: str, to_status: str, timestamp: datetime | None = None) -> dict:
+    return {
+        "type": "transition",
+        "task_id": task_id,
+        "from_status": from_status,
+        "to_status": to_status,
+        "timestamp": (timestamp or datetime.now(timezone.utc)).isoformat(),
+    }
+
+
+async def publish_transitions(redis: Redis, events: list[dict]) -> None:
+    """
+    Publishes committed state transitions in one pipelined round trip. Best
+    effort: pub/sub is only a wake-up signal, SQLite stays the source of truth,
+    so a failure is logged and otherwise ignored.
+    """
+    if not events:
+        return
+    channel = events_channel()
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.publish(channel, serialization.dumpb(event))
+            await pipe.execute()
+    except Exception:
+        logger.warning("task_event_publish_failed", exc_info=True)
+
+
+async def publish_cancel(redis: Redis, task_id: str) -> None:
+    """
+    Tells workers to interrupt a canceled task's handler. Best effort: a worker
+    that misses it notices at its next lease renewal.
+    """
+    try:
+        await redis.publish(cancel_channel(), serialization.dumpb({"task_id": task_id}))
+    except Exception:
+        logger.warning("task_cancel_publish_failed", exc_info=True)
+
+
+class TaskEventHub:
+    """
+    One pub/sub subscription per process, fanned out to in-process waiters keyed
+    by task ID. Waiters must treat events as hints and re-read the task; after a
+    reconnect every waiter receives RESYNC.
+    """
+
+    def __init__(self, pool: BlockingConnectionPool):
+        self.pool = pool
+        self._waiters: dict[str, set[asyncio.Queue]] = {}
+        self._runner: asyncio.Task | None = None
+        self.delivered = 0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(qs) for qs in self._waiters.values())
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._runner
+        self._runner = None
+
+    @contextlib.contextmanager
+    def subscribe(self, task_id: str) -> Iterator[asyncio.Queue]:
+        q: asyncio.Queue = asyncio.Queue()
+        self._waiters.setdefault(task_id, set()).add(q)
+        try:
+            yield q
+        finally:
+            qs = self._waiters.get(task_id)
+            if qs is not None:
+                qs.discard(q)
+                if not qs:
+                    del self._waiters[task_id]
+
+    def dispatch(self, event: dict) -> None:
+        for q in self._waiters.get(event.get("task_id"), ()):
+            q.put_nowait(event)
+            self.delivered += 1
+
+    def _resync(self) -> None:
+        for qs in self._waiters.values():
+            for q in qs:
+                q.put_nowait(RESYNC)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with redis_from_pool(self.pool).pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(events_channel())
+                    self._resync()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.dispatch(serialization.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("task_event_subscription_lost", exc_info=True)
+                await asyncio.sleep(1.0)
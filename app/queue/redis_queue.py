@@ -1,23 +1,137 @@
 from __future__ import annotations
 
-import json
+from datetime import datetime, timezone
+
 from redis.asyncio import Redis
 from app.settings import settings
 
+PRIORITY_MIN = -100
+PRIORITY_MAX = 100
+
+# Scores are (PRIORITY_MAX - priority) * _BAND + seq, popped lowest-first: higher
+# priority wins, and a monotonically increasing seq keeps FIFO order within a
+# priority level. 201 bands * 1e13 stays well inside a double's exact-integer range.
+_BAND = 10**13
+
+# ARGV = band, then (base score, task_id) pairs. Scores are formatted with %.0f
+# because Lua's default number formatting would round them to 14 digits.
+_ENQUEUE_LUA = """
+local band = tonumber(ARGV[1])
+local added = 0
+for i = 2, #ARGV, 2 do
+    local seq = redis.call('INCR', KEYS[2]) % band
+    local score = string.format('%.0f', tonumber(ARGV[i]) + seq)
+    added = added + redis.call('ZADD', KEYS[1], 'NX', score, ARGV[i + 1])
+end
+return added
+"""
+
+# Moves up to ARGV[2] members of the delayed set with score <= ARGV[1] onto the
+# ready queue. Delayed members are "<priority>:<task_id>".
+_PROMOTE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local band = tonumber(ARGV[3])
+local top = tonumber(ARGV[4])
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    local priority, task_id = string.match(member, '^(-?%d+):(.+)$')
+    local seq = redis.call('INCR', KEYS[3]) % band
+    local score = string.format('%.0f', (top - tonumber(priority)) * band + seq)
+    redis.call('ZADD', KEYS[2], 'NX', score, task_id)
+end
+return #due
+"""
+
+
+def priority_score(priority: int, seq: int = 0) -> int:
+    priority = max(PRIORITY_MIN, min(PRIORITY_MAX, priority))
+    return (PRIORITY_MAX - priority) * _BAND + seq
+
 
 class RedisQueue:
+    """
+    Priority queue on a Redis sorted set. Members are task IDs, so re-enqueuing a
+    task that is still waiting is a no-op rather than a duplicate.
+
+    Tasks that are not yet due wait in a second sorted set scored by their run
+    time; `promote_due` moves them onto the ready queue once that time passes.
+    """
+
     def __init__(self, redis: Redis):
         self.redis = redis
-        self.key = settings.queue_name
+        self.key = f"{settings.queue_name}:ready"
+        self.seq_key = f"{settings.queue_name}:seq"
+        self.delayed_key = f"{settings.queue_name}:delayed"
+        self._enqueue_script = redis.register_script(_ENQUEUE_LUA)
+        self._promote_script = redis.register_script(_PROMOTE_LUA)
 
-    async def enqueue(self, task_id: str, priority: int = 0) -> None:
-        payload = json.dumps({"task_id": task_id, "priority": priority})
-        await self.redis.lpush(self.key, payload)
+    async def enqueue(self, task_id: str, priority: int = 0) -> bool:
+        """
+        Returns False if the task was already waiting in the queue.
+        """
+        return await self.enqueue_many([(task_id, priority)]) == 1
+
+    async def enqueue_many(self, items: list[tuple[str, int]]) -> int:
+        """
+        Enqueues (task_id, priority) pairs, 1000 per script call, all pipelined in
+        one round trip, and returns how many were newly added.
+        """
+        if not items:
+            return 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for i in range(0, len(items), 1000):
+                args: list = [_BAND]
+                for task_id, priority in items[i : i + 1000]:
+                    args += [priority_score(priority), task_id]
+                await self._enqueue_script(keys=[self.key, self.seq_key], args=args, client=pipe)
+            return sum(int(n) for n in await pipe.execute())
+
+    async def schedule(self, task_id: str, run_at: datetime, priority: int = 0) -> None:
+        await self.schedule_many([(task_id, run_at, priority)])
+
+    async def schedule_many(self, items: list[tuple[str, datetime, int]]) -> None:
+        """
+        Adds (task_id, run_at, priority) items to the delayed set. run_at must be
+        timezone-aware or naive UTC.
+        """
+        if not items:
+            return
+        mapping = {f"{priority}:{task_id}": _epoch(run_at) for task_id, run_at, priority in items}
+        await self.redis.zadd(self.delayed_key, mapping)
+
+    async def promote_due(self, now: datetime, limit: int) -> int:
+        """
+        Moves up to `limit` due delayed tasks onto the ready queue; returns how many.
+        """
+        keys = [self.delayed_key, self.key, self.seq_key]
+        return int(await self._promote_script(keys=keys, args=[_epoch(now), limit, _BAND, PRIORITY_MAX]))
 
     async def dequeue(self, timeout_seconds: int) -> str | None:
-        item = await self.redis.brpop(self.key, timeout=timeout_seconds)
+        item = await self.redis.bzpopmin(self.key, timeout=timeout_seconds)
         if not item:
             return None
-        _, raw = item
-        data = json.loads(raw)
-        return data["task_id"]
\ No newline at end of file
+        _, member, _ = item
+        return member.decode() if isinstance(member, bytes) else member
+
+    async def dequeue_batch(self, max_items: int, timeout_seconds: int) -> list[str]:
+        """
+        Pops up to `max_items` task IDs in one round trip when work is waiting;
+        otherwise blocks for a single item like `dequeue`.
+        """
+        items = await self.redis.zpopmin(self.key, max_items)
+        if not items:
+            task_id = await self.dequeue(timeout_seconds)
+            return [task_id] if task_id else []
+        return [m.decode() if isinstance(m, bytes) else m for m, _ in items]
+
+    async def depth(self) -> int:
+        return int(await self.redis.zcard(self.key))
+
+    async def delayed_depth(self) -> int:
+        return int(await self.redis.zcard(self.delayed_key))
+
+
+def _epoch(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import random
+import time
+
+from redis.asyncio import Redis
+
+from app.settings import settings
+from app.tasks.registry import TaskPolicy
+
+# Admission for one task against its type's limits, evaluated atomically.
+# KEYS = semaphore zset (holder -> expiry), token bucket hash.
+# ARGV = now, holder, holder expiry, max concurrency (0 = none), rate (0 = none),
+# burst, delay to report when the semaphore is full.
+# Returns "0" when admitted, otherwise the suggested delay in seconds as a string
+# (Redis would truncate a Lua number to an integer).
+_ADMIT_LUA = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[4])
+local rate = tonumber(ARGV[5])
+if limit > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+    if not redis.call('ZSCORE', KEYS[1], ARGV[2]) and redis.call('ZCARD', KEYS[1]) >= limit then
+        return ARGV[7]
+    end
+end
+if rate > 0 then
+    local burst = tonumber(ARGV[6])
+    local bucket = redis.call('HMGET', KEYS[2], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        return tostring((1 - tokens) / rate)
+    end
+    redis.call('HSET', KEYS[2], 'tokens', tostring(tokens - 1), 'ts', ARGV[1])
+    redis.call('EXPIRE', KEYS[2], math.ceil(burst / rate) + 60)
+end
+if limit > 0 then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+end
+return '0'
+"""
+
+
+def _semaphore_key(task_type: str) -> str:
+    return f"{settings.queue_name}:limit:{task_type}:running"
+
+
+def _bucket_key(task_type: str) -> str:
+    return f"{settings.queue_name}:limit:{task_type}:bucket"
+
+
+class TaskThrottle:
+    """
+    Cluster-wide per-type limits in Redis: a semaphore (sorted set of task IDs
+    scored by when the slot lapses) for `max_concurrency`, and a token bucket
+    for `rate_per_second`.
+
+    Slots are released when the task finishes; a worker that dies leaks its
+    slots only until the task's timeout plus one lease period has passed.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self._admit_script = redis.register_script(_ADMIT_LUA)
+
+    async def admit_many(self, items: list[tuple[str, str, TaskPolicy]]) -> dict[str, float]:
+        """
+        Admits (task_id, task_type, policy) items in one pipelined round trip,
+        in order, and returns {task_id: delay_seconds} for the ones throttled.
+        Delays are jittered so deferred tasks do not all come back together.
+        """
+        if not items:
+            return {}
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for task_id, task_type, policy in items:
+                expires_at = now + policy.timeout_seconds + settings.task_lease_seconds
+                args = [
+                    repr(now),
+                    task_id,
+                    repr(expires_at),
+                    policy.max_concurrency or 0,
+                    repr(policy.rate_per_second or 0.0),
+                    policy.burst or 0,
+                    repr(settings.throttle_busy_delay_seconds),
+                ]
+                await self._admit_script(keys=[_semaphore_key(task_type), _bucket_key(task_type)], args=args, client=pipe)
+            results = await pipe.execute()
+
+        deferred = {}
+        for (task_id, _, _), raw in zip(items, results):
+            delay = float(raw.decode() if isinstance(raw, bytes) else raw)
+            if delay > 0:
+                deferred[task_id] = delay * (1.0 + random.random())
+        return deferred
+
+    async def release_many(self, items: list[tuple[str, str]]) -> None:
+        """
+        Frees the semaphore slots held by (task_id, task_type) items.
+        """
+        if not items:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for task_id, task_type in items:
+                pipe.zrem(_semaphore_key(task_type), task_id)
+            await pipe.execute()
@@ -5,19 +5,120 @@ from pydantic import Field
 class Settings(BaseSettings):
     ...
     max_request_bytes: int = Field(default=1024 * 1024, alias="MAX_REQUEST_BYTES")
+    max_batch_request_bytes: int = Field(default=16 * 1024 * 1024, alias="MAX_BATCH_REQUEST_BYTES")
+    max_batch_items: int = Field(default=5000, ge=1, alias="MAX_BATCH_ITEMS")
+    # NDJSON ingest commits every stream_chunk_size lines; each line is capped at max_request_bytes
+    stream_chunk_size: int = Field(default=1000, ge=1, alias="STREAM_CHUNK_SIZE")
+    stream_max_reported_errors: int = Field(default=100, ge=0, alias="STREAM_MAX_REPORTED_ERRORS")
+    export_fetch_size: int = Field(default=1000, ge=1, alias="EXPORT_FETCH_SIZE")
+
+    # In-process LRU of idempotency keys -> task IDs (0 disables); optionally mirrored to Redis
+    idempotency_cache_size: int = Field(default=10000, ge=0, alias="IDEMPOTENCY_CACHE_SIZE")
+    idempotency_cache_redis_ttl_seconds: int = Field(default=0, ge=0, alias="IDEMPOTENCY_CACHE_REDIS_TTL_SECONDS")
+
+    # GET /v1/tasks/{id} response cache entries per API process (0 disables)
+    task_response_cache_size: int = Field(default=10000, ge=0, alias="TASK_RESPONSE_CACHE_SIZE")
+    # Larger bodies (e.g. big results) are not kept in the response cache
+    task_response_cache_max_body_bytes: int = Field(default=64 * 1024, ge=0, alias="TASK_RESPONSE_CACHE_MAX_BODY_BYTES")
+
+    # Task state transitions are published on Redis pub/sub for /wait and /stream
+    publish_task_events: bool = Field(default=True, alias="PUBLISH_TASK_EVENTS")
+    task_wait_max_seconds: float = Field(default=60.0, alias="TASK_WAIT_MAX_SECONDS")
+    task_stream_heartbeat_seconds: float = Field(default=15.0, alias="TASK_STREAM_HEARTBEAT_SECONDS")
+
+    # Each process adds its metric deltas into shared Redis hashes at this interval
+    metrics_flush_interval_seconds: float = Field(default=5.0, gt=0, alias="METRICS_FLUSH_INTERVAL_SECONDS")
+    # Task counts and queue depths in /v1/metrics are recomputed at most this often
+    queue_stats_cache_seconds: float = Field(default=1.0, ge=0, alias="QUEUE_STATS_CACHE_SECONDS")
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     api_key: str = Field(default="dev-key", alias="API_KEY")
     sqlite_path: str = Field(default="./orchestrator.sqlite", alias="SQLITE_PATH")
+    # Applied as PRAGMAs on every new connection (see app/db/session.py)
+    sqlite_journal_mode: str = Field(default="WAL", alias="SQLITE_JOURNAL_MODE")
+    sqlite_synchronous: str = Field(default="NORMAL", alias="SQLITE_SYNCHRONOUS")
+    sqlite_busy_timeout_ms: int = Field(default=5000, ge=0, alias="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_mmap_size_bytes: int = Field(default=256 * 1024 * 1024, ge=0, alias="SQLITE_MMAP_SIZE_BYTES")
+    sqlite_cache_size_kib: int = Field(default=64 * 1024, ge=0, alias="SQLITE_CACHE_SIZE_KIB")
+    # DEFERRED, IMMEDIATE or EXCLUSIVE. IMMEDIATE avoids SQLITE_BUSY on read->write
+    # upgrades in write-heavy processes at the cost of serializing read transactions.
+    sqlite_begin_mode: str = Field(default="DEFERRED", alias="SQLITE_BEGIN_MODE")
+    sqlite_pool_size: int = Field(default=5, ge=1, alias="SQLITE_POOL_SIZE")
+    sqlite_max_overflow: int = Field(default=10, ge=0, alias="SQLITE_MAX_OVERFLOW")
+    sqlite_pool_timeout_seconds: float = Field(default=30.0, alias="SQLITE_POOL_TIMEOUT_SECONDS")
 
     redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+    redis_max_connections: int = Field(default=50, ge=1, alias="REDIS_MAX_CONNECTIONS")
+    redis_pool_timeout_seconds: float = Field(default=5.0, alias="REDIS_POOL_TIMEOUT_SECONDS")
+    redis_health_check_interval_seconds: int = Field(default=30, alias="REDIS_HEALTH_CHECK_INTERVAL_SECONDS")
     queue_name: str = Field(default="dto:queue", alias="QUEUE_NAME")
 
-    scheduler_interval_seconds: float = Field(default=1.0, alias="SCHEDULER_INTERVAL_SECONDS")
+    # Reconciliation scan over SQLite. Regular dispatch goes through Redis
+    # (create_task pushes, retries use the delayed set), so this can be slow.
+    scheduler_interval_seconds: float = Field(default=10.0, alias="SCHEDULER_INTERVAL_SECONDS")
+    scheduler_batch_size: int = Field(default=200, ge=1, alias="SCHEDULER_BATCH_SIZE")
+    # A QUEUED task already handed to Redis is only re-enqueued once it has been
+    # waiting this long (recovers tasks lost from the transport).
+    scheduler_requeue_after_seconds: float = Field(default=60.0, alias="SCHEDULER_REQUEUE_AFTER_SECONDS")
+    delayed_promote_interval_seconds: float = Field(default=0.1, alias="DELAYED_PROMOTE_INTERVAL_SECONDS")
+    delayed_promote_batch_size: int = Field(default=500, ge=1, alias="DELAYED_PROMOTE_BATCH_SIZE")
 
     default_max_attempts: int = Field(default=5, alias="DEFAULT_MAX_ATTEMPTS")
     worker_poll_timeout_seconds: int = Field(default=2, alias="WORKER_POLL_TIMEOUT_SECONDS")
     task_lock_ttl_seconds: int = Field(default=30, alias="TASK_LOCK_TTL_SECONDS")
+    # Claims are atomic in the DB; the Redis lock is an optional extra guard.
+    worker_use_redis_lock: bool = Field(default=False, alias="WORKER_USE_REDIS_LOCK")
+
+    # RUNNING tasks hold a lease in Task.locked_until
+    task_lease_seconds: float = Field(default=30.0, alias="TASK_LEASE_SECONDS")
+    task_lease_renew_seconds: float = Field(default=10.0, alias="TASK_LEASE_RENEW_SECONDS")
+    reaper_interval_seconds: float = Field(default=5.0, alias="REAPER_INTERVAL_SECONDS")
+    reaper_batch_size: int = Field(default=200, ge=1, alias="REAPER_BATCH_SIZE")
+
+    # Events of tasks terminal for this long are folded into monthly history
+    # tables; history tables older than the retention are dropped (0 keeps all)
+    event_compact_after_seconds: float = Field(default=3600.0, ge=0, alias="EVENT_COMPACT_AFTER_SECONDS")
+    event_compact_interval_seconds: float = Field(default=60.0, gt=0, alias="EVENT_COMPACT_INTERVAL_SECONDS")
+    event_compact_batch_size: int = Field(default=500, ge=1, alias="EVENT_COMPACT_BATCH_SIZE")
+    event_history_retention_months: int = Field(default=12, ge=0, alias="EVENT_HISTORY_RETENTION_MONTHS")
+
+    # Tasks terminal for this long move to the archive database (0 disables);
+    # their idempotency keys stop deduplicating once archived
+    archive_sqlite_path: str = Field(default="./orchestrator-archive.sqlite", alias="ARCHIVE_SQLITE_PATH")
+    archive_after_seconds: float = Field(default=30 * 24 * 3600.0, ge=0, alias="ARCHIVE_AFTER_SECONDS")
+    archive_interval_seconds: float = Field(default=60.0, gt=0, alias="ARCHIVE_INTERVAL_SECONDS")
+    archive_batch_size: int = Field(default=200, ge=1, alias="ARCHIVE_BATCH_SIZE")
+
+    worker_concurrency: int = Field(default=8, ge=1, alias="WORKER_CONCURRENCY")
+    worker_drain_timeout_seconds: float = Field(default=30.0, alias="WORKER_DRAIN_TIMEOUT_SECONDS")
+    # Max task IDs claimed per dequeue (bounded by free concurrency slots)
+    worker_batch_size: int = Field(default=8, ge=1, alias="WORKER_BATCH_SIZE")
+    # Terminal transitions are group-committed every interval or at max batch size
+    worker_commit_interval_ms: float = Field(default=10.0, ge=0, alias="WORKER_COMMIT_INTERVAL_MS")
+    worker_commit_max_batch: int = Field(default=128, ge=1, alias="WORKER_COMMIT_MAX_BATCH")
+    # How long a task is deferred when its type is at max_concurrency (rate-limited
+    # tasks use the token bucket's own wait); jittered up to 2x
+    throttle_busy_delay_seconds: float = Field(default=1.0, gt=0, alias="THROTTLE_BUSY_DELAY_SECONDS")
+
+    # Results above this size are stored out of row in task_results (zlib)
+    result_inline_max_bytes: int = Field(default=8192, ge=0, alias="RESULT_INLINE_MAX_BYTES")
+    result_compression_level: int = Field(default=6, ge=0, le=9, alias="RESULT_COMPRESSION_LEVEL")
+
+    # http_fetch keeps one connection pool per origin for the worker's lifetime;
+    # HTTP/2 needs the optional h2 package
+    http_fetch_max_pooled_hosts: int = Field(default=256, ge=1, alias="HTTP_FETCH_MAX_POOLED_HOSTS")
+    http_fetch_max_connections_per_host: int = Field(default=10, ge=1, alias="HTTP_FETCH_MAX_CONNECTIONS_PER_HOST")
+    http_fetch_keepalive_expiry_seconds: float = Field(default=30.0, alias="HTTP_FETCH_KEEPALIVE_EXPIRY_SECONDS")
+    http_fetch_dns_ttl_seconds: float = Field(default=60.0, alias="HTTP_FETCH_DNS_TTL_SECONDS")
+    http_fetch_http2: bool = Field(default=True, alias="HTTP_FETCH_HTTP2")
+    # Disables the private/loopback address check (local testing only)
+    http_fetch_allow_private_networks: bool = Field(default=False, alias="HTTP_FETCH_ALLOW_PRIVATE_NETWORKS")
+
+    # 0 = one process per CPU core
+    process_pool_size: int = Field(default=0, ge=0, alias="PROCESS_POOL_SIZE")
+    process_pool_max_tasks_per_process: int = Field(default=200, ge=1, alias="PROCESS_POOL_MAX_TASKS_PER_PROCESS")
+    process_pool_start_method: str = Field(default="spawn", alias="PROCESS_POOL_START_METHOD")
 
     retry_base_seconds: float = Field(default=1.0, alias="RETRY_BASE_SECONDS")
     retry_max_seconds: float = Field(default=60.0, alias="RETRY_MAX_SECONDS")
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import time
-from app.tasks.registry import register
+from app.tasks.registry import ExecutionKind, register
 
 
-@register("cpu_burn")
-async def cpu_burn(payload: dict) -> dict:
+@register("cpu_burn", kind=ExecutionKind.PROCESS)
+def cpu_burn(payload: dict) -> dict:
     ms = payload.get("milliseconds")
     if not isinstance(ms, int):
         raise ValueError("payload.milliseconds must be an integer")
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import importlib.util
+import ipaddress
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable
+
+import httpcore
+import httpx
+
+from app.settings import settings
+
+
+class BlockedTargetError(ValueError):
+    pass
+
+
+def is_blocked_ip(ip: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bool:
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return not ip.is_global
+
+
+class DnsCache:
+    """
+    Caches getaddrinfo results per (host, port) for `ttl_seconds`. Concurrent
+    lookups of the same name share one resolution. Unless private networks are
+    allowed, a name that resolves to any non-global address is rejected, and
+    since connections are made to the returned addresses, a second lookup
+    cannot swap in a different target (DNS rebinding).
+    """
+
+    def __init__(self, ttl_seconds: float, allow_private: bool):
+        self.ttl_seconds = ttl_seconds
+        self.allow_private = allow_private
+        self._entries: dict[tuple[str, int], tuple[float, list[str]]] = {}
+        self._pending: dict[tuple[str, int], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host: str, port: int) -> list[str]:
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            self._check([ip], host)
+            return [str(ip)]
+
+        key = (host.lower(), port)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        lookup = self._pending.get(key)
+        if lookup is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            # The lookup runs in its own task and every caller waits on it
+            # shielded, so a caller being cancelled never cancels the others' result
+            lookup = asyncio.create_task(self._lookup(key, host, port))
+            lookup.add_done_callback(_retrieve_exception)
+            self._pending[key] = lookup
+        return await asyncio.shield(lookup)
+
+    async def _lookup(self, key: tuple[str, int], host: str, port: int) -> list[str]:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+            self._check([ipaddress.ip_address(a.split("%", 1)[0]) for a in addresses], host)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, addresses)
+            return addresses
+        finally:
+            del self._pending[key]
+
+    def _check(self, ips: list, host: str) -> None:
+        if not self.allow_private and any(is_blocked_ip(ip) for ip in ips):
+            raise BlockedTargetError(f"Private/localhost targets are blocked: {host}")
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # A failed lookup whose callers were all cancelled must not log
+    # "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class _ResolvingBackend(httpcore.AsyncNetworkBackend):
+    """
+    Connects to the DnsCache's vetted addresses (in order, first that answers)
+    instead of letting the socket layer resolve the name again. TLS still uses
+    the hostname for SNI and certificate checks.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, dns: DnsCache):
+        self._backend = backend
+        self._dns = dns
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options: Iterable | None = None,
+    ) -> httpcore.AsyncNetworkStream:
+        addresses = await self._dns.resolve(host, port)
+        error: Exception | None = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error or httpcore.ConnectError(f"no addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise BlockedTargetError("unix sockets are not allowed")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors re-raised as their httpx namesakes, most specific first
+_ERRORS = [
+    (getattr(httpcore, name), getattr(httpx, name))
+    for name in (
+        "ConnectTimeout",
+        "ReadTimeout",
+        "WriteTimeout",
+        "PoolTimeout",
+        "ConnectError",
+        "ReadError",
+        "WriteError",
+        "RemoteProtocolError",
+        "LocalProtocolError",
+        "ProxyError",
+        "UnsupportedProtocol",
+        "TimeoutException",
+        "NetworkError",
+        "ProtocolError",
+    )
+]
+
+
+@contextlib.contextmanager
+def _httpx_errors(request: httpx.Request | None = None):
+    try:
+        yield
+    except Exception as e:
+        for core_error, error in _ERRORS:
+            if isinstance(e, core_error):
+                raise error(str(e), request=request) from e
+        raise
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream) -> None:
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class _PinnedTransport(httpx.AsyncBaseTransport):
+    """
+    An httpcore connection pool that connects through _ResolvingBackend
+    (httpx.AsyncHTTPTransport has no network_backend option).
+    """
+
+    def __init__(self, dns: DnsCache, limits: httpx.Limits, http2: bool):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            network_backend=_ResolvingBackend(httpcore.AnyIOBackend(), dns),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors(request):
+            response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+@dataclass
+class _OriginPool:
+    client: httpx.AsyncClient
+    slot: asyncio.Semaphore
+    users: int = 0
+
+
+class SharedHttpClient:
+    """
+    Worker-lifetime HTTP connection pools, one per origin (scheme, host, port),
+    each capped at `per_host` connections. Keep-alive connections (and HTTP/2
+    when the optional `h2` package is installed) are reused across tasks, and
+    DNS answers are shared through one DnsCache.
+
+    Pools are kept per origin rather than in one big client because httpcore
+    scans every pending request against every pooled connection, which gets
+    quadratically slower as one pool grows. Requests beyond `per_host` wait on
+    an asyncio semaphore instead of in httpcore's queue. At most `max_hosts`
+    idle pools are kept, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        max_hosts: int,
+        per_host: int,
+        keepalive_expiry_seconds: float,
+        dns_ttl_seconds: float,
+        allow_private: bool,
+        http2: bool,
+    ):
+        self.max_hosts = max_hosts
+        self.per_host = per_host
+        self.keepalive_expiry_seconds = keepalive_expiry_seconds
+        self.dns = DnsCache(dns_ttl_seconds, allow_private)
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._origins: OrderedDict[tuple[str, str, int], _OriginPool] = OrderedDict()
+
+    def _new_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.per_host,
+            max_keepalive_connections=self.per_host,
+            keepalive_expiry=self.keepalive_expiry_seconds,
+        )
+        return httpx.AsyncClient(
+            transport=_PinnedTransport(self.dns, limits=limits, http2=self.http2),
+            follow_redirects=True,
+            # a proxy would resolve the target itself, bypassing the address check
+            trust_env=False,
+        )
+
+    @contextlib.asynccontextmanager
+    async def client_for(self, scheme: str, host: str, port: int) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Yields the origin's client once one of its `per_host` slots is free.
+        """
+        key = (scheme, host.lower(), port)
+        pool = self._origins.get(key)
+        if pool is None:
+            pool = self._origins[key] = _OriginPool(self._new_client(), asyncio.Semaphore(self.per_host))
+        self._origins.move_to_end(key)
+        pool.users += 1
+        try:
+            async with pool.slot:
+                yield pool.client
+        finally:
+            pool.users -= 1
+            await self._evict()
+
+    async def _evict(self) -> None:
+        while len(self._origins) > self.max_hosts:
+            key = next((k for k, p in self._origins.items() if p.users == 0), None)
+            if key is None:
+                return
+            await self._origins.pop(key).client.aclose()
+
+    async def aclose(self) -> None:
+        pools, self._origins = list(self._origins.values()), OrderedDict()
+        for pool in pools:
+            await pool.client.aclose()
+
+
+_clients: dict[asyncio.AbstractEventLoop, SharedHttpClient] = {}
+
+
+def get_http_client() -> SharedHttpClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        for stale in [l for l in _clients if l.is_closed()]:
+            del _clients[stale]
+        client = _clients[loop] = SharedHttpClient(
+            max_hosts=settings.http_fetch_max_pooled_hosts,
+            per_host=settings.http_fetch_max_connections_per_host,
+            keepalive_expiry_seconds=settings.http_fetch_keepalive_expiry_seconds,
+            dns_ttl_seconds=settings.http_fetch_dns_ttl_seconds,
+            allow_private=settings.http_fetch_allow_private_networks,
+            http2=settings.http_fetch_http2,
+        )
+    return client
+
+
+async def close_http_client() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
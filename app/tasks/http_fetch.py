@@ -4,20 +4,26 @@ import ipaddress
 import time
 from urllib.parse import urlparse
 
-import httpx
+from app.settings import settings
+from app.tasks.http_client import BlockedTargetError, get_http_client, is_blocked_ip
 from app.tasks.registry import register
 
 
 def _is_private_host(host: str) -> bool:
+    """
+    Cheap rejection before any lookup; names are checked again on their
+    resolved addresses when the connection is made.
+    """
     try:
-        ip = ipaddress.ip_address(host)
-        return ip.is_private or ip.is_loopback or ip.is_link_local
+        return is_blocked_ip(ipaddress.ip_address(host))
     except ValueError:
         lowered = host.lower()
         return lowered == "localhost" or lowered.endswith(".local")
 
 
-@register("http_fetch")
+# Per-request timeouts are capped at 10s; the cap on concurrent fetches protects
+# downstream hosts and the worker's outbound connections cluster-wide.
+@register("http_fetch", timeout_seconds=15.0, max_concurrency=64)
 async def http_fetch(payload: dict) -> dict:
     url = payload.get("url")
     if not isinstance(url, str) or not url:
@@ -28,15 +34,17 @@ async def http_fetch(payload: dict) -> dict:
         raise ValueError("Only http/https URLs are allowed")
     if not parsed.hostname:
         raise ValueError("URL hostname missing")
-    if _is_private_host(parsed.hostname):
-        raise ValueError("Private/localhost targets are blocked")
+    if not settings.http_fetch_allow_private_networks and _is_private_host(parsed.hostname):
+        raise BlockedTargetError("Private/localhost targets are blocked")
 
     timeout = float(payload.get("timeout_seconds", 5.0))
     timeout = max(0.5, min(timeout, 10.0))
 
+    http = get_http_client()
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
     start = time.perf_counter()
-    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-        r = await client.get(url)
+    async with http.client_for(parsed.scheme, parsed.hostname, port) as client:
+        r = await client.get(url, timeout=timeout)
     elapsed_ms = int((time.perf_counter() - start) * 1000)
 
     return {"status_code": r.status_code, "latency_ms": elapsed_ms}
\ No newline at end of file
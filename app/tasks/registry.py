@@ -1,24 +1,91 @@
 from __future__ import annotations
 
-from typing import Awaitable, Callable
+import enum
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Union
 
 TaskHandler = Callable[[dict], Awaitable[dict]]
+SyncTaskHandler = Callable[[dict], dict]
 
-_registry: dict[str, TaskHandler] = {}
 
+class ExecutionKind(str, enum.Enum):
+    ASYNC = "async"  # awaited on the worker's event loop
+    THREAD = "thread"  # blocking I/O, run in the default thread pool
+    PROCESS = "process"  # CPU-bound, run in the worker's process pool
 
-def register(task_type: str):
-    def _decorator(fn: TaskHandler) -> TaskHandler:
-        _registry[task_type] = fn
+
+@dataclass(frozen=True)
+class TaskPolicy:
+    """
+    Per-type execution limits. `max_concurrency` is enforced cluster-wide with a
+    Redis semaphore and `rate_per_second` with a Redis token bucket holding up to
+    `burst` tokens; None means unlimited.
+    """
+
+    timeout_seconds: float = 15.0
+    max_concurrency: int | None = None
+    rate_per_second: float | None = None
+    burst: int | None = None
+
+    @property
+    def throttled(self) -> bool:
+        return self.max_concurrency is not None or self.rate_per_second is not None
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    task_type: str
+    handler: Union[TaskHandler, SyncTaskHandler]
+    kind: ExecutionKind
+    policy: TaskPolicy = TaskPolicy()
+
+
+_registry: dict[str, TaskSpec] = {}
+
+
+def register(
+    task_type: str,
+    kind: ExecutionKind = ExecutionKind.ASYNC,
+    *,
+    timeout_seconds: float = 15.0,
+    max_concurrency: int | None = None,
+    rate_per_second: float | None = None,
+    burst: int | None = None,
+):
+    """
+    ASYNC handlers must be coroutine functions. THREAD and PROCESS handlers are
+    plain functions; PROCESS handlers also need JSON-serializable payloads/results
+    and must be importable at module level (they run in a separate interpreter).
+
+    `timeout_seconds`, `max_concurrency` and `rate_per_second`/`burst` form the
+    type's TaskPolicy; burst defaults to one second's worth of tokens.
+    """
+    kind = ExecutionKind(kind)
+    if timeout_seconds <= 0:
+        raise ValueError("timeout_seconds must be > 0")
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError("max_concurrency must be >= 1")
+    if rate_per_second is not None and rate_per_second <= 0:
+        raise ValueError("rate_per_second must be > 0")
+    if rate_per_second is not None and burst is None:
+        burst = max(1, int(rate_per_second))
+    policy = TaskPolicy(timeout_seconds, max_concurrency, rate_per_second, burst)
+
+    def _decorator(fn):
+        _registry[task_type] = TaskSpec(task_type=task_type, handler=fn, kind=kind, policy=policy)
         return fn
     return _decorator
 
 
-def get_handler(task_type: str) -> TaskHandler:
+def get_spec(task_type: str) -> TaskSpec:
     if task_type not in _registry:
         raise KeyError(f"Unknown task_type: {task_type}")
     return _registry[task_type]
 
 
+def get_handler(task_type: str) -> TaskHandler | SyncTaskHandler:
+    return get_spec(task_type).handler
+
+
 def registered_task_types() -> list[str]:
-    return sorted(_registry.keys())
\ No newline at end of file
+    return sorted(_registry.keys())
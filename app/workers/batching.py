@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import metrics
+from app.core.results import EncodedResult
+from app.core.state_machine import can_transition
+from app.db.claims import held
+from app.db.models import Task, TaskEvent, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Outcome:
+    """
+    The terminal (or retry) transition a worker wants to record for a RUNNING task.
+    """
+
+    task_id: str
+    to_status: TaskStatus
+    message: str
+    # Task.attempts as returned by the claim: the outcome is only recorded
+    # while the task is still held under that claim
+    claim_attempts: int
+    result_json: str | None = None
+    # Set instead of result_json for results stored out of row
+    result_blob: EncodedResult | None = None
+    last_error: str | None = None
+    attempts: int | None = None
+    next_run_at: datetime | None = None
+    enqueued_at: datetime | None = None
+
+
+class CompletionBatcher:
+    """
+    Group-commits worker outcomes: everything submitted within `interval_seconds`
+    (or until `max_batch` items) is written in one transaction, i.e. one fsync.
+
+    `submit` resolves to True once the outcome is committed, or False if the task
+    was no longer RUNNING under the outcome's claim (canceled meanwhile, or
+    reaped and claimed by another worker) and nothing was written. Outcomes only
+    apply to rows still held at write time, so a cancel or a newer claim is
+    never overwritten.
+    `on_commit`, if given, receives each batch's applied outcomes after commit.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval_seconds: float,
+        max_batch: int,
+        on_commit: Callable[[list[Outcome]], Awaitable[None]] | None = None,
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self._queue: asyncio.Queue[tuple[Outcome, asyncio.Future] | None] = asyncio.Queue()
+        self._runner: asyncio.Task | None = None
+        self.commits = 0
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._runner is None:
+            return
+        await self._queue.put(None)
+        await self._runner
+        self._runner = None
+
+    async def submit(self, outcome: Outcome) -> bool:
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((outcome, fut))
+        return await fut
+
+    async def _run(self) -> None:
+        closing = False
+        while not closing:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.interval_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                try:
+                    item = self._queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(
+                        self._queue.get(), timeout=remaining
+                    )
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+
+            try:
+                applied = await self._flush([o for o, _ in batch])
+            except Exception as e:
+                logger.exception("completion_flush_failed")
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (o, fut), ok in zip(batch, applied):
+                if not fut.done():
+                    fut.set_result(ok)
+            if self.on_commit is not None and any(applied):
+                try:
+                    await self.on_commit([o for (o, _), ok in zip(batch, applied) if ok])
+                except Exception:
+                    logger.exception("completion_on_commit_failed")
+
+    async def _flush(self, outcomes: list[Outcome]) -> list[bool]:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            # The claim-conditional UPDATE comes first so the transaction starts
+            # as a write: it sees the latest commit and holds the write lock
+            # until ours. A cancel committed before it leaves the task out; one
+            # arriving later waits and then finds the task terminal.
+            claims = {o.task_id: o.claim_attempts for o in outcomes if can_transition(TaskStatus.RUNNING, o.to_status)}
+            stmt = (
+                update(Task)
+                .where(held(claims))
+                .values(locked_until=None)
+                .returning(Task)
+                .execution_options(synchronize_session=False)
+            )
+            tasks = {t.id: t for t in (await session.execute(stmt)).scalars()}
+
+            applied = []
+            for o in outcomes:
+                t = tasks.get(o.task_id)
+                ok = (
+                    t is not None
+                    and t.status == TaskStatus.RUNNING
+                    and t.attempts == o.claim_attempts
+                    and can_transition(TaskStatus.RUNNING, o.to_status)
+                )
+                applied.append(ok)
+                if not ok:
+                    continue
+
+                t.status = o.to_status
+                t.updated_at = now
+                t.last_error = o.last_error
+                if o.result_json is not None:
+                    t.result_json = o.result_json
+                if o.result_blob is not None:
+                    t.result_json = None
+                    t.result_offloaded = True
+                    session.add(o.result_blob.row(t.id))
+                if o.attempts is not None:
+                    t.attempts = o.attempts
+                if o.next_run_at is not None:
+                    t.next_run_at = o.next_run_at
+                if o.enqueued_at is not None:
+                    t.enqueued_at = o.enqueued_at
+                session.add(
+                    TaskEvent(
+                        task_id=t.id,
+                        timestamp=now,
+                        from_status=TaskStatus.RUNNING.value,
+                        to_status=o.to_status.value,
+                        message=o.message,
+                    )
+                )
+
+            if tasks:
+                with metrics.time("db_commit_seconds", operation="complete"):
+                    await session.commit()
+                self.commits += 1
+        return applied
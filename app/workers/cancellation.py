@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import Iterable, Iterator
+
+from redis.asyncio import BlockingConnectionPool
+
+from app.core import serialization
+from app.queue.connection import redis_from_pool
+from app.queue.notifications import cancel_channel
+
+logger = logging.getLogger(__name__)
+
+
+class CancelWatcher:
+    """
+    Interrupts handlers whose task was canceled while running.
+
+    Each running handler is registered under its task ID. `cancel` cancels the
+    handler's asyncio future: async handlers stop at their next await, process
+    lane jobs have their process killed (see ProcessLane.run), and thread
+    handlers keep running in the background with the result discarded.
+
+    Cancel signals arrive on a pub/sub channel (started with a pool) and, as a
+    durable fallback, from the LeaseKeeper when a lease renewal finds a tracked
+    task no longer RUNNING.
+    """
+
+    def __init__(self, pool: BlockingConnectionPool | None = None):
+        self.pool = pool
+        self._running: dict[str, asyncio.Future] = {}
+        self._interrupted: set[str] = set()
+        self._runner: asyncio.Task | None = None
+
+    @contextlib.contextmanager
+    def watch(self, task_id: str, run: asyncio.Future) -> Iterator[None]:
+        self._running[task_id] = run
+        try:
+            yield
+        finally:
+            if self._running.get(task_id) is run:
+                del self._running[task_id]
+
+    def cancel(self, task_ids: Iterable[str]) -> int:
+        cancelled = 0
+        for task_id in task_ids:
+            run = self._running.get(task_id)
+            if run is not None and run.cancel():
+                self._interrupted.add(task_id)
+                cancelled += 1
+        return cancelled
+
+    def was_interrupted(self, task_id: str) -> bool:
+        """
+        True (once) if `cancel` stopped this task's handler, as opposed to the
+        worker itself being cancelled.
+        """
+        if task_id in self._interrupted:
+            self._interrupted.discard(task_id)
+            return True
+        return False
+
+    def start(self) -> None:
+        if self._runner is None and self.pool is not None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._runner
+        self._runner = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with redis_from_pool(self.pool).pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(cancel_channel())
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.cancel([serialization.loads(message["data"])["task_id"]])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("cancel_subscription_lost", exc_info=True)
+                await asyncio.sleep(1.0)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+
+from app.core import serialization
+from app.tasks.registry import ExecutionKind, TaskSpec, get_spec
+
+
+def _run_in_child(task_type: str, payload_json: bytes) -> bytes:
+    """
+    Runs one job inside a lane process. Payload and result cross the process
+    boundary as UTF-8 JSON so handlers never depend on pickling arbitrary objects.
+    """
+    handler = get_spec(task_type).handler
+    result = handler(serialization.loads_exact(payload_json))
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    return serialization.dumpb(result)
+
+
+def _child_main(conn: Connection) -> None:
+    """
+    Entry point of a lane process: signals readiness, then serves jobs from its
+    slot until the pipe is closed.
+
+    A job is the task type followed by the payload as raw bytes. The reply is
+    None followed by the result as raw bytes, or the handler's exception.
+    Payloads and results skip pickling, which for a large document would copy
+    it again while holding the parent's GIL.
+    """
+    import app.tasks  # noqa: F401  (register handlers in the child interpreter)
+
+    conn.send(None)
+    while True:
+        try:
+            task_type = conn.recv()
+            payload_json = conn.recv_bytes()
+        except EOFError:
+            return
+        try:
+            result = _run_in_child(task_type, payload_json)
+        except Exception as e:
+            try:
+                conn.send(e)
+            except Exception:  # the exception itself does not pickle
+                conn.send(RuntimeError(f"{type(e).__name__}: {e}"))
+        else:
+            conn.send(None)
+            conn.send_bytes(result)
+
+
+def _exchange(conn: Connection, job: tuple[str, bytes] | None) -> bytes | Exception | None:
+    """
+    Sends `job` to a lane process and returns its result or the handler's
+    exception, or with no job waits for the process to report ready. EOFError
+    means the process is gone.
+    """
+    if job is None:
+        conn.recv()
+        return None
+    task_type, payload_json = job
+    conn.send(task_type)
+    conn.send_bytes(payload_json)
+    error = conn.recv()
+    return error if error is not None else conn.recv_bytes()
+
+
+class _Slot:
+    """
+    One lane-owned process and the pipe to it, started on first use. The slot
+    runs one job at a time, so killing its process never touches other work.
+
+    Jobs are sent and replies read on the lane's reader threads: Connection
+    send and recv block until the whole message has gone through the pipe,
+    which for a large payload or result would stall the event loop.
+    """
+
+    def __init__(self, ctx, readers: ThreadPoolExecutor) -> None:
+        self._ctx = ctx
+        self._readers = readers
+        self.jobs = 0
+        self.process: multiprocessing.process.BaseProcess | None = None
+        self._conn: Connection | None = None
+        self._reading: Future | None = None
+
+    async def call(self, task_type: str, payload_json: bytes) -> bytes:
+        if self.process is None:
+            await self._start()
+        return await self._exchange((task_type, payload_json))
+
+    async def _start(self) -> None:
+        parent, child = self._ctx.Pipe()
+        self.process = self._ctx.Process(target=_child_main, args=(child,), daemon=True)
+        self._conn = parent
+        try:
+            self.process.start()
+            child.close()
+            await self._exchange(None)
+        except BaseException:
+            child.close()
+            self.kill()
+            raise
+
+    async def _exchange(self, job: tuple[str, bytes] | None) -> bytes | None:
+        self._reading = self._readers.submit(_exchange, self._conn, job)
+        try:
+            reply = await asyncio.wrap_future(self._reading)
+        except EOFError:
+            exitcode = self.process.exitcode if self.process is not None else None
+            self.kill()
+            raise RuntimeError(f"process lane worker exited unexpectedly (exit code {exitcode})") from None
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def recycle(self) -> None:
+        # Closing the pipe ends the child's loop; a new process starts with the next job
+        conn, reading = self._conn, self._reading
+        if conn is not None:
+            if reading is not None and not reading.done():
+                # A reader thread still blocked on this pipe would otherwise
+                # read from whatever the fd number is reused for; it ends once
+                # the child exits or answers
+                reading.add_done_callback(lambda _: conn.close())
+            else:
+                conn.close()
+        self.process, self._conn, self._reading, self.jobs = None, None, None, 0
+
+    def kill(self) -> None:
+        if self.process is not None and self.process.pid is not None:
+            self.process.kill()
+        self.recycle()
+
+    def shutdown(self) -> None:
+        process = self.process
+        self.recycle()
+        if process is not None:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+
+
+class ProcessLane:
+    """
+    Lane-owned processes for CPU-bound handlers.
+
+    Each slot owns one process and runs one job at a time, so a timed-out or
+    canceled job is stopped by killing that process without touching work in
+    other slots. Slots are recycled after `max_tasks_per_process` jobs,
+    successful or not, to bound leaks in handler code.
+    """
+
+    def __init__(self, size: int, max_tasks_per_process: int, start_method: str = "spawn"):
+        self.size = size or os.cpu_count() or 1
+        self.max_tasks_per_process = max_tasks_per_process
+        self._ctx = multiprocessing.get_context(start_method)
+        self._slots: list[_Slot] = []
+        self._idle: asyncio.Queue[_Slot] | None = None
+        self._readers: ThreadPoolExecutor | None = None
+
+    def _ensure_started(self) -> asyncio.Queue[_Slot]:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            # Own threads rather than the default executor, which thread-kind
+            # handlers can keep busy
+            self._readers = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="process-lane")
+            for _ in range(self.size):
+                slot = _Slot(self._ctx, self._readers)
+                self._slots.append(slot)
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    async def run(self, task_type: str, payload: dict, timeout: float) -> dict:
+        idle = self._ensure_started()
+        slot = await idle.get()
+        try:
+            try:
+                raw = await asyncio.wait_for(slot.call(task_type, serialization.dumpb(payload)), timeout=timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                slot.kill()
+                raise
+            finally:
+                # Failed jobs count too; a killed slot starts its next process afresh
+                if slot.process is not None:
+                    slot.jobs += 1
+                    if slot.jobs >= self.max_tasks_per_process:
+                        slot.recycle()
+            return serialization.loads_exact(raw)
+        finally:
+            idle.put_nowait(slot)
+
+    def shutdown(self) -> None:
+        for slot in self._slots:
+            slot.shutdown()
+        self._slots.clear()
+        self._idle = None
+        if self._readers is not None:
+            self._readers.shutdown(wait=False)
+            self._readers = None
+
+
+class TaskExecutor:
+    """
+    Routes a handler to its execution lane based on the kind it was registered with.
+    """
+
+    def __init__(self, process_lane: ProcessLane):
+        self.process_lane = process_lane
+
+    async def run(self, spec: TaskSpec, payload: dict, timeout: float) -> dict:
+        try:
+            if spec.kind == ExecutionKind.PROCESS:
+                return await self.process_lane.run(spec.task_type, payload, timeout)
+            if spec.kind == ExecutionKind.THREAD:
+                # Threads cannot be killed; a timed-out call keeps running in the
+                # background but its result is discarded.
+                return await asyncio.wait_for(asyncio.to_thread(spec.handler, payload), timeout=timeout)
+            return await asyncio.wait_for(spec.handler(payload), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{spec.task_type} timed out after {timeout}s") from None
+
+    def shutdown(self) -> None:
+        self.process_lane.shutdown()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.claims import held
+from app.db.models import Task
+from app.queue.locks import RedisLock
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseKeeper:
+    """
+    Heartbeat for the tasks a worker is running: every `renew_interval_seconds`
+    it pushes Task.locked_until forward (and the Redis lock TTL, if locks are used)
+    for all tracked tasks in one UPDATE. A worker that dies stops renewing, and
+    the scheduler's reaper recovers its tasks once the lease expires.
+
+    Tasks are tracked with the attempts value they were claimed with; tracked
+    tasks that are no longer RUNNING under that claim (canceled, or reaped
+    after a stall and possibly claimed again) are not renewed and are passed
+    to `on_lost`, so their handlers can be stopped.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        lock: RedisLock | None,
+        lease_seconds: float,
+        renew_interval_seconds: float,
+        on_lost: Callable[[list[str]], object] | None = None,
+    ):
+        self.session_factory = session_factory
+        self.lock = lock
+        self.lease_seconds = lease_seconds
+        self.renew_interval_seconds = renew_interval_seconds
+        self.on_lost = on_lost
+        self._held: dict[str, int] = {}
+        self._runner: asyncio.Task | None = None
+
+    def track(self, task_id: str, attempts: int) -> None:
+        self._held[task_id] = attempts
+
+    def untrack(self, task_id: str) -> None:
+        self._held.pop(task_id, None)
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+    async def renew(self) -> int:
+        claims = dict(self._held)
+        if not claims:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            res = await session.execute(
+                update(Task)
+                .where(held(claims))
+                .values(locked_until=now + timedelta(seconds=self.lease_seconds))
+                .returning(Task.id)
+            )
+            renewed = set(res.scalars())
+            await session.commit()
+        if self.lock is not None:
+            await self.lock.extend_many(list(claims))
+        lost = [tid for tid in claims if tid not in renewed and tid in self._held]
+        if lost and self.on_lost is not None:
+            self.on_lost(lost)
+        return len(renewed)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.renew_interval_seconds)
+            try:
+                await self.renew()
+            except Exception:
+                logger.exception("lease_renew_failed")
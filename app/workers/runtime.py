@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Protocol
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TaskSource(Protocol):
+    async def dequeue_batch(self, max_items: int, timeout_seconds: int) -> list[Any]: ...
+
+
+ProcessFn = Callable[[Any], Awaitable[None]]
+
+
+class WorkerRuntime:
+    """
+    Keeps up to `concurrency` tasks in flight inside one worker process.
+
+    The dispatcher only pulls from the queue once a slot is free, so a saturated
+    worker leaves the remaining work in Redis for other workers (backpressure).
+    Each pull asks for as many items as there are free slots, up to `batch_size`.
+    `stop()` ends dispatching; in-flight tasks are drained before `run()` returns.
+    """
+
+    def __init__(
+        self,
+        source: TaskSource,
+        process: ProcessFn,
+        concurrency: int,
+        poll_timeout_seconds: int,
+        drain_timeout_seconds: float,
+        batch_size: int = 1,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.source = source
+        self.process = process
+        self.concurrency = concurrency
+        self.batch_size = max(1, min(batch_size, concurrency))
+        self.poll_timeout_seconds = poll_timeout_seconds
+        self.drain_timeout_seconds = drain_timeout_seconds
+
+        self._slots = asyncio.Semaphore(concurrency)
+        self._in_flight: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        try:
+            await self._dispatch()
+        finally:
+            await self._drain()
+
+    async def _dispatch(self) -> None:
+        while not self._stopping.is_set():
+            await self._slots.acquire()
+            if self._stopping.is_set():
+                self._slots.release()
+                break
+
+            # Take any other free slots without waiting so one round trip can
+            # fetch several items.
+            slots = 1
+            while slots < self.batch_size and not self._slots.locked():
+                await self._slots.acquire()
+                slots += 1
+
+            # A dequeue is never cancelled mid-flight: items could already be
+            # popped server-side. Anything received while stopping is still run.
+            try:
+                items = await self.source.dequeue_batch(slots, self.poll_timeout_seconds)
+            except Exception:
+                self._release(slots)
+                logger.exception("dequeue_failed")
+                await asyncio.sleep(1.0)
+                continue
+
+            self._release(slots - len(items))
+            for item in items:
+                t = asyncio.create_task(self._run_one(item))
+                self._in_flight.add(t)
+                metrics.add("worker_in_flight_tasks", 1)
+                t.add_done_callback(self._in_flight.discard)
+
+    def _release(self, n: int) -> None:
+        for _ in range(n):
+            self._slots.release()
+
+    async def _run_one(self, item: Any) -> None:
+        try:
+            await self.process(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("task_processing_failed", extra={"task_id": getattr(item, "id", item)})
+            metrics.inc("worker_exceptions_total", 1)
+        finally:
+            self._slots.release()
+            metrics.add("worker_in_flight_tasks", -1)
+
+    async def _drain(self) -> None:
+        if not self._in_flight:
+            return
+        pending = set(self._in_flight)
+        logger.info("worker_draining", extra={"status": f"in_flight={len(pending)}"})
+        _, still_running = await asyncio.wait(pending, timeout=self.drain_timeout_seconds)
+        for t in still_running:
+            t.cancel()
+        if still_running:
+            await asyncio.gather(*still_running, return_exceptions=True)
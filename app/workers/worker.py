@@ -1,171 +1,305 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import logging
+import signal
 import time
-from datetime import datetime, timezone
-from typing import Any
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 
-from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.core.metrics import metrics
+from app.core import serialization
+from app.core.metrics import MetricsFlusher, metrics, process_id
+from app.core.results import offload_result
 from app.core.retry import compute_next_run
-from app.core.state_machine import can_transition
-from app.db.models import Task, TaskEvent, TaskStatus
+from app.db.claims import claim_tasks
+from app.db.models import Task, TaskStatus
 from app.db.session import AsyncSessionLocal
+from app.logging_config import setup_logging
 from app.queue.locks import RedisLock
+from app.queue.connection import create_redis_pool, redis_from_pool
+from app.queue.notifications import publish_transitions, transition
 from app.queue.redis_queue import RedisQueue
+from app.queue.throttle import TaskThrottle
+from app.tasks.http_client import close_http_client
 from app.settings import settings
+from app.workers.batching import CompletionBatcher, Outcome
+from app.workers.cancellation import CancelWatcher
+from app.workers.executors import ProcessLane, TaskExecutor
+from app.workers.lease import LeaseKeeper
+from app.workers.runtime import WorkerRuntime
 
 # Ensure task handlers are registered
 import app.tasks  # noqa: F401
-from app.tasks.registry import get_handler
+from app.tasks.registry import get_spec, registered_task_types
 
+logger = logging.getLogger(__name__)
 
 def now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def normalize_utc(dt: datetime | None) -> datetime | None:
+@dataclass
+class WorkerContext:
+    queue: RedisQueue
+    lock: RedisLock | None
+    executor: TaskExecutor
+    completions: CompletionBatcher
+    leases: LeaseKeeper
+    throttle: TaskThrottle | None = None
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal
+    cancels: CancelWatcher = field(default_factory=CancelWatcher)
+
+
+class ClaimingSource:
     """
-    SQLite returns naive datetimes. Treat them as UTC.
+    Feeds the runtime with claimed tasks: pops a batch of IDs and claims them with
+    one atomic UPDATE ... RETURNING. With the optional Redis lock enabled, the IDs
+    are locked first with one pipelined round trip.
+
+    Task types with a concurrency or rate limit are admitted before the claim;
+    throttled tasks go back to the delayed set untouched instead of occupying a
+    slot, so other task types keep flowing.
     """
-    if dt is None:
-        return None
-    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-
-
-async def add_event(
-    session,
-    task_id: str,
-    from_status: TaskStatus,
-    to_status: TaskStatus,
-    message: str,
-) -> None:
-    session.add(
-        TaskEvent(
-            task_id=task_id,
-            timestamp=now_utc(),
-            from_status=from_status.value,
-            to_status=to_status.value,
-            message=message,
-        )
-    )
 
+    def __init__(self, ctx: WorkerContext):
+        self.ctx = ctx
+        self.limited_types = {t for t in registered_task_types() if get_spec(t).policy.throttled}
+
+    async def _admit(self, task_ids: list[str]) -> tuple[list[str], list[tuple[str, str]]]:
+        """
+        Returns the IDs to claim and the (task_id, task_type) semaphore slots
+        taken for them. The type lookup reads only the primary key index row
+        and ends its transaction before the claim writes.
+        """
+        async with self.ctx.session_factory() as session:
+            rows = (
+                await session.execute(
+                    select(Task.id, Task.task_type, Task.priority).where(
+                        Task.id.in_(task_ids), Task.task_type.in_(self.limited_types)
+                    )
+                )
+            ).all()
+        if not rows:
+            return task_ids, []
+        # Admit in dequeue (priority) order
+        order = {tid: i for i, tid in enumerate(task_ids)}
+        rows.sort(key=lambda r: order[r.id])
+
+        deferred = await self.ctx.throttle.admit_many([(r.id, r.task_type, get_spec(r.task_type).policy) for r in rows])
+        if deferred:
+            now = now_utc()
+            await self.ctx.queue.schedule_many(
+                [(r.id, now + timedelta(seconds=deferred[r.id]), r.priority) for r in rows if r.id in deferred]
+            )
+            for r in rows:
+                if r.id in deferred:
+                    metrics.inc("tasks_throttled_total", 1, task_type=r.task_type)
+            if self.ctx.lock is not None:
+                await self.ctx.lock.release_many(list(deferred))
+        slots = [(r.id, r.task_type) for r in rows if r.id not in deferred and get_spec(r.task_type).policy.max_concurrency]
+        return [tid for tid in task_ids if tid not in deferred], slots
+
+    async def dequeue_batch(self, max_items: int, timeout_seconds: int) -> list[Task]:
+        task_ids = await self.ctx.queue.dequeue_batch(max_items, timeout_seconds)
+        if not task_ids:
+            return []
+
+        lock = self.ctx.lock
+        if lock is not None:
+            task_ids = await lock.acquire_many(task_ids)
+
+        slots: list[tuple[str, str]] = []
+        try:
+            if self.ctx.throttle is not None and self.limited_types and task_ids:
+                task_ids, slots = await self._admit(task_ids)
+            async with self.ctx.session_factory() as session:
+                claimed = await claim_tasks(session, task_ids, now_utc(), settings.task_lease_seconds)
+        except Exception:
+            if lock is not None:
+                await lock.release_many(task_ids)
+            if slots:
+                await self.ctx.throttle.release_many(slots)
+            raise
+
+        claimed_ids = {t.id for t in claimed}
+        if lock is not None:
+            await lock.release_many([tid for tid in task_ids if tid not in claimed_ids])
+        if slots:
+            await self.ctx.throttle.release_many([s for s in slots if s[0] not in claimed_ids])
+        now = now_utc()
+        for t in claimed:
+            due = t.next_run_at if t.next_run_at.tzinfo else t.next_run_at.replace(tzinfo=timezone.utc)
+            metrics.observe("task_queue_wait_seconds", max(0.0, (now - due).total_seconds()), task_type=t.task_type)
+        if settings.publish_task_events:
+            await publish_transitions(self.ctx.queue.redis, [transition(t.id, "QUEUED", "RUNNING") for t in claimed])
+        return claimed
+
+
+async def execute_task(task: Task, ctx: WorkerContext) -> None:
+    start = time.perf_counter()
+    exec_start = exec_seconds = None
+    spec = None
+    ctx.leases.track(task.id, task.attempts)
 
-async def run_worker() -> None:
-    # 🔥 GUARANTEED VISUAL CONFIRMATION
-    print("worker_started", flush=True)
+    try:
+        try:
+            payload = serialization.loads_exact(task.payload_json)
+            spec = get_spec(task.task_type)
+            exec_start = time.perf_counter()
+            run = asyncio.ensure_future(ctx.executor.run(spec, payload, timeout=spec.policy.timeout_seconds))
+            try:
+                with ctx.cancels.watch(task.id, run):
+                    result = await run
+            except asyncio.CancelledError:
+                if not ctx.cancels.was_interrupted(task.id):
+                    raise
+                # Canceled while running: the task is already CANCELED in the
+                # database, so there is no outcome to record
+                metrics.inc("tasks_interrupted_total", 1)
+                metrics.observe(
+                    "task_execution_seconds", time.perf_counter() - exec_start, task_type=task.task_type, outcome="canceled"
+                )
+                return
+            finally:
+                exec_seconds = time.perf_counter() - exec_start
+            result_json = serialization.dumps(result)
+            blob = offload_result(result_json)
+            outcome = Outcome(
+                task_id=task.id,
+                to_status=TaskStatus.COMPLETED,
+                message="completed",
+                claim_attempts=task.attempts,
+                result_json=None if blob else result_json,
+                result_blob=blob,
+            )
+        except Exception as e:
+            attempts = task.attempts + 1
+            if attempts >= task.max_attempts:
+                outcome = Outcome(
+                    task_id=task.id,
+                    to_status=TaskStatus.FAILED,
+                    message=f"failed: {e}",
+                    claim_attempts=task.attempts,
+                    last_error=str(e),
+                    attempts=attempts,
+                )
+            else:
+                next_run = compute_next_run(attempts)
+                outcome = Outcome(
+                    task_id=task.id,
+                    to_status=TaskStatus.QUEUED,
+                    message=f"retry scheduled: {e}",
+                    claim_attempts=task.attempts,
+                    last_error=str(e),
+                    attempts=attempts,
+                    next_run_at=next_run,
+                    # handed to the delayed set below; the scheduler's requeue
+                    # window starts once the retry is due
+                    enqueued_at=next_run,
+                )
 
-    redis = Redis.from_url(settings.redis_url)
-    queue = RedisQueue(redis)
-    lock = RedisLock(redis)
+        if exec_start is not None:
+            label = {TaskStatus.COMPLETED: "completed", TaskStatus.FAILED: "failed"}.get(outcome.to_status, "retry")
+            metrics.observe("task_execution_seconds", exec_seconds, task_type=task.task_type, outcome=label)
 
-    try:
-        while True:
-            task_id = await queue.dequeue(settings.worker_poll_timeout_seconds)
-            if not task_id:
-                continue
+        if not await ctx.completions.submit(outcome):
+            return
+
+        if outcome.to_status == TaskStatus.COMPLETED:
+            metrics.inc("tasks_completed_total", 1)
+        elif outcome.to_status == TaskStatus.FAILED:
+            metrics.inc("tasks_failed_total", 1)
+        else:
+            metrics.inc("tasks_retried_total", 1)
+            await ctx.queue.schedule(task.id, outcome.next_run_at, task.priority)
 
-            acquired = await lock.acquire(task_id)
-            if not acquired:
-                continue
+    finally:
+        ctx.leases.untrack(task.id)
+        if ctx.lock is not None:
+            await ctx.lock.release(task.id)
+        if ctx.throttle is not None and spec is not None and spec.policy.max_concurrency:
+            await ctx.throttle.release_many([(task.id, task.task_type)])
+        total_seconds = time.perf_counter() - start
+        metrics.observe("task_total_seconds", total_seconds, task_type=task.task_type)
+        logger.debug(
+            "task_processed",
+            extra={"task_id": task.id, "task_type": task.task_type, "latency_ms": int(total_seconds * 1000)},
+        )
 
-            start = time.perf_counter()
 
-            try:
-                async with AsyncSessionLocal() as session:
-                    task = await session.get(Task, task_id)
-                    if not task:
-                        continue
-
-                    if task.status in {
-                        TaskStatus.COMPLETED,
-                        TaskStatus.FAILED,
-                        TaskStatus.CANCELED,
-                    }:
-                        continue
-
-                    next_run = normalize_utc(task.next_run_at) or now_utc()
-                    if task.status != TaskStatus.QUEUED or next_run > now_utc():
-                        continue
-
-                    # Transition → RUNNING
-                    if not can_transition(TaskStatus.QUEUED, TaskStatus.RUNNING):
-                        continue
-
-                    task.status = TaskStatus.RUNNING
-                    task.updated_at = now_utc()
-                    await add_event(
-                        session,
-                        task.id,
-                        TaskStatus.QUEUED,
-                        TaskStatus.RUNNING,
-                        "picked up by worker",
-                    )
-                    await session.commit()
-
-                    payload = json.loads(task.payload_json)
-                    handler = get_handler(task.task_type)
-
-                    try:
-                        result = await asyncio.wait_for(handler(payload), timeout=15)
-
-                        task.status = TaskStatus.COMPLETED
-                        task.updated_at = now_utc()
-                        task.result_json = json.dumps(result)
-                        task.last_error = None
-
-                        await add_event(
-                            session,
-                            task.id,
-                            TaskStatus.RUNNING,
-                            TaskStatus.COMPLETED,
-                            "completed",
-                        )
-                        await session.commit()
-                        await metrics.inc("tasks_completed_total", 1)
-
-                    except Exception as e:
-                        task.attempts += 1
-                        task.updated_at = now_utc()
-                        task.last_error = str(e)
-
-                        if task.attempts >= task.max_attempts:
-                            task.status = TaskStatus.FAILED
-                            await add_event(
-                                session,
-                                task.id,
-                                TaskStatus.RUNNING,
-                                TaskStatus.FAILED,
-                                f"failed: {e}",
-                            )
-                            await metrics.inc("tasks_failed_total", 1)
-                        else:
-                            task.status = TaskStatus.QUEUED
-                            task.next_run_at = compute_next_run(task.attempts)
-                            await add_event(
-                                session,
-                                task.id,
-                                TaskStatus.RUNNING,
-                                TaskStatus.QUEUED,
-                                f"retry scheduled: {e}",
-                            )
-                            await metrics.inc("tasks_retried_total", 1)
-
-                        await session.commit()
+async def run_worker() -> None:
+    logger.info("worker_started", extra={"status": f"concurrency={settings.worker_concurrency}"})
+
+    redis = redis_from_pool(create_redis_pool())
+    executor = TaskExecutor(
+        ProcessLane(
+            size=settings.process_pool_size,
+            max_tasks_per_process=settings.process_pool_max_tasks_per_process,
+            start_method=settings.process_pool_start_method,
+        )
+    )
+    async def publish_outcomes(outcomes: list[Outcome]) -> None:
+        await publish_transitions(redis, [transition(o.task_id, "RUNNING", o.to_status.value) for o in outcomes])
+
+    completions = CompletionBatcher(
+        AsyncSessionLocal,
+        interval_seconds=settings.worker_commit_interval_ms / 1000.0,
+        max_batch=settings.worker_commit_max_batch,
+        on_commit=publish_outcomes if settings.publish_task_events else None,
+    )
+    lock = RedisLock(redis) if settings.worker_use_redis_lock else None
+    cancels = CancelWatcher(redis.connection_pool)
+    leases = LeaseKeeper(
+        AsyncSessionLocal,
+        lock,
+        lease_seconds=settings.task_lease_seconds,
+        renew_interval_seconds=settings.task_lease_renew_seconds,
+        on_lost=cancels.cancel,
+    )
+    ctx = WorkerContext(
+        queue=RedisQueue(redis),
+        lock=lock,
+        executor=executor,
+        completions=completions,
+        leases=leases,
+        throttle=TaskThrottle(redis),
+        cancels=cancels,
+    )
 
-            finally:
-                await lock.release(task_id)
-                latency_ms = int((time.perf_counter() - start) * 1000)
-                print(
-                    f"task_processed task_id={task_id} latency_ms={latency_ms}",
-                    flush=True,
-                )
+    runtime = WorkerRuntime(
+        source=ClaimingSource(ctx),
+        process=lambda task: execute_task(task, ctx),
+        concurrency=settings.worker_concurrency,
+        batch_size=settings.worker_batch_size,
+        poll_timeout_seconds=settings.worker_poll_timeout_seconds,
+        drain_timeout_seconds=settings.worker_drain_timeout_seconds,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, runtime.stop)
 
+    flusher = MetricsFlusher(metrics, redis, process_id("worker"), settings.metrics_flush_interval_seconds)
+
+    completions.start()
+    leases.start()
+    cancels.start()
+    flusher.start()
+    try:
+        await runtime.run()
     finally:
-        await redis.aclose()
+        await cancels.close()
+        await leases.close()
+        await completions.close()
+        executor.shutdown()
+        await close_http_client()
+        await flusher.close()
+        await redis.connection_pool.aclose()
 
 
 if __name__ == "__main__":
-    asyncio.run(run_worker())
\ No newline at end of file
+    setup_logging()
+    asyncio.run(run_worker())
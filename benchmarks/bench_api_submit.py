@@ -0,0 +1,81 @@
+"""
+POST /v1/tasks throughput: a Redis client per request vs. the shared pool.
+
+Drives the ASGI app in-process with httpx (no HTTP server), against a temporary
+SQLite file. Requires Redis (docker compose up -d).
+
+    python -m benchmarks.bench_api_submit --requests 2000 --concurrency 32
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "bench.sqlite"))
+os.environ.setdefault("QUEUE_NAME", "dto:bench")
+
+import httpx  # noqa: E402
+from redis.asyncio import Redis  # noqa: E402
+
+from app.api.deps import get_redis  # noqa: E402
+from app.db import migrate  # noqa: E402
+from app.main import app  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+async def _redis_per_request():
+    r = Redis.from_url(settings.redis_url)
+    try:
+        yield r
+    finally:
+        await r.aclose()
+
+
+async def _run(n: int, concurrency: int) -> float:
+    headers = {"X-API-Key": settings.api_key}
+    body = {"task_type": "data_transform", "payload": {"data": {"a": 1}}}
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def one() -> None:
+                async with sem:
+                    r = await client.post("/v1/tasks", json=body, headers=headers)
+                    r.raise_for_status()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(n)))
+            return n / (time.perf_counter() - start)
+
+
+async def _main(args) -> None:
+    await migrate.main()
+    print(f"{'mode':>12}  {'req/s':>8}")
+    for mode in ("per-request", "pooled"):
+        if mode == "per-request":
+            app.dependency_overrides[get_redis] = _redis_per_request
+        else:
+            app.dependency_overrides.pop(get_redis, None)
+        rps = await _run(args.requests, args.concurrency)
+        print(f"{mode:>12}  {rps:>8.1f}")
+
+    r = Redis.from_url(settings.redis_url)
+    await r.delete(f"{settings.queue_name}:ready", f"{settings.queue_name}:seq")
+    await r.aclose()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    asyncio.run(_main(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Hot-table query latency before and after archiving, and what archiving costs
+concurrent writers.
+
+Seeds --tasks tasks (--terminal-share of them finished long ago, the rest
+QUEUED), measures a GET /v1/tasks page and the scheduler's due-task scan,
+archives every old task in --batch-size batches while another writer inserts
+single rows, and measures again. No Redis required.
+
+    python -m benchmarks.bench_archive --tasks 200000 --batch-size 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "bench.sqlite"))
+
+import httpx  # noqa: E402
+from sqlalchemy import insert, or_, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+
+from app.api import routes_tasks  # noqa: E402
+from app.db.archive import TaskArchive  # noqa: E402
+from app.db.models import Base, Task, TaskEvent, TaskStatus  # noqa: E402
+from app.db.session import build_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+def _task(i: int, now: datetime, terminal: bool) -> dict:
+    # Timestamps grow with insertion order, as they do in a live system
+    if terminal:
+        at = now - timedelta(days=60) + timedelta(seconds=i)
+    else:
+        at = now - timedelta(seconds=1) + timedelta(microseconds=i)
+    return dict(
+        id=str(uuid.uuid4()),
+        task_type="data_transform",
+        payload_json='{"data": {"a": 1}}',
+        status=TaskStatus.COMPLETED if terminal else TaskStatus.QUEUED,
+        priority=0,
+        attempts=1,
+        max_attempts=5,
+        created_at=at,
+        updated_at=at,
+        next_run_at=at,
+        enqueued_at=now,
+        result_json='{"transformed": {"a": 1}}' if terminal else None,
+    )
+
+
+async def _seed(engine, n: int, terminal_share: float, now: datetime) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    n_terminal = int(n * terminal_share)
+    for start in range(0, n, 10_000):
+        tasks = [_task(i, now, i < n_terminal) for i in range(start, min(n, start + 10_000))]
+        events = [
+            dict(task_id=t["id"], timestamp=t["updated_at"], from_status="QUEUED", to_status=t["status"].value, message="m")
+            for t in tasks
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(Task), tasks)
+            await conn.execute(insert(TaskEvent), events)
+
+
+def _p(latencies: list[float], q: float) -> float:
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+
+
+async def _measure(client: httpx.AsyncClient, sessions, now: datetime, samples: int) -> tuple[float, float]:
+    headers = {"X-API-Key": settings.api_key}
+    pages = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        (await client.get("/v1/tasks", params={"status": "COMPLETED", "limit": 20}, headers=headers)).raise_for_status()
+        pages.append(time.perf_counter() - start)
+    # The reconciliation query from app.core.scheduler.schedule_due
+    stale = now - timedelta(seconds=settings.scheduler_requeue_after_seconds)
+    stmt = (
+        select(Task.id)
+        .where(Task.status == TaskStatus.QUEUED, Task.next_run_at <= now, or_(Task.enqueued_at.is_(None), Task.enqueued_at <= stale))
+        .limit(settings.scheduler_batch_size)
+    )
+    scans = []
+    async with sessions() as session:
+        for _ in range(samples):
+            start = time.perf_counter()
+            await session.execute(stmt)
+            scans.append(time.perf_counter() - start)
+    return _p(pages, 0.5), _p(scans, 0.5)
+
+
+async def _writer(sessions, stop: asyncio.Event, latencies: list[float]) -> None:
+    now = datetime.now(timezone.utc)
+    while not stop.is_set():
+        start = time.perf_counter()
+        async with sessions() as session:
+            await session.execute(insert(Task), [_task(0, now, False)])
+            await session.commit()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.002)
+
+
+async def _db_mb(sessions) -> float:
+    async with sessions() as session:
+        pages = await session.scalar(text("PRAGMA page_count"))
+        free = await session.scalar(text("PRAGMA freelist_count"))
+        size = await session.scalar(text("PRAGMA page_size"))
+    return (pages - free) * size / 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--terminal-share", type=float, default=0.95)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    now = datetime.now(timezone.utc)
+    engine = build_engine(f"sqlite+aiosqlite:///{os.path.join(_tmp, 'hot.sqlite')}")
+    await _seed(engine, args.tasks, args.terminal_share, now)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    routes_tasks.AsyncSessionLocal = sessions
+    archive = TaskArchive(os.path.join(_tmp, "archive.sqlite"))
+
+    print(f"tasks={args.tasks} terminal={args.terminal_share:.0%} batch={args.batch_size}")
+    print(f"{'state':>9} {'live MB':>8} {'page p50 ms':>12} {'scan p50 ms':>12}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        page, scan = await _measure(client, sessions, now, args.samples)
+        print(f"{'before':>9} {await _db_mb(sessions):>8.1f} {page:>12.2f} {scan:>12.2f}")
+
+        stop, writes, batches = asyncio.Event(), [], []
+        writer = asyncio.create_task(_writer(sessions, stop, writes))
+        start = time.perf_counter()
+        while True:
+            batch_start = time.perf_counter()
+            async with sessions() as session:
+                moved = await archive.archive(session, now, 30 * 86400, args.batch_size)
+            batches.append(time.perf_counter() - batch_start)
+            if moved < args.batch_size:
+                break
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await writer
+
+        page, scan = await _measure(client, sessions, now, args.samples)
+        print(f"{'after':>9} {await _db_mb(sessions):>8.1f} {page:>12.2f} {scan:>12.2f}")
+    archived = int(args.tasks * args.terminal_share)
+    print(
+        f"archived {archived / elapsed:.0f} tasks/s; batch p99 {_p(batches, 0.99):.1f} ms; "
+        f"concurrent insert p50 {_p(writes, 0.5):.1f} ms p99 {_p(writes, 0.99):.1f} ms max {_p(writes, 1.0):.1f} ms"
+    )
+    await archive.aclose()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
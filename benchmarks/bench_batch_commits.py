@@ -0,0 +1,104 @@
+"""
+Claim + completion throughput against worker batch size on a file-backed SQLite DB.
+
+For each batch size K, claims tasks K at a time with `claim_tasks` (one
+UPDATE ... RETURNING per batch) and records completions through a `CompletionBatcher`
+with max_batch=K. Reports tasks/s and commits/s. No Redis required.
+
+    python -m benchmarks.bench_batch_commits --tasks 2000 --sizes 1,4,16,64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.claims import claim_tasks
+from app.db.models import Base, Task, TaskStatus
+from app.workers.batching import CompletionBatcher, Outcome
+
+
+async def _seed(session_factory, n: int) -> list[str]:
+    now = datetime.now(timezone.utc) - timedelta(seconds=1)
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    rows = [
+        dict(
+            id=tid,
+            task_type="data_transform",
+            payload_json=json.dumps({"data": {"a": 1}}),
+            status=TaskStatus.QUEUED,
+            priority=0,
+            attempts=0,
+            max_attempts=5,
+            created_at=now,
+            updated_at=now,
+            next_run_at=now,
+        )
+        for tid in ids
+    ]
+    async with session_factory() as s:
+        await s.execute(insert(Task), rows)
+        await s.commit()
+    return ids
+
+
+async def _run(batch_size: int, n_tasks: int, workdir: Path) -> tuple[float, float]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{workdir / f'b{batch_size}.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    ids = await _seed(session_factory, n_tasks)
+
+    batcher = CompletionBatcher(session_factory, interval_seconds=0.005, max_batch=batch_size)
+    batcher.start()
+    claim_commits = 0
+    start = time.perf_counter()
+    try:
+        for i in range(0, n_tasks, batch_size):
+            async with session_factory() as s:
+                claimed = await claim_tasks(s, ids[i : i + batch_size], datetime.now(timezone.utc), 30)
+            claim_commits += 1
+            await asyncio.gather(
+                *(
+                    batcher.submit(
+                        Outcome(
+                            task_id=t.id,
+                            to_status=TaskStatus.COMPLETED,
+                            message="completed",
+                            claim_attempts=t.attempts,
+                            result_json="{}",
+                        )
+                    )
+                    for t in claimed
+                )
+            )
+    finally:
+        await batcher.close()
+        await engine.dispose()
+    elapsed = time.perf_counter() - start
+    return n_tasks / elapsed, (claim_commits + batcher.commits) / elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tasks", type=int, default=2000)
+    ap.add_argument("--sizes", default="1,4,16,64")
+    args = ap.parse_args()
+
+    print(f"{'batch':>5}  {'tasks/s':>9}  {'commits/s':>9}")
+    with tempfile.TemporaryDirectory() as d:
+        for k in (int(x) for x in args.sizes.split(",")):
+            tps, cps = asyncio.run(_run(k, args.tasks, Path(d)))
+            print(f"{k:>5}  {tps:>9.1f}  {cps:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
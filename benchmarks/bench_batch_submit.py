@@ -0,0 +1,81 @@
+"""
+Ingest rate: POST /v1/tasks one task per request vs. POST /v1/tasks:batch.
+
+Drives the ASGI app in-process with httpx (no HTTP server), against a temporary
+SQLite file. Requires Redis (docker compose up -d).
+
+    python -m benchmarks.bench_batch_submit --tasks 20000 --batch-sizes 100,1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "bench.sqlite"))
+os.environ.setdefault("QUEUE_NAME", "dto:bench")
+
+import httpx  # noqa: E402
+from redis.asyncio import Redis  # noqa: E402
+
+from app.db import migrate  # noqa: E402
+from app.main import app  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+_BODY = {"task_type": "data_transform", "payload": {"data": {"a": 1}}}
+
+
+async def _single(client: httpx.AsyncClient, n: int, concurrency: int) -> None:
+    headers = {"X-API-Key": settings.api_key}
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with sem:
+            r = await client.post("/v1/tasks", json=_BODY, headers=headers)
+            r.raise_for_status()
+
+    await asyncio.gather(*(one() for _ in range(n)))
+
+
+async def _batched(client: httpx.AsyncClient, n: int, batch_size: int) -> None:
+    headers = {"X-API-Key": settings.api_key}
+    for i in range(0, n, batch_size):
+        items = [_BODY] * min(batch_size, n - i)
+        r = await client.post("/v1/tasks:batch", json={"items": items}, headers=headers)
+        r.raise_for_status()
+
+
+async def _main(args) -> None:
+    await migrate.main()
+    transport = httpx.ASGITransport(app=app)
+    print(f"{'mode':>14}  {'tasks/s':>9}")
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            start = time.perf_counter()
+            await _single(client, args.single_tasks, args.concurrency)
+            print(f"{'single':>14}  {args.single_tasks / (time.perf_counter() - start):>9.1f}")
+
+            for size in (int(x) for x in args.batch_sizes.split(",")):
+                start = time.perf_counter()
+                await _batched(client, args.tasks, size)
+                print(f"{f'batch={size}':>14}  {args.tasks / (time.perf_counter() - start):>9.1f}")
+
+    r = Redis.from_url(settings.redis_url)
+    await r.delete(f"{settings.queue_name}:ready", f"{settings.queue_name}:seq")
+    await r.aclose()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tasks", type=int, default=20000, help="tasks per batch run")
+    ap.add_argument("--single-tasks", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--batch-sizes", default="100,1000")
+    asyncio.run(_main(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
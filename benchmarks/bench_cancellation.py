@@ -0,0 +1,72 @@
+"""
+Process-lane time spent on canceled work: --tasks cpu_burn jobs of --cpu-ms
+each, all canceled after --cancel-after-ms, run to completion (how the worker
+behaved before cancellation reached running handlers) vs. interrupted through
+the CancelWatcher.
+
+Reports the wall time until every job has finished or stopped and the
+cancel-to-stopped latency, which includes killing the job's process (its
+slot's replacement process starts with the slot's next job).
+
+    python -m benchmarks.bench_cancellation --tasks 8 --cpu-ms 2000 --cancel-after-ms 100
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import app.tasks  # noqa: F401
+from app.tasks.registry import get_spec
+from app.workers.cancellation import CancelWatcher
+from app.workers.executors import ProcessLane, TaskExecutor
+
+
+async def _run(executor: TaskExecutor, args, interrupt: bool) -> tuple[float, list[float]]:
+    spec = get_spec("cpu_burn")
+    watcher = CancelWatcher()
+    stopped: list[float] = []
+
+    async def one(i: int) -> None:
+        run = asyncio.ensure_future(executor.run(spec, {"milliseconds": args.cpu_ms}, timeout=60))
+        with watcher.watch(str(i), run):
+            try:
+                await run
+            except asyncio.CancelledError:
+                pass
+        stopped.append(time.perf_counter())
+
+    start = time.perf_counter()
+    jobs = [asyncio.create_task(one(i)) for i in range(args.tasks)]
+    await asyncio.sleep(args.cancel_after_ms / 1000)
+    canceled_at = time.perf_counter()
+    if interrupt:
+        watcher.cancel(str(i) for i in range(args.tasks))
+    await asyncio.gather(*jobs)
+    return time.perf_counter() - start, [t - canceled_at for t in stopped]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--cpu-ms", type=int, default=2000)
+    parser.add_argument("--cancel-after-ms", type=int, default=100)
+    parser.add_argument("--lane-size", type=int, default=0, help="0 = one process per CPU")
+    args = parser.parse_args()
+
+    print(f"tasks={args.tasks} cpu_ms={args.cpu_ms} cancel_after_ms={args.cancel_after_ms}")
+    print(f"{'mode':>16} {'wall s':>8} {'stop p50 ms':>12} {'stop max ms':>12}")
+    for mode, interrupt in (("run to end", False), ("interrupted", True)):
+        executor = TaskExecutor(ProcessLane(size=args.lane_size, max_tasks_per_process=1000))
+        try:
+            # Start the slots' processes before timing
+            await asyncio.gather(*(executor.run(get_spec("cpu_burn"), {"milliseconds": 1}, timeout=60) for _ in range(8)))
+            wall, stops = await _run(executor, args, interrupt)
+        finally:
+            executor.shutdown()
+        print(f"{mode:>16} {wall:>8.2f} {statistics.median(stops) * 1000:>12.0f} {max(stops) * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+http_fetch throughput per worker: a new httpx client per task (the previous
+behaviour) vs. the shared pooled client, against a local keep-alive HTTP server
+running in a separate process. --hosts spreads the fetches over several
+loopback addresses (127.0.0.1, 127.0.0.2, ...), each its own origin pool.
+
+Plain HTTP only, so the per-task numbers exclude the TLS handshake a real
+https target would add to every fetch.
+
+    python -m benchmarks.bench_http_fetch --fetches 2000 --concurrency 32 --hosts 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+os.environ.setdefault("HTTP_FETCH_ALLOW_PRIVATE_NETWORKS", "true")
+
+import httpx  # noqa: E402
+
+from app.tasks import http_client  # noqa: E402
+from app.tasks.http_fetch import http_fetch  # noqa: E402
+
+_BODY = b'{"ok": true}'
+
+
+async def _serve(hosts: list[str], port: int, ready) -> None:
+    async def handle(reader, writer):
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s" % (len(_BODY), _BODY))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, hosts, port, backlog=1024)
+    ready.set()
+    await server.serve_forever()
+
+
+def _server_process(hosts: list[str], port: int, ready) -> None:
+    asyncio.run(_serve(hosts, port, ready))
+
+
+async def _per_task_client(payload: dict) -> dict:
+    async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+        r = await client.get(payload["url"])
+    return {"status_code": r.status_code}
+
+
+async def _run(fetch, urls: list[str], fetches: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(url: str) -> None:
+        async with sem:
+            assert (await fetch({"url": url}))["status_code"] == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(urls[i % len(urls)]) for i in range(fetches)))
+    return fetches / (time.perf_counter() - start)
+
+
+async def _main(args) -> None:
+    urls = [f"http://{host}:{args.port}/" for host in args.hosts]
+    print(f"fetches={args.fetches} concurrency={args.concurrency} hosts={len(urls)} per_host={args.per_host}")
+    print(f"{'client':>9}  {'fetches/s':>10}")
+    for name, fetch in (("per-task", _per_task_client), ("shared", http_fetch)):
+        await _run(fetch, urls, min(100, args.fetches), args.concurrency)  # warm-up
+        rate = await _run(fetch, urls, args.fetches, args.concurrency)
+        print(f"{name:>9}  {rate:>10.0f}")
+    shared = http_client.get_http_client()
+    print(f"shared client: {len(shared._origins)} origin pools, http2={shared.http2}")
+    await http_client.close_http_client()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fetches", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--hosts", type=int, default=1)
+    ap.add_argument("--per-host", type=int, default=http_client.settings.http_fetch_max_connections_per_host)
+    ap.add_argument("--port", type=int, default=18081)
+    args = ap.parse_args()
+    args.hosts = [f"127.0.0.{i}" for i in range(1, args.hosts + 1)]
+    http_client.settings.http_fetch_max_connections_per_host = args.per_host
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=_server_process, args=(args.hosts, args.port, ready), daemon=True)
+    server.start()
+    try:
+        ready.wait(10)
+        asyncio.run(_main(args))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Duplicate-submission path: re-submitting known idempotency keys with and
+without the in-process idempotency cache.
+
+Seeds --keys tasks through `submit_tasks`, then re-submits random known keys
+from --concurrency coroutines and reports submissions/s and p50/p99 latency. Uses
+a temporary SQLite file; no Redis required.
+
+    python -m benchmarks.bench_idempotency --keys 10000 --duplicates 20000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.schemas import TaskCreateRequest
+from app.core.idempotency import idempotency_cache
+from app.core.submission import submit_tasks
+from app.db.models import Base
+from app.db.session import build_engine
+
+
+class NullQueue:
+    async def enqueue_many(self, items):
+        return len(items)
+
+
+def _req(key: str) -> TaskCreateRequest:
+    return TaskCreateRequest(task_type="data_transform", payload={"data": {"k": key}}, idempotency_key=key)
+
+
+async def _run(session_factory, keys: list[str], n: int, concurrency: int) -> tuple[float, float, float]:
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with sem:
+            start = time.perf_counter()
+            async with session_factory() as session:
+                [res] = await submit_tasks(session, NullQueue(), [_req(random.choice(keys))])
+            latencies.append(time.perf_counter() - start)
+            assert not res.created
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return n / elapsed, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--duplicates", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'idem.sqlite'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        keys = [f"key-{i}" for i in range(args.keys)]
+        for i in range(0, len(keys), 1000):
+            async with session_factory() as session:
+                await submit_tasks(session, NullQueue(), [_req(k) for k in keys[i : i + 1000]])
+
+        print(f"{'cache':>8} {'subs/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, size in (("off", 0), ("on", args.keys)):
+            idempotency_cache.clear()
+            idempotency_cache.max_entries = size
+            if size:
+                # warm: every key seen once, as after a client's first retry
+                for i in range(0, len(keys), 1000):
+                    async with session_factory() as session:
+                        await submit_tasks(session, NullQueue(), [_req(k) for k in keys[i : i + 1000]])
+            rate, p50, p99 = await _run(session_factory, keys, args.duplicates, args.concurrency)
+            print(f"{label:>8} {rate:>9.1f} {p50:>8.2f} {p99:>8.2f}")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
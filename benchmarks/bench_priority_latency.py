@@ -0,0 +1,85 @@
+"""
+High-priority tail latency under a backlog of low-priority tasks.
+
+Fills the ready queue with `--backlog` priority -100 tasks, then injects priority
+100 tasks while `--consumers` simulated workers drain the queue. Reports the time
+from enqueue to dequeue for the high-priority tasks. Requires Redis (docker compose up -d).
+
+    python -m benchmarks.bench_priority_latency --backlog 50000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from redis.asyncio import Redis
+
+from app.queue.redis_queue import RedisQueue
+from app.settings import settings
+
+
+def _pct(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def _main(args) -> None:
+    settings.queue_name = f"dto:bench:{uuid.uuid4().hex[:8]}"
+    redis = Redis.from_url(args.redis_url)
+    q = RedisQueue(redis)
+    try:
+        await q.enqueue_many([(f"low-{i}", -100) for i in range(args.backlog)])
+
+        sent: dict[str, float] = {}
+        latencies: list[float] = []
+        stop = asyncio.Event()
+
+        async def consumer() -> None:
+            r = Redis.from_url(args.redis_url)
+            cq = RedisQueue(r)
+            try:
+                while not stop.is_set():
+                    tid = await cq.dequeue(1)
+                    if tid and tid in sent:
+                        latencies.append(time.perf_counter() - sent.pop(tid))
+                    await asyncio.sleep(args.work_ms / 1000.0)
+            finally:
+                await r.aclose()
+
+        consumers = [asyncio.create_task(consumer()) for _ in range(args.consumers)]
+        for i in range(args.high):
+            tid = f"high-{i}"
+            sent[tid] = time.perf_counter()
+            await q.enqueue(tid, priority=100)
+            await asyncio.sleep(args.interval_ms / 1000.0)
+
+        deadline = time.perf_counter() + 10
+        while sent and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.gather(*consumers)
+
+        ms = [x * 1000 for x in latencies]
+        print(f"backlog={args.backlog} high={len(ms)} lost={len(sent)}")
+        if ms:
+            print(f"p50={_pct(ms, 0.50):.2f}ms p99={_pct(ms, 0.99):.2f}ms max={max(ms):.2f}ms")
+    finally:
+        await redis.delete(q.key, q.seq_key)
+        await redis.aclose()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--redis-url", default=settings.redis_url)
+    ap.add_argument("--backlog", type=int, default=50_000)
+    ap.add_argument("--high", type=int, default=200)
+    ap.add_argument("--consumers", type=int, default=4)
+    ap.add_argument("--work-ms", type=float, default=5.0)
+    ap.add_argument("--interval-ms", type=float, default=10.0)
+    asyncio.run(_main(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
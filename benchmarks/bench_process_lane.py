@@ -0,0 +1,78 @@
+"""
+Mixed CPU + I/O workload: cpu_burn on the event loop vs. in the process lane.
+
+With CPU work inline, the simulated I/O tasks queue up behind busy loops. With the
+process lane, CPU work spreads across cores and I/O keeps flowing on the loop.
+
+    python -m benchmarks.bench_process_lane --cpu-tasks 32 --io-tasks 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+import app.tasks  # noqa: F401
+from app.tasks.registry import ExecutionKind, TaskSpec, get_spec
+from app.workers.executors import ProcessLane, TaskExecutor
+
+
+async def _io_task(payload: dict) -> dict:
+    await asyncio.sleep(payload["seconds"])
+    return {}
+
+
+async def _run(executor: TaskExecutor, cpu_spec: TaskSpec, args) -> tuple[float, float]:
+    io_spec = TaskSpec("io_sleep", _io_task, ExecutionKind.ASYNC)
+    jobs = [(cpu_spec, {"milliseconds": args.cpu_ms})] * args.cpu_tasks
+    jobs += [(io_spec, {"seconds": args.io_seconds})] * args.io_tasks
+
+    sem = asyncio.Semaphore(args.concurrency)
+    io_latencies: list[float] = []
+
+    async def one(spec: TaskSpec, payload: dict) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await executor.run(spec, payload, timeout=60)
+            if spec is io_spec:
+                io_latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(s, p) for s, p in jobs))
+    elapsed = time.perf_counter() - start
+    io_latencies.sort()
+    p99 = io_latencies[int(len(io_latencies) * 0.99) - 1] if io_latencies else 0.0
+    return len(jobs) / elapsed, p99 * 1000
+
+
+async def _main(args) -> None:
+    cpu = get_spec("cpu_burn")
+    inline_cpu = TaskSpec(cpu.task_type, lambda p: asyncio.sleep(0, cpu.handler(p)), ExecutionKind.ASYNC)
+
+    lane = ProcessLane(size=0, max_tasks_per_process=1000)
+    executor = TaskExecutor(lane)
+    try:
+        # warm the pool so process start-up is not measured
+        await asyncio.gather(*(executor.run(cpu, {"milliseconds": 1}, timeout=60) for _ in range(lane.size)))
+        print(f"cores={os.cpu_count()} pool_size={lane.size}")
+        print(f"{'mode':>8}  {'tasks/s':>9}  {'io p99 ms':>10}")
+        for name, spec in (("inline", inline_cpu), ("process", cpu)):
+            tps, p99 = await _run(executor, spec, args)
+            print(f"{name:>8}  {tps:>9.1f}  {p99:>10.1f}")
+    finally:
+        executor.shutdown()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cpu-tasks", type=int, default=32)
+    ap.add_argument("--cpu-ms", type=int, default=100)
+    ap.add_argument("--io-tasks", type=int, default=200)
+    ap.add_argument("--io-seconds", type=float, default=0.05)
+    ap.add_argument("--concurrency", type=int, default=32)
+    asyncio.run(_main(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
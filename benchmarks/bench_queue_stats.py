@@ -0,0 +1,138 @@
+"""
+What the /v1/metrics backlog gauges cost: reading the per-(task_type, status)
+counts and the oldest due task vs. the GROUP BY count(*) they replace, and
+what maintaining the counts adds to inserts and status transitions.
+
+Seeds --tasks rows; the write comparison commits --writes single-row
+inserts, then transitions each one, with the task_counts triggers installed
+and dropped. No Redis required (queue depths are two ZCARDs on top).
+
+    python -m benchmarks.bench_queue_stats --tasks 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db.models import Base, Task, TaskCount, TaskStatus, install_task_count_triggers
+from app.db.session import build_engine
+
+T0 = datetime(2024, 1, 1)
+TYPES = ["http_fetch", "data_transform", "cpu_burn", "report", "email"]
+STATUSES = ["COMPLETED"] * 90 + ["FAILED"] * 5 + ["QUEUED"] * 3 + ["RUNNING"] * 2
+
+
+def _stored(dt: datetime) -> str:
+    # SQLAlchemy's DateTime storage format on SQLite
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _row(i: int) -> tuple:
+    at = _stored(T0 + timedelta(milliseconds=i * 50))
+    return (str(uuid.uuid4()), TYPES[i % len(TYPES)], "{}", STATUSES[i % 100], 0, 1, 5, at, at, at)
+
+
+_INSERT = (
+    "INSERT INTO tasks (id, task_type, payload_json, status, priority, attempts, max_attempts,"
+    " created_at, updated_at, next_run_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _seed(path: str, n: int) -> None:
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    for lo in range(0, n, 100_000):
+        conn.executemany(_INSERT, [_row(i) for i in range(lo, min(n, lo + 100_000))])
+        conn.commit()
+    conn.close()
+
+
+def _ms(samples: list[float]) -> str:
+    samples = sorted(samples)
+    return f"{statistics.median(samples) * 1000:>9.2f} {samples[int(len(samples) * 0.99) - 1] * 1000:>9.2f}"
+
+
+async def _reads(sessions, repeat: int) -> None:
+    now = datetime.now(timezone.utc)
+    oldest = (
+        select(Task.next_run_at)
+        .where(Task.status == TaskStatus.QUEUED, Task.next_run_at <= now)
+        .order_by(Task.next_run_at)
+        .limit(1)
+    )
+    scan = select(Task.task_type, Task.status, func.count()).group_by(Task.task_type, Task.status)
+    async with sessions() as session:
+        for name, stmts, times in (
+            ("task_counts + oldest due", (select(TaskCount), oldest), repeat),
+            ("GROUP BY count(*) + oldest due", (scan, oldest), 3),
+        ):
+            samples = []
+            for _ in range(times):
+                start = time.perf_counter()
+                for stmt in stmts:
+                    (await session.execute(stmt)).all()
+                samples.append(time.perf_counter() - start)
+            print(f"{name:>32} {_ms(samples)}")
+
+
+def _writes(path: str, n: int, triggers: bool) -> tuple[float, float]:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        if triggers:
+            install_task_count_triggers(conn)
+        else:
+            for name in ("trg_task_counts_insert", "trg_task_counts_delete", "trg_task_counts_update"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    rows = [_row(i) for i in range(n)]
+    start = time.perf_counter()
+    for row in rows:
+        conn.execute(_INSERT, row)
+        conn.commit()
+    inserts = time.perf_counter() - start
+    start = time.perf_counter()
+    for row in rows:
+        conn.execute("UPDATE tasks SET status = 'RUNNING' WHERE id = ?", (row[0],))
+        conn.commit()
+    updates = time.perf_counter() - start
+    conn.close()
+    return n / inserts, n / updates
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "stats.sqlite")
+    _seed(path, args.tasks)
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    print(f"tasks={args.tasks:,}")
+    print(f"{'read':>32} {'p50 ms':>9} {'p99 ms':>9}")
+    await _reads(async_sessionmaker(engine, expire_on_commit=False), args.repeat)
+    await engine.dispose()
+
+    print(f"{'counts':>32} {'inserts/s':>9} {'updates/s':>9}")
+    for label, triggers in (("task_counts triggers", True), ("no triggers", False)):
+        inserts, updates = _writes(path, args.writes, triggers)
+        print(f"{label:>32} {inserts:>9.0f} {updates:>9.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
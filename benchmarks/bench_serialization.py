@@ -0,0 +1,101 @@
+"""
+Encode/decode microbenchmarks: stdlib json vs. app.core.serialization (orjson)
+on representative documents, plus FastAPI's JSONResponse vs. ORJSONResponse
+rendering of a task list page.
+
+    python -m benchmarks.bench_serialization --seconds 0.5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.api.schemas import TaskListResponse, TaskResponse
+from app.core import serialization
+from app.queue.notifications import transition
+
+
+def _task_response(i: int) -> TaskResponse:
+    now = datetime.now(timezone.utc)
+    return TaskResponse(
+        id=str(uuid.uuid4()),
+        task_type="data_transform",
+        status="COMPLETED",
+        created_at=now,
+        updated_at=now,
+        next_run_at=now,
+        attempts=1,
+        max_attempts=5,
+        priority=0,
+        last_error=None,
+        result={"transformed": {"a": i, "b": f"value-{i}"}, "field_count": 2},
+        idempotency_key=f"key-{i}",
+    )
+
+
+def _documents() -> dict[str, Any]:
+    rnd = random.Random(7)
+    page = TaskListResponse(items=[_task_response(i) for i in range(20)], next_cursor="abc")
+    return {
+        "http_fetch payload": {"url": "https://example.com/api/items?page=3", "timeout_seconds": 5},
+        "transform payload 1KB": {
+            "data": {f"field_{i}": {"value": rnd.random(), "label": f"label {i}"} for i in range(20)},
+            "select": [f"field_{i}" for i in range(10)],
+            "rename": {f"field_{i}": f"renamed_{i}" for i in range(5)},
+        },
+        "task event": transition(str(uuid.uuid4()), "RUNNING", "COMPLETED"),
+        "list page (20 tasks)": jsonable_encoder(page),
+        "result 100KB": {
+            "rows": [
+                {"id": rnd.randrange(10**9), "name": f"item-{rnd.randrange(10**6)}", "score": rnd.random()}
+                for _ in range(1600)
+            ]
+        },
+    }
+
+
+def _rate(fn: Callable[[], Any], seconds: float) -> float:
+    n, start = 0, time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(10):
+            fn()
+        n += 10
+        now = time.perf_counter()
+        if now >= deadline:
+            return n / (now - start)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=0.5, help="time per measurement")
+    args = ap.parse_args()
+
+    print(f"{'document':>22} {'bytes':>7} {'op':>7} {'stdlib/s':>10} {'orjson/s':>10} {'speedup':>8}")
+    for name, doc in _documents().items():
+        text = json.dumps(doc)
+        cases = (
+            ("encode", lambda: json.dumps(doc), lambda: serialization.dumpb(doc)),
+            ("decode", lambda: json.loads(text), lambda: serialization.loads(text)),
+            ("exact", lambda: json.loads(text), lambda: serialization.loads_exact(text)),
+        )
+        for op, stdlib, fast in cases:
+            a, b = _rate(stdlib, args.seconds), _rate(fast, args.seconds)
+            print(f"{name:>22} {len(text):>7} {op:>7} {a:>10.0f} {b:>10.0f} {b / a:>7.1f}x")
+
+    content = jsonable_encoder(TaskListResponse(items=[_task_response(i) for i in range(20)], next_cursor=None))
+    a = _rate(lambda: JSONResponse(content), args.seconds)
+    b = _rate(lambda: ORJSONResponse(content), args.seconds)
+    print(f"{'list page response':>22} {'':>7} {'render':>7} {a:>10.0f} {b:>10.0f} {b / a:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+GET /v1/tasks/{id}/events page latency as the event log grows, and the effect
+of compaction on the live task_events table.
+
+Seeds --tasks finished tasks with --events-per-task events each, measures
+first/next page latency for random tasks, compacts every task into the
+monthly history tables, and measures again. No Redis required.
+
+    python -m benchmarks.bench_task_events --tasks 20000 --events-per-task 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "bench.sqlite"))
+
+import httpx  # noqa: E402
+from sqlalchemy import func, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+
+from app.api import routes_tasks  # noqa: E402
+from app.db.events import compact_events  # noqa: E402
+from app.db.models import Base, Task, TaskEvent, TaskStatus  # noqa: E402
+from app.db.session import build_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+async def _seed(engine, n: int, per_task: int, now: datetime) -> list[str]:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    ids = []
+    for start in range(0, n, 5000):
+        tasks, events = [], []
+        for i in range(start, min(n, start + 5000)):
+            tid = str(uuid.uuid4())
+            # Spread over three months so compaction fills several partitions
+            at = now - timedelta(days=1 + i % 90)
+            ids.append(tid)
+            tasks.append(
+                dict(
+                    id=tid,
+                    task_type="data_transform",
+                    payload_json="{}",
+                    status=TaskStatus.COMPLETED,
+                    priority=0,
+                    attempts=1,
+                    max_attempts=5,
+                    created_at=at,
+                    updated_at=at,
+                    next_run_at=at,
+                )
+            )
+            for j in range(per_task):
+                events.append(
+                    dict(
+                        task_id=tid,
+                        timestamp=at - timedelta(seconds=per_task - j),
+                        from_status="QUEUED",
+                        to_status="RUNNING",
+                        message=f"attempt {j}",
+                    )
+                )
+        async with engine.begin() as conn:
+            await conn.execute(insert(Task), tasks)
+            await conn.execute(insert(TaskEvent), events)
+    return ids
+
+
+async def _pages(client: httpx.AsyncClient, ids: list[str], samples: int, limit: int) -> tuple[float, float]:
+    headers = {"X-API-Key": settings.api_key}
+    rnd = random.Random(1)
+    latencies = []
+    for _ in range(samples):
+        tid, cursor = rnd.choice(ids), None
+        while True:
+            start = time.perf_counter()
+            r = await client.get(
+                f"/v1/tasks/{tid}/events", params={"limit": limit} | ({"cursor": cursor} if cursor else {}), headers=headers
+            )
+            latencies.append(time.perf_counter() - start)
+            r.raise_for_status()
+            cursor = r.json()["next_cursor"]
+            if cursor is None:
+                break
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--events-per-task", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=4)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    now = datetime.now(timezone.utc)
+    engine = build_engine(f"sqlite+aiosqlite:///{os.path.join(_tmp, 'events.sqlite')}")
+    ids = await _seed(engine, args.tasks, args.events_per_task, now)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    routes_tasks.AsyncSessionLocal = sessions
+
+    print(f"tasks={args.tasks} events/task={args.events_per_task} page limit={args.limit}")
+    print(f"{'state':>10} {'live events':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for state in ("live", "compacted"):
+            if state == "compacted":
+                start = time.perf_counter()
+                async with sessions() as session:
+                    while (await compact_events(session, now, 0, settings.event_compact_batch_size))[0]:
+                        pass
+                rate = args.tasks / (time.perf_counter() - start)
+                print(f"{'':>10} compaction: {rate:.0f} tasks/s")
+            async with sessions() as session:
+                live = await session.scalar(select(func.count()).select_from(TaskEvent))
+            p50, p99 = await _pages(client, ids, args.samples, args.limit)
+            print(f"{state:>10} {live:>12} {p50:>8.2f} {p99:>8.2f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+"""
+GET /v1/tasks page latency on a large tasks table: the first page and a page
+halfway down (by cursor) for each supported filter, plus count(*) per status
+vs. the maintained task_counts rows.
+
+--baseline also creates the single-column status/created_at indexes the list
+used to rely on and times the previous query shape (OR-expanded cursor) on
+them, for comparison.
+
+Seeding --tasks rows takes a while; pass --db to keep and reuse the file.
+No Redis required.
+
+    python -m benchmarks.bench_task_listing --tasks 10000000 --db /tmp/tasks-10m.sqlite --baseline
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "bench.sqlite"))
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+
+from app.api import routes_tasks  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import build_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+T0 = datetime(2024, 1, 1)
+TYPES = ["http_fetch", "data_transform", "cpu_burn", "report", "email"]
+
+
+def _status(i: int) -> str:
+    r = i % 100
+    return "COMPLETED" if r < 90 else "FAILED" if r < 95 else "QUEUED" if r < 98 else "RUNNING"
+
+
+def _stored(dt: datetime) -> str:
+    # SQLAlchemy's DateTime storage format on SQLite
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _seed(path: str, n: int) -> None:
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-512000")
+    start = time.perf_counter()
+    for lo in range(0, n, 100_000):
+        rows = []
+        for i in range(lo, min(n, lo + 100_000)):
+            at = _stored(T0 + timedelta(milliseconds=i * 50))
+            rows.append((str(uuid.uuid4()), TYPES[i % len(TYPES)], "{}", _status(i), 0, 1, 5, at, at, at))
+        conn.executemany(
+            "INSERT INTO tasks (id, task_type, payload_json, status, priority, attempts, max_attempts,"
+            " created_at, updated_at, next_run_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        print(f"\rseeded {lo + len(rows):,} rows ({(lo + len(rows)) / (time.perf_counter() - start):,.0f}/s)", end="")
+    print()
+    conn.close()
+
+
+def _middle_cursor(conn: sqlite3.Connection, where: str, params: tuple, n: int) -> tuple[str, str]:
+    sql = f"SELECT created_at, id FROM tasks {where} ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?"
+    return conn.execute(sql, params + (n,)).fetchone()
+
+
+def _encode(created_at: str, task_id: str) -> str:
+    return routes_tasks._encode_cursor(datetime.fromisoformat(created_at), task_id)
+
+
+def _ms(samples: list[float]) -> str:
+    samples = sorted(samples)
+    return f"{statistics.median(samples) * 1000:>9.2f} {samples[int(len(samples) * 0.99) - 1] * 1000:>9.2f}"
+
+
+async def _api(client: httpx.AsyncClient, params: dict, repeat: int) -> list[float]:
+    headers = {"X-API-Key": settings.api_key}
+    out = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        (await client.get("/v1/tasks", params=params, headers=headers)).raise_for_status()
+        out.append(time.perf_counter() - start)
+    return out
+
+
+def _sql(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> list[float]:
+    out = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        out.append(time.perf_counter() - start)
+    return out
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10_000_000)
+    parser.add_argument("--db", default=None, help="database file, seeded if missing")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--baseline", action="store_true")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    path = args.db or os.path.join(_tmp, "listing.sqlite")
+    if not os.path.exists(path):
+        _seed(path, args.tasks)
+    conn = sqlite3.connect(path)
+    n = conn.execute("SELECT sum(count) FROM task_counts").fetchone()[0]
+    print(f"tasks={n:,} db={os.path.getsize(path) / 1e9:.1f}GB")
+
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    routes_tasks.AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    # The middle hour of the seeded range (rows are 50ms apart)
+    hour_start = T0 + timedelta(milliseconds=n * 25) - timedelta(minutes=30)
+    hour_end = hour_start + timedelta(hours=1)
+    window = {"created_after": hour_start.isoformat(), "created_before": hour_end.isoformat()}
+    scenarios = [
+        ("all", {}, "", ()),
+        ("status=COMPLETED", {"status": "COMPLETED"}, "WHERE status = ?", ("COMPLETED",)),
+        ("status=FAILED", {"status": "FAILED"}, "WHERE status = ?", ("FAILED",)),
+        ("task_type", {"task_type": "report"}, "WHERE task_type = ?", ("report",)),
+        (
+            "status+1 hour",
+            {"status": "COMPLETED"} | window,
+            "WHERE status = ? AND created_at >= ? AND created_at < ?",
+            ("COMPLETED", _stored(hour_start), _stored(hour_end)),
+        ),
+    ]
+
+    print(f"{'filter':>18} {'page':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, params, where, where_params in scenarios:
+            matching = conn.execute(f"SELECT count(*) FROM tasks {where}", where_params).fetchone()[0]
+            cursor = _encode(*_middle_cursor(conn, where, where_params, matching // 2))
+            for page, extra in (("first", {}), ("middle", {"cursor": cursor})):
+                print(f"{name:>18} {page:>6} {_ms(await _api(client, params | extra | {'limit': 20}, args.repeat))}")
+
+        count_sql = "SELECT count(*) FROM tasks WHERE status = ?"
+        print(f"{'count(*) FAILED':>18} {'':>6} {_ms(_sql(conn, count_sql, ('FAILED',), 5))}")
+        counts_sql = "SELECT sum(count) FROM task_counts WHERE status = ?"
+        print(f"{'counts row FAILED':>18} {'':>6} {_ms(_sql(conn, counts_sql, ('FAILED',), args.repeat))}")
+
+    if args.baseline:
+        print("previous query shape on single-column indexes:")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_tasks_status ON tasks (status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_tasks_created_at ON tasks (created_at)")
+        for name, index, where, where_params in (
+            ("all", "ix_tasks_created_at", "", ()),
+            ("status=COMPLETED", "ix_tasks_status", "WHERE status = ?", ("COMPLETED",)),
+            ("status=FAILED", "ix_tasks_status", "WHERE status = ?", ("FAILED",)),
+        ):
+            matching = conn.execute(f"SELECT count(*) FROM tasks {where}", where_params).fetchone()[0]
+            at, tid = _middle_cursor(conn, where, where_params, matching // 2)
+            cursor_sql = "(created_at < ? OR (created_at = ? AND id < ?))"
+            for page, extra_sql, extra in (("first", "", ()), ("middle", cursor_sql, (at, at, tid))):
+                clauses = " AND ".join(c for c in (where.removeprefix("WHERE "), extra_sql) if c)
+                sql = (
+                    f"SELECT * FROM tasks INDEXED BY {index} {'WHERE ' + clauses if clauses else ''}"
+                    " ORDER BY created_at DESC, id DESC LIMIT 21"
+                )
+                print(f"{name:>18} {page:>6} {_ms(_sql(conn, sql, where_params + extra, 3))}")
+        conn.execute("DROP INDEX ix_tasks_status")
+        conn.execute("DROP INDEX ix_tasks_created_at")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
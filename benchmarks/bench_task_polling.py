@@ -0,0 +1,110 @@
+"""
+GET /v1/tasks/{id} polling: requests/s and SQL statements per request with the
+response cache off, on, and on with If-None-Match (304s).
+
+Drives the ASGI app in-process with httpx against a temporary SQLite file seeded
+with --tasks tasks, half of them COMPLETED. No Redis required.
+
+    python -m benchmarks.bench_task_polling --tasks 200 --polls 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "bench.sqlite"))
+
+import httpx  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+from app.api.response_cache import task_response_cache  # noqa: E402
+from app.db import migrate  # noqa: E402
+from app.db.models import Task, TaskStatus  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+async def _seed(n: int) -> list[str]:
+    now = datetime.now(timezone.utc)
+    rows = [
+        dict(
+            id=str(uuid.uuid4()),
+            task_type="data_transform",
+            payload_json=json.dumps({"data": {"a": 1}}),
+            status=TaskStatus.COMPLETED if i % 2 else TaskStatus.RUNNING,
+            priority=0,
+            attempts=1,
+            max_attempts=5,
+            created_at=now,
+            updated_at=now,
+            next_run_at=now,
+            result_json=json.dumps({"rows": list(range(50))}) if i % 2 else None,
+        )
+        for i in range(n)
+    ]
+    async with AsyncSessionLocal() as s:
+        await s.execute(insert(Task), rows)
+        await s.commit()
+    return [r["id"] for r in rows]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    await migrate.main()
+    ids = await _seed(args.tasks)
+    statements = 0
+
+    def _count(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+
+    headers = {"X-API-Key": settings.api_key}
+    transport = httpx.ASGITransport(app=app)
+    print(f"{'mode':>14} {'req/s':>9} {'SQL/req':>8} {'304s':>6}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode, size in (("no cache", 0), ("cache", args.tasks), ("cache+etag", args.tasks)):
+            task_response_cache.clear()
+            task_response_cache.max_entries = size
+            etags: dict[str, str] = {}
+            not_modified = 0
+            sem = asyncio.Semaphore(args.concurrency)
+
+            async def poll() -> None:
+                nonlocal not_modified
+                tid = random.choice(ids)
+                async with sem:
+                    h = dict(headers)
+                    if mode == "cache+etag" and tid in etags:
+                        h["If-None-Match"] = etags[tid]
+                    r = await client.get(f"/v1/tasks/{tid}", headers=h)
+                if r.status_code == 304:
+                    not_modified += 1
+                else:
+                    r.raise_for_status()
+                    etags[tid] = r.headers["etag"]
+
+            statements = 0
+            start = time.perf_counter()
+            await asyncio.gather(*(poll() for _ in range(args.polls)))
+            rps = args.polls / (time.perf_counter() - start)
+            print(f"{mode:>14} {rps:>9.1f} {statements / args.polls:>8.2f} {not_modified:>6}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
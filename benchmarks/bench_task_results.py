@@ -0,0 +1,133 @@
+"""
+GET /v1/tasks page latency with large (~100KB) results, stored inline in
+tasks.result_json (the previous layout) vs. offloaded to task_results, with
+full pages and with a `fields=` projection.
+
+Drives the ASGI app in-process with httpx against temporary SQLite files seeded
+with --tasks completed tasks each. No Redis required.
+
+    python -m benchmarks.bench_task_results --tasks 500 --pages 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "bench.sqlite"))
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+
+from app.api import routes_tasks  # noqa: E402
+from app.core.results import offload_result  # noqa: E402
+from app.db.models import Base, Task, TaskResult, TaskStatus  # noqa: E402
+from app.db.session import build_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+def _result(i: int, size: int) -> str:
+    rnd = random.Random(i)
+    rows, total = [], 0
+    while total < size:
+        row = {"id": rnd.randrange(10**9), "name": f"item-{rnd.randrange(10**6)}", "score": rnd.random()}
+        rows.append(row)
+        total += len(json.dumps(row)) + 2
+    return json.dumps({"rows": rows})
+
+
+async def _seed(path: str, n: int, size: int, offload: bool):
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.now(timezone.utc)
+    tasks, blobs = [], []
+    for i in range(n):
+        tid = str(uuid.uuid4())
+        result_json = _result(i, size)
+        blob = offload_result(result_json) if offload else None
+        at = now - timedelta(seconds=i)
+        tasks.append(
+            dict(
+                id=tid,
+                task_type="data_transform",
+                payload_json=json.dumps({"data": {"i": i}}),
+                status=TaskStatus.COMPLETED,
+                priority=0,
+                attempts=1,
+                max_attempts=5,
+                created_at=at,
+                updated_at=at,
+                next_run_at=at,
+                result_json=None if blob else result_json,
+                result_offloaded=True if blob else None,
+            )
+        )
+        if blob:
+            blobs.append(dict(task_id=tid, encoding=blob.encoding, size=blob.size, data=blob.data))
+    async with engine.begin() as conn:
+        await conn.execute(insert(Task), tasks)
+        if blobs:
+            await conn.execute(insert(TaskResult), blobs)
+    return engine
+
+
+async def _pages(client: httpx.AsyncClient, params: dict, pages: int) -> tuple[float, float, int]:
+    headers = {"X-API-Key": settings.api_key}
+    latencies = []
+    size = 0
+    cursor = None
+    for _ in range(pages):
+        q = dict(params)
+        if cursor:
+            q["cursor"] = cursor
+        start = time.perf_counter()
+        r = await client.get("/v1/tasks", params=q, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        r.raise_for_status()
+        body = r.json()
+        size += len(r.content)
+        cursor = body["next_cursor"]
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000, size // pages
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--result-bytes", type=int, default=100_000)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    projection = {"limit": args.limit, "fields": "id,status,updated_at"}
+    full = {"limit": args.limit}
+    print(f"tasks={args.tasks} result_bytes~{args.result_bytes} limit={args.limit}")
+    print(f"{'storage':>9} {'page':>10} {'db MB':>7} {'p50 ms':>8} {'p99 ms':>8} {'KB/page':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for storage, offload in (("inline", False), ("offloaded", True)):
+            path = os.path.join(_tmp, f"{storage}.sqlite")
+            engine = await _seed(path, args.tasks, args.result_bytes, offload)
+            routes_tasks.AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+            mb = os.path.getsize(path) / 1e6
+            for page, params in (("full", full), ("fields", projection)):
+                # at most one pass over the seeded tasks
+                p50, p99, size = await _pages(client, params, min(args.pages, args.tasks // args.limit))
+                print(f"{storage:>9} {page:>10} {mb:>7.1f} {p50:>8.2f} {p99:>8.2f} {size / 1000:>8.1f}")
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Throughput of WorkerRuntime against concurrency for an I/O-bound task mix.
+
+Runs without Redis: tasks come from an in-memory source and each "handler" awaits
+a simulated network call drawn from a fixed latency mix.
+
+    python -m benchmarks.bench_worker_concurrency --tasks 400
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.workers.runtime import WorkerRuntime
+
+# (latency seconds, weight): mostly fast fetches with a slow tail
+IO_MIX = [(0.01, 6), (0.05, 3), (0.25, 1)]
+
+
+class MemorySource:
+    def __init__(self, task_ids: list[str]):
+        self._q: asyncio.Queue[str] = asyncio.Queue()
+        for tid in task_ids:
+            self._q.put_nowait(tid)
+
+    async def dequeue_batch(self, max_items: int, timeout_seconds: int) -> list[str]:
+        try:
+            items = [await asyncio.wait_for(self._q.get(), timeout=timeout_seconds)]
+        except asyncio.TimeoutError:
+            return []
+        while len(items) < max_items and not self._q.empty():
+            items.append(self._q.get_nowait())
+        return items
+
+
+async def _run(concurrency: int, n_tasks: int, seed: int) -> float:
+    rnd = random.Random(seed)
+    latencies = rnd.choices([l for l, _ in IO_MIX], weights=[w for _, w in IO_MIX], k=n_tasks)
+    by_id = {f"t{i}": lat for i, lat in enumerate(latencies)}
+    done = 0
+
+    runtime: WorkerRuntime
+
+    async def process(task_id: str) -> None:
+        nonlocal done
+        await asyncio.sleep(by_id[task_id])
+        done += 1
+        if done == n_tasks:
+            runtime.stop()
+
+    runtime = WorkerRuntime(
+        source=MemorySource(list(by_id)),
+        process=process,
+        concurrency=concurrency,
+        poll_timeout_seconds=1,
+        drain_timeout_seconds=30.0,
+    )
+    start = time.perf_counter()
+    await runtime.run()
+    return n_tasks / (time.perf_counter() - start)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tasks", type=int, default=400)
+    ap.add_argument("--levels", default="1,2,4,8,16,32,64")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    print(f"{'concurrency':>11}  {'tasks/s':>9}")
+    for c in (int(x) for x in args.levels.split(",")):
+        tps = asyncio.run(_run(c, args.tasks, args.seed))
+        print(f"{c:>11}  {tps:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api import routes_tasks
+from app.api.response_cache import task_response_cache
+from app.db.archive import TaskArchive
+from app.db.models import Base, Task, TaskStatus
+
+
+def task_row(now: datetime, **kw) -> Task:
+    """An unsaved QUEUED data_transform task, due and created at `now`; `kw` overrides columns."""
+    values = dict(
+        id=str(uuid.uuid4()),
+        task_type="data_transform",
+        payload_json="{}",
+        status=TaskStatus.QUEUED,
+        priority=0,
+        idempotency_key=None,
+        attempts=0,
+        max_attempts=5,
+        created_at=now,
+        updated_at=now,
+        next_run_at=now,
+        enqueued_at=None,
+        locked_until=None,
+        last_error=None,
+        result_json=None,
+    )
+    values.update(kw)
+    return Task(**values)
+
+
+@dataclass
+class Db:
+    """A file database the API routes are pointed at, with an archive next to it."""
+
+    sync_engine: Engine
+    engine: AsyncEngine
+    sessions: async_sessionmaker[AsyncSession]
+    archive: TaskArchive
+    # (sql, parameters) of every statement run through the async engine
+    statements: list[tuple] = field(default_factory=list)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = tmp_path / "hot.sqlite"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    db = Db(
+        sync_engine=sync_engine,
+        engine=engine,
+        sessions=async_sessionmaker(engine, expire_on_commit=False),
+        archive=TaskArchive(str(tmp_path / "archive.sqlite")),
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a: db.statements.append((a[2], a[3])))
+    monkeypatch.setattr(routes_tasks, "AsyncSessionLocal", db.sessions)
+    monkeypatch.setattr(routes_tasks, "engine", engine)
+    monkeypatch.setattr(routes_tasks, "task_archive", db.archive)
+    task_response_cache.clear()
+    yield db
+    task_response_cache.clear()
+
+    async def close():
+        await db.archive.aclose()
+        await engine.dispose()
+
+    asyncio.run(close())
@@ -0,0 +1,93 @@
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.schemas import TaskCreateRequest
+from app.core.idempotency import idempotency_cache
+from app.core.submission import submit_tasks
+from app.db.models import Base, Task, TaskEvent, TaskStatus
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.items = []
+        self.calls = 0
+
+    async def enqueue_many(self, items):
+        self.calls += 1
+        self.items.extend(items)
+        return len(items)
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    idempotency_cache.clear()
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+    idempotency_cache.clear()
+
+
+def _req(key=None, priority=None, task_type="data_transform"):
+    return TaskCreateRequest(task_type=task_type, payload={"data": {}}, idempotency_key=key, priority=priority)
+
+
+@pytest.mark.asyncio
+async def test_batch_inserts_and_enqueues_once(session_factory):
+    q = RecordingQueue()
+    async with session_factory() as session:
+        results = await submit_tasks(session, q, [_req(priority=i) for i in range(50)])
+
+    assert all(r.created for r in results)
+    assert [r.task.priority for r in results] == list(range(50))
+    assert q.calls == 1
+    assert [tid for tid, _ in q.items] == [r.task.id for r in results]
+
+    async with session_factory() as session:
+        statuses = (await session.execute(select(Task.status))).scalars().all()
+        events = (await session.execute(select(func.count()).select_from(TaskEvent))).scalar_one()
+    assert statuses == [TaskStatus.QUEUED] * 50
+    assert events == 100
+
+
+@pytest.mark.asyncio
+async def test_batch_resolves_idempotency_keys(session_factory):
+    q = RecordingQueue()
+    async with session_factory() as session:
+        [first] = await submit_tasks(session, q, [_req(key="a")])
+
+    batch = [_req(key="a"), _req(key="b"), _req(key="b"), _req(key="a", task_type="cpu_burn"), _req()]
+    async with session_factory() as session:
+        results = await submit_tasks(session, q, batch)
+
+    assert [r.created for r in results] == [False, True, False, True, True]
+    assert results[0].task.id == first.task.id
+    assert results[1].task.id == results[2].task.id
+    assert results[3].task.id != first.task.id
+
+    async with session_factory() as session:
+        total = (await session.execute(select(func.count()).select_from(Task))).scalar_one()
+    assert total == 4
+    assert len(q.items) == 4
+
+
+@pytest.mark.asyncio
+async def test_fully_deduplicated_batch_skips_enqueue(session_factory):
+    q = RecordingQueue()
+    async with session_factory() as session:
+        await submit_tasks(session, q, [_req(key="a")])
+        results = await submit_tasks(session, q, [_req(key="a"), _req(key="a")])
+
+    assert not any(r.created for r in results)
+    assert q.calls == 1
+
+
+def test_payloads_with_nan_or_infinity_are_rejected():
+    with pytest.raises(ValidationError):
+        TaskCreateRequest(task_type="data_transform", payload={"data": {"x": [1.0, float("nan")]}})
+    with pytest.raises(ValidationError):
+        TaskCreateRequest.model_validate_json('{"task_type": "data_transform", "payload": {"x": Infinity}}')
+    assert TaskCreateRequest(task_type="data_transform", payload={"x": 2**70}).payload == {"x": 2**70}
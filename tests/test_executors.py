@@ -0,0 +1,62 @@
+import pytest
+
+import app.tasks  # noqa: F401
+from app.tasks import registry
+from app.tasks.registry import ExecutionKind, get_spec, register
+from app.workers.executors import ProcessLane, TaskExecutor
+
+
+def test_register_records_execution_kind(monkeypatch):
+    monkeypatch.setattr(registry, "_registry", dict(registry._registry))
+
+    @register("test_blocking_io", kind="thread")
+    def blocking(payload: dict) -> dict:
+        return payload
+
+    assert get_spec("test_blocking_io").kind == ExecutionKind.THREAD
+    assert get_spec("cpu_burn").kind == ExecutionKind.PROCESS
+    assert get_spec("http_fetch").kind == ExecutionKind.ASYNC
+
+
+@pytest.mark.asyncio
+async def test_process_lane_runs_and_kills_runaway_work():
+    lane = ProcessLane(size=1, max_tasks_per_process=2)
+    executor = TaskExecutor(lane)
+    spec = get_spec("cpu_burn")
+    try:
+        out = await executor.run(spec, {"milliseconds": 5}, timeout=30)
+        assert out["burned_ms"] == 5
+
+        proc = lane._slots[0].process
+        with pytest.raises(TimeoutError):
+            await executor.run(spec, {"milliseconds": 500}, timeout=0.05)
+
+        # the runaway process is gone and the slot serves new work from a fresh one
+        proc.join(timeout=5)
+        assert not proc.is_alive()
+
+        out = await executor.run(spec, {"milliseconds": 5}, timeout=30)
+        assert out["burned_ms"] == 5
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_lane_recycles_after_failed_jobs_too():
+    lane = ProcessLane(size=1, max_tasks_per_process=2)
+    executor = TaskExecutor(lane)
+    spec = get_spec("cpu_burn")
+    try:
+        with pytest.raises(ValueError):
+            await executor.run(spec, {"milliseconds": "bad"}, timeout=30)
+        proc = lane._slots[0].process
+        with pytest.raises(ValueError):
+            await executor.run(spec, {"milliseconds": "bad"}, timeout=30)
+
+        # the limit was reached by two failures; the next job runs in a new process
+        proc.join(timeout=5)
+        assert not proc.is_alive()
+        assert (await executor.run(spec, {"milliseconds": 5}, timeout=30))["burned_ms"] == 5
+        assert lane._slots[0].process is not proc
+    finally:
+        executor.shutdown()
@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.tasks import http_client
+from app.tasks.http_client import BlockedTargetError, DnsCache, SharedHttpClient
+from app.tasks.http_fetch import http_fetch
+
+
+class KeepAliveServer:
+    """Minimal HTTP/1.1 server that answers every request with 200 "ok"."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                self.requests += 1
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+
+
+def _client(allow_private):
+    return SharedHttpClient(
+        max_hosts=10,
+        per_host=2,
+        keepalive_expiry_seconds=30,
+        dns_ttl_seconds=60,
+        allow_private=allow_private,
+        http2=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_private_targets_are_blocked_on_the_resolved_address():
+    with pytest.raises(BlockedTargetError):
+        await http_fetch({"url": "http://10.0.0.1/"})
+    with pytest.raises(BlockedTargetError):
+        await DnsCache(60, allow_private=False).resolve("localhost", 80)
+
+    # A name that passes the early check is still refused at connect time,
+    # which also covers redirects
+    async with KeepAliveServer() as server:
+        http = _client(allow_private=False)
+        try:
+            with pytest.raises(BlockedTargetError):
+                async with http.client_for("http", "localhost", server.port) as client:
+                    await client.get(f"http://localhost:{server.port}/")
+        finally:
+            await http.aclose()
+        assert server.connections == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_connections_and_dns(monkeypatch):
+    monkeypatch.setattr(http_client.settings, "http_fetch_allow_private_networks", True)
+    monkeypatch.setattr(http_client.settings, "http_fetch_max_connections_per_host", 2)
+    async with KeepAliveServer() as server:
+        try:
+            url = f"http://localhost:{server.port}/"
+            results = await asyncio.gather(*(http_fetch({"url": url}) for _ in range(20)))
+            assert {r["status_code"] for r in results} == {200}
+            assert server.requests == 20
+            assert server.connections <= 2
+
+            http = http_client.get_http_client()
+            assert http.dns.misses == 1
+            assert http.dns.hits >= 1
+        finally:
+            await http_client.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_fail_a_shared_lookup(monkeypatch):
+    answered = asyncio.Event()
+
+    async def slow_getaddrinfo(host, port, **kw):
+        await answered.wait()
+        return [(None, None, None, "", ("93.184.216.34", port))]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", slow_getaddrinfo)
+    dns = DnsCache(60, allow_private=False)
+    first = asyncio.create_task(dns.resolve("example.com", 80))
+    second = asyncio.create_task(dns.resolve("example.com", 80))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    answered.set()
+
+    assert await second == ["93.184.216.34"]
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert (dns.misses, dns.hits) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_transport_failures_raise_httpx_errors():
+    async def silent(reader, writer):
+        await reader.read()
+
+    server = await asyncio.start_server(silent, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    http = _client(allow_private=True)
+    try:
+        async with http.client_for("http", "127.0.0.1", port) as client:
+            with pytest.raises(httpx.ReadTimeout) as timeout:
+                await client.get(f"http://127.0.0.1:{port}/?q=1", timeout=0.1)
+        assert timeout.value.request.url.query == b"q=1"
+
+        server.close()
+        await server.wait_closed()
+        async with http.client_for("http", "127.0.0.1", port) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get(f"http://127.0.0.1:{port}/")
+    finally:
+        server.close()
+        await http.aclose()
@@ -1,12 +1,19 @@
+import asyncio
 import json
 import uuid
 from datetime import datetime, timezone
 
+import fakeredis
 import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-from app.core.idempotency import find_by_idempotency_key
+from app.api.schemas import TaskCreateRequest
+from app.core.idempotency import IdempotencyCache, find_by_idempotency_key, idempotency_cache
+from app.core.submission import submit_tasks
 from app.db.models import Base, Task, TaskStatus
+from app.db.session import build_engine
 
 
 @pytest.mark.asyncio
@@ -41,4 +48,88 @@ async def test_find_by_idempotency_key():
 
         found = await find_by_idempotency_key(session, "cpu_burn", "k1")
         assert found is not None
-        assert found.id == tid
\ No newline at end of file
+        assert found.id == tid
+
+
+@pytest.mark.asyncio
+async def test_lru_cache_evicts_least_recently_used():
+    cache = IdempotencyCache(max_entries=2)
+    await cache.put_many({("t", "a"): "1", ("t", "b"): "2"})
+    assert await cache.get_many({("t", "a")}) == {("t", "a"): "1"}  # a is now most recent
+    await cache.put_many({("t", "c"): "3"})
+    assert await cache.get_many({("t", "a"), ("t", "b"), ("t", "c")}) == {("t", "a"): "1", ("t", "c"): "3"}
+
+
+@pytest.mark.asyncio
+async def test_redis_mirror_keys_live_under_the_queue_name(monkeypatch):
+    monkeypatch.setattr("app.core.idempotency.settings.queue_name", "blue")
+    redis = fakeredis.FakeAsyncRedis()
+    try:
+        await IdempotencyCache(max_entries=0, redis_ttl_seconds=60).put_many({("t", "a"): "1"}, redis)
+        assert await redis.keys("*") == [b"blue:idem:t:a"]
+        assert await IdempotencyCache(max_entries=10, redis_ttl_seconds=60).get_many({("t", "a")}, redis) == {("t", "a"): "1"}
+    finally:
+        await redis.aclose()
+
+
+class NullQueue:
+    async def enqueue_many(self, items):
+        return len(items)
+
+
+@pytest.fixture
+def empty_idempotency_cache():
+    idempotency_cache.clear()
+    yield idempotency_cache
+    idempotency_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_create_one_task(tmp_path, empty_idempotency_cache):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'idem.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def submit():
+        async with async_session() as session:
+            req = TaskCreateRequest(task_type="cpu_burn", payload={"milliseconds": 1}, idempotency_key="race")
+            [res] = await submit_tasks(session, NullQueue(), [req])
+            return res
+
+    try:
+        results = await asyncio.gather(*(submit() for _ in range(10)))
+        async with async_session() as session:
+            count = (await session.execute(select(func.count()).select_from(Task))).scalar_one()
+    finally:
+        await engine.dispose()
+
+    assert count == 1
+    assert sum(r.created for r in results) == 1
+    assert len({r.task.id for r in results}) == 1
+
+
+@pytest.mark.asyncio
+async def test_unique_index_rejects_duplicate_keys():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    now = datetime.now(timezone.utc)
+    async with async_session() as session:
+        for _ in range(2):
+            session.add(
+                Task(
+                    id=str(uuid.uuid4()),
+                    task_type="cpu_burn",
+                    payload_json="{}",
+                    status=TaskStatus.QUEUED,
+                    idempotency_key="dup",
+                    created_at=now,
+                    updated_at=now,
+                    next_run_at=now,
+                )
+            )
+        with pytest.raises(IntegrityError):
+            await session.commit()
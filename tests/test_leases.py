@@ -0,0 +1,144 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.reaper import reap_expired_leases
+from app.db.claims import claim_tasks
+from app.db.models import Base, Task, TaskStatus
+from app.db.session import build_engine
+from app.workers.batching import CompletionBatcher, Outcome
+from app.workers.lease import LeaseKeeper
+from tests.conftest import task_row
+
+
+def _running(now, **kw):
+    values = dict(
+        task_type="http_fetch",
+        status=TaskStatus.RUNNING,
+        max_attempts=3,
+        locked_until=now + timedelta(seconds=30),
+    )
+    return task_row(now, **(values | kw))
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'l.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_or_fails_expired_leases(session_factory):
+    now = datetime.now(timezone.utc)
+    alive = _running(now)
+    orphan = _running(now, locked_until=now - timedelta(seconds=1))
+    exhausted = _running(now, locked_until=now - timedelta(seconds=1), attempts=2)
+    async with session_factory() as s:
+        s.add_all([alive, orphan, exhausted])
+        await s.commit()
+
+    async with session_factory() as s:
+        requeued, failed = await reap_expired_leases(s, now, limit=100)
+    assert [tid for tid, _, _ in requeued] == [orphan.id]
+    assert len(failed) == 1
+
+    async with session_factory() as s:
+        assert (await s.get(Task, alive.id)).status == TaskStatus.RUNNING
+        o = await s.get(Task, orphan.id)
+        assert (o.status, o.attempts, o.locked_until) == (TaskStatus.QUEUED, 1, None)
+        assert (await s.get(Task, exhausted.id)).status == TaskStatus.FAILED
+
+    # a second pass finds nothing
+    async with session_factory() as s:
+        assert await reap_expired_leases(s, now, limit=100) == ([], [])
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_lease_ahead_of_reaper(session_factory):
+    now = datetime.now(timezone.utc)
+    t = _running(now, locked_until=now + timedelta(seconds=1))
+    async with session_factory() as s:
+        s.add(t)
+        await s.commit()
+
+    keeper = LeaseKeeper(session_factory, lock=None, lease_seconds=60, renew_interval_seconds=10)
+    keeper.track(t.id, t.attempts)
+    assert await keeper.renew() == 1
+
+    async with session_factory() as s:
+        assert await reap_expired_leases(s, now + timedelta(seconds=5), limit=100) == ([], [])
+
+    keeper.untrack(t.id)
+    assert await keeper.renew() == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_worker_cannot_touch_a_reclaimed_task(session_factory):
+    now = datetime.now(timezone.utc)
+    t = _running(now, locked_until=now - timedelta(seconds=1))
+    async with session_factory() as s:
+        s.add(t)
+        await s.commit()
+    stale_claim = t.attempts
+
+    # the stalled worker's lease expires; the task is requeued and claimed again
+    async with session_factory() as s:
+        [(tid, next_run, _)] = (await reap_expired_leases(s, now, limit=100))[0]
+    async with session_factory() as s:
+        [task] = await claim_tasks(s, [tid], next_run, lease_seconds=30)
+
+    lost = []
+    keeper = LeaseKeeper(session_factory, lock=None, lease_seconds=600, renew_interval_seconds=10, on_lost=lost.extend)
+    keeper.track(t.id, stale_claim)
+    assert await keeper.renew() == 0
+    assert lost == [t.id]
+
+    batcher = CompletionBatcher(session_factory, interval_seconds=0, max_batch=10)
+    batcher.start()
+    try:
+        outcome = Outcome(task_id=t.id, to_status=TaskStatus.COMPLETED, message="completed", claim_attempts=stale_claim)
+        assert await batcher.submit(outcome) is False
+        # the current claim still applies
+        outcome = Outcome(task_id=t.id, to_status=TaskStatus.COMPLETED, message="completed", claim_attempts=task.attempts)
+        assert await batcher.submit(outcome) is True
+    finally:
+        await batcher.close()
+
+    async with session_factory() as s:
+        row = await s.get(Task, t.id)
+        assert (row.status, row.attempts) == (TaskStatus.COMPLETED, 1)
+
+
+@pytest.mark.asyncio
+async def test_reaper_survives_a_commit_between_its_read_and_write(tmp_path):
+    path = tmp_path / "wal.sqlite"
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    now = datetime.now(timezone.utc)
+    orphan = _running(now, locked_until=now - timedelta(seconds=1))
+    async with sessions() as s:
+        s.add_all([orphan, _running(now)])
+        await s.commit()
+
+    # Another connection commits right after the reaper's SELECT; upgrading a
+    # read snapshot older than that commit fails with "database is locked"
+    def commit_elsewhere(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            with sqlite3.connect(path) as other:
+                other.execute("UPDATE tasks SET priority = priority + 1 WHERE id != ?", (orphan.id,))
+
+    event.listen(engine.sync_engine, "after_cursor_execute", commit_elsewhere)
+    try:
+        async with sessions() as s:
+            requeued, _ = await reap_expired_leases(s, now, limit=100)
+        assert [tid for tid, _, _ in requeued] == [orphan.id]
+    finally:
+        await engine.dispose()
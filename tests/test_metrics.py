@@ -0,0 +1,68 @@
+import pytest
+
+from app.core.metrics import Metrics
+
+
+def _registry() -> Metrics:
+    m = Metrics()
+    m.counter("jobs_total", "Jobs")
+    m.gauge("in_flight", "In flight")
+    m.histogram("latency_seconds", "Latency", ("kind",), buckets=(0.1, 1.0))
+    return m
+
+
+def _merge(*views):
+    out = {}
+    for view in views:
+        for k, v in view.items():
+            out[k] = out.get(k, 0.0) + v
+    return out
+
+
+def test_histogram_renders_cumulative_buckets():
+    m = _registry()
+    for v in (0.05, 0.5, 0.7, 3.0):
+        m.observe("latency_seconds", v, kind="a")
+
+    text = m.render(*m.local_view())
+    assert 'latency_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{kind="a",le="1"} 3' in text
+    assert 'latency_seconds_bucket{kind="a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{kind="a"} 4' in text
+    assert "# TYPE latency_seconds histogram" in text
+
+
+def test_deltas_from_several_processes_aggregate():
+    api, worker = _registry(), _registry()
+    api.inc("jobs_total", 2)
+    worker.inc("jobs_total", 3)
+    worker.observe("latency_seconds", 0.2, kind="b")
+    api.set("in_flight", 1)
+    worker.set("in_flight", 4)
+
+    # what the flushers add into the shared hash, and the per-process gauges
+    totals = _merge(api.take_deltas(), worker.take_deltas())
+    gauges = _merge(api.local_view()[1], worker.local_view()[1])
+    text = api.render(totals, gauges)
+
+    assert "jobs_total 5" in text
+    assert "in_flight 5" in text
+    assert 'latency_seconds_bucket{kind="b",le="1"} 1' in text
+    assert api.take_deltas() == {}
+
+
+def test_failed_flush_keeps_deltas():
+    m = _registry()
+    m.inc("jobs_total")
+    deltas = m.take_deltas()
+    m.inc("jobs_total")
+    m.restore_deltas(deltas)
+    assert m.take_deltas() == {"jobs_total": 2.0}
+
+
+def test_labels_and_kinds_are_validated():
+    m = _registry()
+    with pytest.raises(ValueError):
+        m.observe("latency_seconds", 1.0)
+    with pytest.raises(ValueError):
+        m.inc("in_flight")
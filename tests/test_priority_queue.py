@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+import pytest
+
+from app.queue.redis_queue import PRIORITY_MAX, PRIORITY_MIN, RedisQueue, priority_score
+
+
+def test_higher_priority_pops_first():
+    # the queue pops the lowest score first
+    assert priority_score(100) < priority_score(0) < priority_score(-100)
+    assert priority_score(100, seq=10**12) < priority_score(99)
+
+
+def test_fifo_within_priority_level():
+    assert priority_score(5, seq=1) < priority_score(5, seq=2)
+
+
+def test_priority_is_clamped_and_scores_stay_exact():
+    assert priority_score(1000) == priority_score(PRIORITY_MAX)
+    assert priority_score(-1000) == priority_score(PRIORITY_MIN)
+    assert float(priority_score(PRIORITY_MIN, seq=10**13 - 1)) < 2**53
+
+
+@pytest.fixture
+async def queue():
+    redis = fakeredis.FakeAsyncRedis()
+    yield RedisQueue(redis)
+    await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_dequeue_batch_pops_by_priority_then_fifo(queue):
+    assert await queue.enqueue_many([("low-1", -5), ("mid-1", 0), ("high", 100), ("mid-2", 0), ("low-2", -5)]) == 5
+    assert await queue.enqueue("mid-3") is True
+    assert await queue.dequeue_batch(4, 0) == ["high", "mid-1", "mid-2", "mid-3"]
+    assert await queue.dequeue_batch(10, 0) == ["low-1", "low-2"]
+    assert await queue.depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_enqueueing_a_waiting_task_again_is_a_no_op(queue):
+    assert await queue.enqueue("a", 0) is True
+    assert await queue.enqueue("b", 0) is True
+    # neither a duplicate entry nor a new position, even at a higher priority
+    assert await queue.enqueue("a", 50) is False
+    assert await queue.enqueue_many([("a", 0), ("c", 0)]) == 1
+    assert await queue.dequeue_batch(10, 0) == ["a", "b", "c"]
+    assert await queue.enqueue("a", 0) is True
+
+
+@pytest.mark.asyncio
+async def test_promote_due_moves_due_tasks_in_priority_order(queue):
+    now = datetime.now(timezone.utc)
+    await queue.schedule_many(
+        [
+            ("urn:task:low", now - timedelta(seconds=3), -100),
+            ("neg", now - timedelta(seconds=2), -7),
+            ("urn:task:high", now - timedelta(seconds=1), 100),
+            ("later", now + timedelta(hours=1), 100),
+        ]
+    )
+    await queue.enqueue("ready", 0)
+
+    assert await queue.promote_due(now, limit=2) == 2
+    assert await queue.promote_due(now, limit=10) == 1
+    assert await queue.promote_due(now, limit=10) == 0
+    assert await queue.delayed_depth() == 1
+    assert await queue.dequeue_batch(10, 0) == ["urn:task:high", "ready", "neg", "urn:task:low"]
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+from app.core.queue_stats import QueueStatsCache, collect_queue_stats
+from app.db.models import Task, TaskStatus
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+class _Queue:
+    def __init__(self, ready: int = 0, delayed: int = 0, down: bool = False):
+        self.ready, self.delayed, self.down = ready, delayed, down
+
+    async def depth(self) -> int:
+        if self.down:
+            raise ConnectionError("redis down")
+        return self.ready
+
+    async def delayed_depth(self) -> int:
+        return self.delayed
+
+
+def _add(sync_engine, task_type: str, status: TaskStatus, next_run_at: datetime) -> str:
+    tid = str(uuid.uuid4())
+    with Session(sync_engine) as s:
+        s.add(
+            Task(
+                id=tid,
+                task_type=task_type,
+                payload_json=json.dumps({}),
+                status=status,
+                priority=0,
+                attempts=0,
+                max_attempts=5,
+                created_at=next_run_at,
+                updated_at=next_run_at,
+                next_run_at=next_run_at,
+            )
+        )
+        s.commit()
+    return tid
+
+
+def _collect(sessions, queue):
+    async def run():
+        async with sessions() as session:
+            return await collect_queue_stats(session, queue, NOW)
+
+    return asyncio.run(run())
+
+
+def test_stats_report_counts_depths_and_oldest_due_task(db):
+    sync_engine, sessions = db.sync_engine, db.sessions
+    started = _add(sync_engine, "email", TaskStatus.QUEUED, NOW - timedelta(seconds=5))
+    _add(sync_engine, "email", TaskStatus.QUEUED, NOW - timedelta(seconds=90))
+    _add(sync_engine, "email", TaskStatus.QUEUED, NOW + timedelta(hours=1))  # not due yet
+    _add(sync_engine, "report", TaskStatus.RUNNING, NOW - timedelta(hours=2))
+    with Session(sync_engine) as s:
+        s.execute(update(Task).where(Task.id == started).values(status=TaskStatus.RUNNING))
+        s.commit()
+
+    stats = _collect(sessions, _Queue(ready=2, delayed=1))
+    assert stats.counts == {("email", "QUEUED"): 2, ("email", "RUNNING"): 1, ("report", "RUNNING"): 1}
+    assert stats.oldest_ready_age_seconds == 90
+
+    text = metrics.render({}, stats.gauges(metrics))
+    assert 'tasks_current{task_type="email",status="QUEUED"} 2' in text
+    assert "queue_ready_depth 2" in text and "queue_delayed_depth 1" in text
+    assert "queue_oldest_ready_age_seconds 90" in text
+
+
+def test_depths_are_omitted_while_redis_is_down(db):
+    sync_engine, sessions = db.sync_engine, db.sessions
+    stats = _collect(sessions, _Queue(down=True))
+    assert stats.ready_depth is None and stats.oldest_ready_age_seconds == 0
+    assert metrics.gauge_series("queue_ready_depth") not in stats.gauges(metrics)
+
+
+def test_cache_shares_one_snapshot_between_scrapes(db):
+    sessions = db.sessions
+    cache = QueueStatsCache(ttl_seconds=60)
+    queue = _Queue(ready=1)
+
+    async def scrape():
+        return await asyncio.gather(*(cache.get(sessions, queue) for _ in range(5)))
+
+    first = asyncio.run(scrape())
+    queue.ready = 7
+    second = asyncio.run(scrape())
+    assert len({id(s) for s in first + second}) == 1 and len(db.statements) == 2
+
+    cache.clear()
+    assert asyncio.run(cache.get(sessions, queue)).ready_depth == 7
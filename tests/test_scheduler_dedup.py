@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.scheduler import promoter_loop, schedule_due
+from app.db.models import Base
+from app.settings import settings
+from tests.conftest import task_row
+
+
+class RecordingQueue:
+    """Plain list transport: every enqueue lands, duplicates included."""
+
+    def __init__(self):
+        self.items = []
+        self.delayed = []
+
+    async def enqueue_many(self, items):
+        self.items.extend(items)
+        return len(items)
+
+    async def schedule_many(self, items):
+        self.delayed.extend(items)
+
+
+@pytest.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as s:
+        yield s
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_queue_length_stays_bounded_under_large_backlog(session, monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_batch_size", 200)
+    now = datetime.now(timezone.utc)
+    backlog = 1000
+    session.add_all([task_row(now - timedelta(seconds=5)) for _ in range(backlog)])
+    # already handed to Redis by create_task
+    session.add_all([task_row(now - timedelta(seconds=5), enqueued_at=now - timedelta(seconds=5)) for _ in range(50)])
+    await session.commit()
+
+    q = RecordingQueue()
+    suppressed = 0
+    for tick in range(20):
+        suppressed += (await schedule_due(session, q, now + timedelta(seconds=tick)))[1]
+
+    assert len(q.items) == backlog
+    # every pass skips whatever is already handed off: 50 up front, +200 per pass
+    assert suppressed == sum(min(50 + 200 * tick, backlog + 50) for tick in range(20))
+    assert len({tid for tid, _ in q.items}) == backlog
+
+
+@pytest.mark.asyncio
+async def test_stale_enqueue_is_retried_once_per_window(session, monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_requeue_after_seconds", 60.0)
+    now = datetime.now(timezone.utc)
+    session.add(task_row(now, enqueued_at=now))
+    await session.commit()
+
+    q = RecordingQueue()
+    assert await schedule_due(session, q, now + timedelta(seconds=30)) == (0, 1)
+    assert await schedule_due(session, q, now + timedelta(seconds=61)) == (1, 0)
+    assert await schedule_due(session, q, now + timedelta(seconds=62)) == (0, 1)
+    assert len(q.items) == 1
+
+
+@pytest.mark.asyncio
+async def test_tasks_due_before_next_pass_go_to_delayed_set(session, monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_interval_seconds", 10.0)
+    monkeypatch.setattr(settings, "scheduler_requeue_after_seconds", 60.0)
+    now = datetime.now(timezone.utc)
+    soon = task_row(now, next_run_at=now + timedelta(seconds=5))
+    far = task_row(now, next_run_at=now + timedelta(minutes=5))
+    session.add_all([soon, far])
+    await session.commit()
+
+    q = RecordingQueue()
+    assert await schedule_due(session, q, now) == (1, 0)
+    assert [tid for tid, _, _ in q.delayed] == [soon.id]
+    assert q.items == []
+
+    # not handed off again while it waits in the delayed set or just after it is due
+    assert await schedule_due(session, q, now + timedelta(seconds=6)) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_failed_pass_does_not_stop_the_loop(monkeypatch):
+    monkeypatch.setattr(settings, "delayed_promote_interval_seconds", 0.0)
+    calls = []
+
+    class FlakyQueue:
+        async def promote_due(self, now, limit):
+            calls.append(now)
+            if len(calls) == 1:
+                raise ConnectionError("redis unavailable")
+            return 0
+
+    async def third_pass():
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+
+    loop = asyncio.create_task(promoter_loop(FlakyQueue()))
+    try:
+        await asyncio.wait_for(third_pass(), timeout=5)
+        assert not loop.done()
+    finally:
+        loop.cancel()
@@ -0,0 +1,49 @@
+import json
+import logging
+import math
+from datetime import datetime
+
+import pytest
+
+from app.core import serialization
+from app.logging_config import JsonFormatter
+
+
+def test_round_trip_matches_stdlib_semantics():
+    doc = {"a": [1, 2.5, None, True], "nested": {"é": "ü"}, 3: "int key"}
+    encoded = serialization.dumps(doc)
+    assert serialization.loads(encoded) == json.loads(json.dumps(doc))
+    assert serialization.loads(encoded.encode()) == serialization.loads(encoded)
+    assert "é" in encoded  # UTF-8, not \\u escapes
+
+
+def test_exact_decode_falls_back_to_stdlib_for_big_integers():
+    doc = {"n": 2**70 + 1, "small": 2**64 - 1}
+    decoded = serialization.loads_exact(serialization.dumps(doc))
+    assert decoded == doc
+    assert type(decoded["n"]) is int
+    assert serialization.loads_exact(serialization.dumpb([-(2**70)])) == [-(2**70)]
+    assert serialization.loads_exact('{"id": 12345678901234567890, "s": "x1"}') == {"id": 12345678901234567890, "s": "x1"}
+
+
+def test_decodes_stdlib_non_finite_floats():
+    stored = json.dumps({"x": float("nan"), "y": float("inf")})
+    decoded = serialization.loads(stored)
+    assert math.isnan(decoded["x"]) and decoded["y"] == float("inf")
+    with pytest.raises(json.JSONDecodeError):
+        serialization.loads(b"{not json")
+
+
+def test_raw_fragments_are_embedded_verbatim():
+    stored = '{"rows":[1,2,3]}'
+    out = serialization.dumpb({"result": serialization.raw(stored), "at": datetime(2024, 1, 2, 3, 4, 5)})
+    assert out == b'{"result":{"rows":[1,2,3]},"at":"2024-01-02T03:04:05"}'
+
+
+def test_log_lines_are_json_with_extras():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    record.task_id = "t1"
+    record.status = object()  # not JSON-serializable; rendered with str()
+    line = json.loads(JsonFormatter().format(record))
+    assert line["msg"] == "hello world" and line["task_id"] == "t1"
+    assert line["status"].startswith("<object")
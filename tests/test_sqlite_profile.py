@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import text
+
+from app.db.session import build_engine
+from app.settings import settings
+
+
+@pytest.mark.asyncio
+async def test_engine_applies_pragmas(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'p.sqlite'}")
+    try:
+        async with engine.connect() as conn:
+            journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            sync = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+            busy = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+            cache = (await conn.execute(text("PRAGMA cache_size"))).scalar()
+    finally:
+        await engine.dispose()
+
+    assert journal == "wal"
+    assert sync == 1  # NORMAL
+    assert busy == settings.sqlite_busy_timeout_ms
+    assert cache == -settings.sqlite_cache_size_kib
+
+
+@pytest.mark.asyncio
+async def test_engine_rejects_unknown_begin_mode(monkeypatch):
+    monkeypatch.setattr(settings, "sqlite_begin_mode", "EAGER")
+    with pytest.raises(ValueError):
+        build_engine("sqlite+aiosqlite:///:memory:")
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api import routes_tasks
+from app.db.models import Base
+from app.main import app
+from app.settings import settings
+
+HEADERS = {"X-API-Key": settings.api_key}
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.items = []
+
+    async def enqueue_many(self, items):
+        self.items.extend(items)
+        return len(items)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = tmp_path / "s.sqlite"
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    queue = RecordingQueue()
+    monkeypatch.setattr(routes_tasks, "engine", engine)
+    monkeypatch.setattr(routes_tasks, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+    monkeypatch.setattr(routes_tasks, "RedisQueue", lambda redis: queue)
+    monkeypatch.setattr(settings, "stream_chunk_size", 3)
+    with TestClient(app) as c:
+        c.queue = queue
+        yield c
+
+
+def _ndjson(items):
+    return "".join(json.dumps(i) + "\n" for i in items)
+
+
+def test_stream_ingest_commits_in_chunks_and_reports_bad_lines(client):
+    good = [{"task_type": "data_transform", "payload": {"data": {"n": i}}} for i in range(7)]
+    body = _ndjson(good[:4]) + "{not json}\n\n" + _ndjson([{"task_type": "x"}]) + _ndjson(good[4:])
+    body += json.dumps({"task_type": "data_transform", "payload": {}, "idempotency_key": "k"})  # no trailing newline
+
+    r = client.post("/v1/tasks/stream", content=body, headers=HEADERS)
+    assert r.status_code == 200
+    out = r.json()
+    assert (out["received"], out["created"], out["rejected"]) == (10, 8, 2)
+    assert [e["line"] for e in out["errors"]] == [5, 7]
+    assert len(client.queue.items) == 8
+
+
+def test_stream_ingest_joins_lines_split_across_chunks(client, monkeypatch):
+    monkeypatch.setattr(settings, "max_request_bytes", 200)
+    body = _ndjson([{"task_type": "data_transform", "payload": {"data": {"n": i}}} for i in range(5)]).encode()
+
+    def chunks(data, size):
+        for i in range(0, len(data), size):
+            yield data[i : i + size]
+
+    r = client.post("/v1/tasks/stream", content=chunks(body, 7), headers=HEADERS)
+    assert (r.status_code, r.json()["created"]) == (200, 5)
+
+    long_line = json.dumps({"task_type": "data_transform", "payload": {"x": "y" * 300}}).encode()
+    r = client.post("/v1/tasks/stream", content=chunks(body[:120] + b"\n" + long_line, 16), headers=HEADERS)
+    assert r.status_code == 413
+    assert r.json()["detail"].startswith("Line 3 exceeds 200 bytes")
+
+
+def test_export_streams_filtered_ndjson(client):
+    items = [{"task_type": t, "payload": {"i": i}} for i, t in enumerate(["cpu_burn", "data_transform"] * 4)]
+    client.post("/v1/tasks/stream", content=_ndjson(items), headers=HEADERS)
+
+    r = client.get("/v1/tasks/export", params={"task_type": "cpu_burn"}, headers=HEADERS)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert sorted(row["payload"]["i"] for row in rows) == [0, 2, 4, 6]
+    assert {row["status"] for row in rows} == {"QUEUED"}
+
+    r = client.get("/v1/tasks/export", params={"created_after": "2999-01-01T00:00:00Z"}, headers=HEADERS)
+    assert r.text == ""
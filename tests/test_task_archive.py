@@ -0,0 +1,129 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.api.response_cache import task_response_cache
+from app.core.results import offload_result
+from app.db.archive import TaskArchive
+from app.db.events import compact_events
+from app.db.models import Task, TaskEvent, TaskResult, TaskStatus
+from app.main import app
+from app.settings import settings
+
+HEADERS = {"X-API-Key": settings.api_key}
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def _insert(sync_engine, status: TaskStatus, updated_at: datetime, result: dict | None = None) -> str:
+    tid = str(uuid.uuid4())
+    result_json = json.dumps(result) if result is not None else None
+    blob = offload_result(result_json) if result_json else None
+    with Session(sync_engine) as s:
+        s.add(
+            Task(
+                id=tid,
+                task_type="data_transform",
+                payload_json=json.dumps({"data": {}}),
+                status=status,
+                priority=0,
+                attempts=1,
+                max_attempts=5,
+                created_at=updated_at,
+                updated_at=updated_at,
+                next_run_at=updated_at,
+                result_json=None if blob else result_json,
+                result_offloaded=True if blob else None,
+            )
+        )
+        if blob:
+            s.add(blob.row(tid))
+        for to_status in ("QUEUED", "RUNNING", status.value):
+            s.add(TaskEvent(task_id=tid, timestamp=updated_at, from_status="-", to_status=to_status, message="m"))
+        s.commit()
+    return tid
+
+
+def _run(sessions, fn):
+    async def run():
+        async with sessions() as session:
+            return await fn(session)
+
+    return asyncio.run(run())
+
+
+def _snapshot(client, tid: str) -> tuple:
+    return (
+        client.get(f"/v1/tasks/{tid}", headers=HEADERS).json(),
+        client.get(f"/v1/tasks/{tid}/result", headers=HEADERS).content,
+        client.get(f"/v1/tasks/{tid}/events", headers=HEADERS).json(),
+    )
+
+
+def test_archived_tasks_are_served_unchanged(db):
+    sync_engine, sessions, archive = db.sync_engine, db.sessions, db.archive
+    old = NOW - timedelta(days=2)
+    inline = _insert(sync_engine, TaskStatus.COMPLETED, old, {"ok": True})
+    offloaded = _insert(sync_engine, TaskStatus.COMPLETED, old, {"rows": ["x" * 100] * 200})
+    compacted = _insert(sync_engine, TaskStatus.FAILED, old)
+    _run(sessions, lambda s: compact_events(s, NOW, 60, 10))
+    ids = [inline, offloaded, compacted]
+
+    with TestClient(app) as client:
+        before = [_snapshot(client, tid) for tid in ids]
+        task_response_cache.clear()
+        assert _run(sessions, lambda s: archive.archive(s, NOW, 86400, 10)) == 3
+        after = [_snapshot(client, tid) for tid in ids]
+        assert client.post(f"/v1/tasks/{inline}/cancel", headers=HEADERS).status_code == 409
+
+    assert after == before
+    assert len(before[2][2]["items"]) == 3
+    with Session(sync_engine) as s:
+        for table in (Task, TaskEvent, TaskResult):
+            assert s.scalar(select(func.count()).select_from(table)) == 0
+        assert s.scalar(text("SELECT count(*) FROM task_event_history_202405")) == 0
+
+
+def test_stale_cache_entry_of_an_archived_task_falls_back_to_the_archive(db):
+    sync_engine, sessions, archive = db.sync_engine, db.sessions, db.archive
+    old = NOW - timedelta(days=2)
+    tid = _insert(sync_engine, TaskStatus.RUNNING, old)
+
+    with TestClient(app) as client:
+        assert client.get(f"/v1/tasks/{tid}", headers=HEADERS).json()["status"] == "RUNNING"
+        # a worker finishes the task and it is archived; this process's cache still holds RUNNING
+        with Session(sync_engine) as s:
+            s.get(Task, tid).status = TaskStatus.COMPLETED
+            s.commit()
+        assert _run(sessions, lambda s: archive.archive(s, NOW, 86400, 10)) == 1
+        r = client.get(f"/v1/tasks/{tid}", headers=HEADERS)
+
+    assert r.status_code == 200
+    assert r.json()["status"] == "COMPLETED"
+
+
+def test_only_old_terminal_tasks_are_archived_in_batches(db):
+    sync_engine, sessions, archive = db.sync_engine, db.sessions, db.archive
+    old = NOW - timedelta(days=2)
+    archived = [_insert(sync_engine, TaskStatus.COMPLETED, old - timedelta(minutes=i)) for i in range(3)]
+    recent = _insert(sync_engine, TaskStatus.COMPLETED, NOW)
+    running = _insert(sync_engine, TaskStatus.RUNNING, old)
+
+    assert _run(sessions, lambda s: archive.archive(s, NOW, 86400, 2)) == 2
+    assert _run(sessions, lambda s: archive.archive(s, NOW, 86400, 2)) == 1
+    assert _run(sessions, lambda s: archive.archive(s, NOW, 86400, 2)) == 0
+
+    with Session(sync_engine) as s:
+        assert set(s.scalars(select(Task.id))) == {recent, running}
+    assert all(asyncio.run(archive.get(tid)) is not None for tid in archived)
+
+
+def test_lookup_does_not_create_the_archive(db, tmp_path):
+    archive = TaskArchive(str(tmp_path / "missing.sqlite"))
+    assert asyncio.run(archive.get("nope")) is None
+    assert not (tmp_path / "missing.sqlite").exists()
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.metrics import metrics
+from app.db.models import Base, Task, TaskEvent, TaskStatus
+from app.db.session import build_engine
+from app.tasks import registry
+from app.tasks.registry import get_spec, register
+from app.workers.batching import CompletionBatcher, Outcome
+from app.workers.cancellation import CancelWatcher
+from app.workers.executors import ProcessLane, TaskExecutor
+from app.workers.lease import LeaseKeeper
+from app.workers.worker import WorkerContext, execute_task
+
+@pytest.fixture
+def started(monkeypatch) -> asyncio.Event:
+    """Registers test_wait_forever for one test; the event is set once its handler runs."""
+    monkeypatch.setattr(registry, "_registry", dict(registry._registry))
+    started = asyncio.Event()
+
+    @register("test_wait_forever")
+    async def wait_forever(payload: dict) -> dict:
+        started.set()
+        await asyncio.sleep(3600)
+        return {}
+
+    return started
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'c.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _running(session_factory, task_type: str) -> Task:
+    now = datetime.now(timezone.utc)
+    task = Task(
+        id=str(uuid.uuid4()),
+        task_type=task_type,
+        payload_json=json.dumps({}),
+        status=TaskStatus.RUNNING,
+        priority=0,
+        attempts=0,
+        max_attempts=3,
+        created_at=now,
+        updated_at=now,
+        next_run_at=now,
+        locked_until=now + timedelta(seconds=30),
+    )
+    async with session_factory() as s:
+        s.add(task)
+        await s.commit()
+    return task
+
+
+async def _cancel_in_db(session_factory, task_id: str) -> None:
+    async with session_factory() as s:
+        (await s.get(Task, task_id)).status = TaskStatus.CANCELED
+        await s.commit()
+
+
+@pytest.mark.asyncio
+async def test_lease_renewal_interrupts_a_canceled_handler(session_factory, started):
+    task = await _running(session_factory, "test_wait_forever")
+    cancels = CancelWatcher()
+    leases = LeaseKeeper(session_factory, None, lease_seconds=30, renew_interval_seconds=60, on_lost=cancels.cancel)
+    completions = CompletionBatcher(session_factory, interval_seconds=0.01, max_batch=10)
+    ctx = WorkerContext(
+        queue=None,
+        lock=None,
+        executor=TaskExecutor(ProcessLane(size=1, max_tasks_per_process=1)),
+        completions=completions,
+        leases=leases,
+        session_factory=session_factory,
+        cancels=cancels,
+    )
+    interrupted = metrics.value("tasks_interrupted_total")
+    completions.start()
+    try:
+        run = asyncio.create_task(execute_task(task, ctx))
+        await asyncio.wait_for(started.wait(), timeout=5)
+
+        await _cancel_in_db(session_factory, task.id)
+        assert await leases.renew() == 0
+        await asyncio.wait_for(run, timeout=5)
+    finally:
+        await completions.close()
+
+    assert metrics.value("tasks_interrupted_total") == interrupted + 1
+    async with session_factory() as s:
+        assert (await s.get(Task, task.id)).status == TaskStatus.CANCELED
+
+
+@pytest.mark.asyncio
+async def test_outcome_racing_a_cancel_does_not_overwrite_it(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'race.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    task = await _running(session_factory, "data_transform")
+
+    batcher = CompletionBatcher(session_factory, interval_seconds=0.01, max_batch=10)
+    batcher.start()
+    try:
+        async with session_factory() as canceller:
+            # The cancel holds the write lock while the outcome is flushed
+            await canceller.execute(update(Task).where(Task.id == task.id).values(status=TaskStatus.CANCELED))
+            submitted = asyncio.create_task(
+                batcher.submit(Outcome(task_id=task.id, to_status=TaskStatus.COMPLETED, message="completed", claim_attempts=0))
+            )
+            await asyncio.sleep(0.2)
+            await canceller.commit()
+        assert await submitted is False
+    finally:
+        await batcher.close()
+
+    async with session_factory() as s:
+        assert (await s.get(Task, task.id)).status == TaskStatus.CANCELED
+        assert await s.scalar(select(func.count()).select_from(TaskEvent)) == 0
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_canceling_a_process_lane_job_kills_its_process():
+    lane = ProcessLane(size=1, max_tasks_per_process=10)
+    executor = TaskExecutor(lane)
+    watcher = CancelWatcher()
+    spec = get_spec("cpu_burn")
+    try:
+        assert (await executor.run(spec, {"milliseconds": 5}, timeout=30))["burned_ms"] == 5
+        proc = lane._slots[0].process
+
+        run = asyncio.ensure_future(executor.run(spec, {"milliseconds": 10_000}, timeout=30))
+        with watcher.watch("t", run):
+            await asyncio.sleep(0.2)
+            assert watcher.cancel(["t", "unknown"]) == 1
+            with pytest.raises(asyncio.CancelledError):
+                await run
+        assert watcher.was_interrupted("t") and not watcher.was_interrupted("t")
+        proc.join(timeout=5)
+        assert not proc.is_alive()
+    finally:
+        executor.shutdown()
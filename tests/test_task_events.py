@@ -0,0 +1,139 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.db.events import compact_events, drop_expired_history, load_task_events
+from app.db.models import Task, TaskEvent, TaskStatus
+from app.main import app
+from app.settings import settings
+
+HEADERS = {"X-API-Key": settings.api_key}
+
+
+def _insert(sync_engine, status: TaskStatus, updated_at: datetime, n_events: int) -> str:
+    tid = str(uuid.uuid4())
+    with Session(sync_engine) as s:
+        s.add(
+            Task(
+                id=tid,
+                task_type="data_transform",
+                payload_json=json.dumps({"data": {}}),
+                status=status,
+                priority=0,
+                attempts=1,
+                max_attempts=5,
+                created_at=updated_at,
+                updated_at=updated_at,
+                next_run_at=updated_at,
+            )
+        )
+        for i in range(n_events):
+            s.add(
+                TaskEvent(
+                    task_id=tid,
+                    timestamp=updated_at - timedelta(seconds=n_events - i),
+                    from_status="QUEUED",
+                    to_status="RUNNING",
+                    message=f"event {i}",
+                )
+            )
+        s.commit()
+    return tid
+
+
+def _compact(sessions, now: datetime) -> tuple[int, int]:
+    async def run():
+        async with sessions() as session:
+            return await compact_events(session, now, older_than_seconds=60, limit=100)
+
+    return asyncio.run(run())
+
+
+def _all_events(client, tid: str, limit: int) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        body = client.get(f"/v1/tasks/{tid}/events", params=params, headers=HEADERS).json()
+        items += body["items"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_compaction_folds_only_old_terminal_tasks(db):
+    sync_engine, sessions = db.sync_engine, db.sessions
+    now = datetime(2024, 3, 15, tzinfo=timezone.utc)
+    old = _insert(sync_engine, TaskStatus.COMPLETED, now - timedelta(hours=1), 3)
+    recent = _insert(sync_engine, TaskStatus.FAILED, now, 2)
+    running = _insert(sync_engine, TaskStatus.RUNNING, now - timedelta(hours=1), 2)
+
+    assert _compact(sessions, now) == (1, 3)
+    assert _compact(sessions, now) == (0, 0)
+
+    with Session(sync_engine) as s:
+        live = dict(s.execute(select(TaskEvent.task_id, func.count()).group_by(TaskEvent.task_id)).all())
+        assert live == {recent: 2, running: 2}
+        assert s.get(Task, old).events_compacted_at is not None
+        row = s.execute(text("SELECT task_id, event_count FROM task_event_history_202403")).one()
+    assert tuple(row) == (old, 3)
+
+
+def test_event_pages_are_identical_before_and_after_compaction(db):
+    sync_engine, sessions = db.sync_engine, db.sessions
+    now = datetime(2024, 3, 15, tzinfo=timezone.utc)
+    tid = _insert(sync_engine, TaskStatus.COMPLETED, now - timedelta(hours=1), 7)
+
+    with TestClient(app) as client:
+        before = _all_events(client, tid, limit=3)
+        _compact(sessions, now)
+        after = _all_events(client, tid, limit=3)
+        assert client.get(f"/v1/tasks/{tid}/events", params={"cursor": "x"}, headers=HEADERS).status_code == 400
+        assert client.get("/v1/tasks/missing/events", headers=HEADERS).status_code == 404
+
+    assert [e["message"] for e in before] == [f"event {i}" for i in range(7)]
+    assert after == before
+
+
+def test_retention_drops_whole_history_months(db):
+    sync_engine, sessions = db.sync_engine, db.sessions
+    ids = [
+        _insert(sync_engine, TaskStatus.COMPLETED, datetime(2024, month, 10, tzinfo=timezone.utc), 1)
+        for month in (1, 2, 3)
+    ]
+    _compact(sessions, datetime(2024, 4, 1, tzinfo=timezone.utc))
+
+    with sync_engine.begin() as conn:
+        dropped = drop_expired_history(conn, datetime(2024, 4, 1, tzinfo=timezone.utc), retention_months=2)
+    assert dropped == ["task_event_history_202401"]
+    assert {t for t in inspect(sync_engine).get_table_names() if t.startswith("task_event_history_")} == {
+        "task_event_history_202402",
+        "task_event_history_202403",
+    }
+
+    async def load(tid, month):
+        async with sessions() as session:
+            return await load_task_events(session, tid, 0, 10, history=month)
+
+    assert asyncio.run(load(ids[0], "202401")) == []
+    assert [e.message for e in asyncio.run(load(ids[1], "202402"))] == ["event 0"]
+
+
+def test_event_queries_use_indexes(db):
+    sync_engine = db.sync_engine
+    with sync_engine.connect() as conn:
+        page = conn.execute(
+            text("EXPLAIN QUERY PLAN SELECT id FROM task_events WHERE task_id = 'x' AND id > 0 ORDER BY id LIMIT 50")
+        ).all()
+        candidates = conn.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE events_compacted_at IS NULL "
+                "AND status IN ('COMPLETED', 'FAILED') AND updated_at < '2024-01-01'"
+            )
+        ).all()
+    assert "idx_task_events_task_id_id" in page[0][-1] and "TEMP B-TREE" not in str(page)
+    assert "idx_tasks_events_uncompacted" in str(candidates)
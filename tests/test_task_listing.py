@@ -0,0 +1,135 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, select, text, update
+from sqlalchemy.orm import Session
+
+from app.db.models import Base, Task, TaskCount, TaskStatus, install_task_count_triggers
+from app.main import app
+from app.settings import settings
+
+HEADERS = {"X-API-Key": settings.api_key}
+
+T0 = datetime(2024, 1, 1)
+
+
+def _task(status: TaskStatus, task_type: str, created_at: datetime) -> Task:
+    return Task(
+        id=str(uuid.uuid4()),
+        task_type=task_type,
+        payload_json=json.dumps({}),
+        status=status,
+        priority=0,
+        attempts=0,
+        max_attempts=5,
+        created_at=created_at,
+        updated_at=created_at,
+        next_run_at=created_at,
+    )
+
+
+def _counts(sync_engine) -> dict[tuple[str, str], int]:
+    with Session(sync_engine) as s:
+        return {(r.task_type, r.status): r.count for r in s.scalars(select(TaskCount)) if r.count}
+
+
+def test_task_counts_follow_inserts_transitions_and_deletes(db):
+    sync_engine = db.sync_engine
+    with Session(sync_engine) as s:
+        tasks = [_task(TaskStatus.QUEUED, "a", T0) for _ in range(3)] + [_task(TaskStatus.QUEUED, "b", T0)]
+        s.add_all(tasks)
+        s.commit()
+        assert _counts(sync_engine) == {("a", "QUEUED"): 3, ("b", "QUEUED"): 1}
+
+        s.execute(update(Task).where(Task.id == tasks[0].id).values(status=TaskStatus.RUNNING))
+        s.execute(update(Task).where(Task.id == tasks[1].id).values(attempts=1))  # not a transition
+        s.commit()
+        assert _counts(sync_engine) == {("a", "QUEUED"): 2, ("a", "RUNNING"): 1, ("b", "QUEUED"): 1}
+
+        s.execute(delete(Task).where(Task.id == tasks[0].id))
+        s.commit()
+    assert _counts(sync_engine) == {("a", "QUEUED"): 2, ("b", "QUEUED"): 1}
+
+
+def test_existing_databases_are_backfilled(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name in ("trg_task_counts_insert", "trg_task_counts_delete", "trg_task_counts_update"):
+            conn.execute(text(f"DROP TRIGGER {name}"))
+    with Session(engine) as s:
+        s.add_all([_task(TaskStatus.COMPLETED, "a", T0), _task(TaskStatus.FAILED, "a", T0)])
+        s.commit()
+    assert _counts(engine) == {}
+
+    with engine.begin() as conn:
+        install_task_count_triggers(conn)
+    assert _counts(engine) == {("a", "COMPLETED"): 1, ("a", "FAILED"): 1}
+
+
+def test_filters_and_pages_with_tied_timestamps(db):
+    sync_engine = db.sync_engine
+    with Session(sync_engine) as s:
+        for i in range(12):
+            # Pairs share a created_at, so pages must break ties on id
+            status = TaskStatus.COMPLETED if i % 3 else TaskStatus.FAILED
+            s.add(_task(status, "a" if i % 2 else "b", T0 + timedelta(hours=i // 2)))
+        s.commit()
+        expected = [
+            t.id
+            for t in s.scalars(select(Task).where(Task.task_type == "a").order_by(Task.created_at.desc(), Task.id.desc()))
+        ]
+
+    with TestClient(app) as client:
+        seen, cursor = [], None
+        while True:
+            params = {"task_type": "a", "limit": 2} | ({"cursor": cursor} if cursor else {})
+            body = client.get("/v1/tasks", params=params, headers=HEADERS).json()
+            seen += [t["id"] for t in body["items"]]
+            assert body["approximate_total"] is None
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == expected
+
+        window = {
+            "created_after": (T0 + timedelta(hours=2)).isoformat(),
+            "created_before": (T0 + timedelta(hours=4)).isoformat(),
+        }
+        body = client.get("/v1/tasks", params=window | {"limit": 100}, headers=HEADERS).json()
+        assert len(body["items"]) == 4
+
+        body = client.get("/v1/tasks", params={"status": "FAILED", "fields": "id"}, headers=HEADERS).json()
+        assert len(body["items"]) == 4 and body["approximate_total"] == 4
+        assert client.get("/v1/tasks", params={"limit": 1}, headers=HEADERS).json()["approximate_total"] == 12
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"status": "COMPLETED"},
+        {"task_type": "a"},
+        {"status": "COMPLETED", "created_after": "2023-12-31T00:00:00"},
+        {"task_type": "a", "created_before": "2024-01-02T00:00:00"},
+    ],
+)
+def test_pages_are_index_seeks_without_sorting(db, params):
+    sync_engine, statements = db.sync_engine, db.statements
+    with Session(sync_engine) as s:
+        s.add_all([_task(TaskStatus.COMPLETED, "a", T0 + timedelta(minutes=i)) for i in range(5)])
+        s.commit()
+
+    with TestClient(app) as client:
+        first = client.get("/v1/tasks", params=params | {"limit": 1}, headers=HEADERS).json()
+        statements.clear()
+        client.get("/v1/tasks", params=params | {"limit": 1, "cursor": first["next_cursor"]}, headers=HEADERS)
+
+    [(sql, parameters)] = [(q, p) for q, p in statements if "FROM tasks" in q and "ORDER BY" in q]
+    with sync_engine.connect() as conn:
+        plan = " ".join(r[3] for r in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters))
+    assert "USING INDEX idx_tasks_" in plan and "(created_at,id)<(?,?)" in plan.replace(" ", "")
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.api import routes_tasks
+from app.db.models import Base, Task, TaskStatus
+from app.main import app
+from app.queue.notifications import TaskEventHub, transition
+from app.settings import settings
+
+HEADERS = {"X-API-Key": settings.api_key}
+
+
+@pytest.fixture
+def sync_engine(tmp_path, monkeypatch):
+    path = tmp_path / "n.sqlite"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(routes_tasks, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    return engine
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    # No Redis subscription: the test delivers events itself
+    h = TaskEventHub(pool=None)
+    monkeypatch.setattr(h, "start", lambda: None)
+    monkeypatch.setattr(app.state, "event_hub", h, raising=False)
+    return h
+
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+def _insert(sync_engine, status=TaskStatus.RUNNING) -> str:
+    now = datetime.now(timezone.utc)
+    tid = str(uuid.uuid4())
+    with Session(sync_engine) as s:
+        s.add(
+            Task(
+                id=tid,
+                task_type="data_transform",
+                payload_json="{}",
+                status=status,
+                priority=0,
+                attempts=0,
+                max_attempts=5,
+                created_at=now,
+                updated_at=now,
+                next_run_at=now,
+            )
+        )
+        s.commit()
+    return tid
+
+
+def _complete(sync_engine, tid):
+    with Session(sync_engine) as s:
+        s.execute(
+            update(Task).where(Task.id == tid).values(status=TaskStatus.COMPLETED, result_json=json.dumps({"ok": 1}))
+        )
+        s.commit()
+
+
+async def _until_waiting(hub, n=1):
+    for _ in range(200):
+        if hub.waiting >= n:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("no waiter subscribed")
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_on_terminal_event(sync_engine, hub, client):
+    tid = _insert(sync_engine)
+    req = asyncio.create_task(client.get(f"/v1/tasks/{tid}/wait", params={"timeout": 10}, headers=HEADERS))
+    await _until_waiting(hub)
+
+    # non-terminal events do not end the wait
+    hub.dispatch(transition(tid, "QUEUED", "RUNNING"))
+    await asyncio.sleep(0.05)
+    assert not req.done()
+
+    _complete(sync_engine, tid)
+    hub.dispatch(transition(tid, "RUNNING", "COMPLETED"))
+    r = await asyncio.wait_for(req, timeout=2)
+    assert r.json()["status"] == "COMPLETED"
+    assert r.json()["result"] == {"ok": 1}
+    assert hub.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_times_out_with_current_state(sync_engine, hub, client):
+    tid = _insert(sync_engine)
+    r = await client.get(f"/v1/tasks/{tid}/wait", params={"timeout": 0.1}, headers=HEADERS)
+    assert r.status_code == 200
+    assert r.json()["status"] == "RUNNING"
+
+    r = await client.get(f"/v1/tasks/{uuid.uuid4()}/wait", params={"timeout": 0.1}, headers=HEADERS)
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_snapshot_transitions_and_final_snapshot(sync_engine, hub, client):
+    tid = _insert(sync_engine, status=TaskStatus.QUEUED)
+    req = asyncio.create_task(client.get(f"/v1/tasks/{tid}/stream", headers=HEADERS))
+    await _until_waiting(hub)
+
+    hub.dispatch(transition(tid, "QUEUED", "RUNNING"))
+    await asyncio.sleep(0.2)  # let the initial snapshot read finish first
+    _complete(sync_engine, tid)
+    hub.dispatch(transition(tid, "RUNNING", "COMPLETED"))
+    r = await asyncio.wait_for(req, timeout=2)
+
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in r.text.strip().split("\n\n")]
+    names = [lines[0].removeprefix("event: ") for lines in events]
+    assert names == ["task", "transition", "transition", "task"]
+    assert json.loads(events[0][1].removeprefix("data: "))["status"] == "QUEUED"
+    assert json.loads(events[-1][1].removeprefix("data: "))["result"] == {"ok": 1}
+
+
+@pytest.mark.asyncio
+async def test_resync_rereads_the_task(sync_engine, hub, client):
+    tid = _insert(sync_engine)
+    req = asyncio.create_task(client.get(f"/v1/tasks/{tid}/wait", params={"timeout": 10}, headers=HEADERS))
+    await _until_waiting(hub)
+
+    # the event itself was lost, e.g. during a reconnect
+    _complete(sync_engine, tid)
+    hub._resync()
+    r = await asyncio.wait_for(req, timeout=2)
+    assert r.json()["status"] == "COMPLETED"
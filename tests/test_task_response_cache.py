@@ -0,0 +1,88 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.db.models import Task, TaskStatus
+from app.main import app
+from app.settings import settings
+
+HEADERS = {"X-API-Key": settings.api_key}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def _insert(sync_engine, status=TaskStatus.QUEUED) -> str:
+    now = datetime.now(timezone.utc)
+    tid = str(uuid.uuid4())
+    with Session(sync_engine) as s:
+        s.add(
+            Task(
+                id=tid,
+                task_type="data_transform",
+                payload_json="{}",
+                status=status,
+                priority=0,
+                attempts=0,
+                max_attempts=5,
+                created_at=now,
+                updated_at=now,
+                next_run_at=now,
+                result_json=json.dumps({"ok": True}) if status == TaskStatus.COMPLETED else None,
+            )
+        )
+        s.commit()
+    return tid
+
+
+def test_etag_and_304(db, client):
+    tid = _insert(db.sync_engine)
+    r = client.get(f"/v1/tasks/{tid}", headers=HEADERS)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    r = client.get(f"/v1/tasks/{tid}", headers={**HEADERS, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+
+
+def test_change_from_another_process_is_seen(db, client):
+    sync_engine = db.sync_engine
+    tid = _insert(sync_engine)
+    etag = client.get(f"/v1/tasks/{tid}", headers=HEADERS).headers["etag"]
+
+    # e.g. a worker moving the task to RUNNING
+    with Session(sync_engine) as s:
+        later = datetime.now(timezone.utc) + timedelta(seconds=1)
+        s.execute(update(Task).where(Task.id == tid).values(status=TaskStatus.RUNNING, updated_at=later))
+        s.commit()
+
+    r = client.get(f"/v1/tasks/{tid}", headers={**HEADERS, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["status"] == "RUNNING"
+    assert r.headers["etag"] != etag
+
+
+def test_terminal_task_is_served_without_queries(db, client):
+    tid = _insert(db.sync_engine, status=TaskStatus.COMPLETED)
+    assert client.get(f"/v1/tasks/{tid}", headers=HEADERS).json()["result"] == {"ok": True}
+
+    db.statements.clear()
+    for _ in range(5):
+        assert client.get(f"/v1/tasks/{tid}", headers=HEADERS).status_code == 200
+    assert db.statements == []
+
+
+def test_cancel_invalidates_cached_response(db, client):
+    tid = _insert(db.sync_engine)
+    assert client.get(f"/v1/tasks/{tid}", headers=HEADERS).json()["status"] == "QUEUED"
+    assert client.post(f"/v1/tasks/{tid}/cancel", headers=HEADERS).status_code == 200
+    assert client.get(f"/v1/tasks/{tid}", headers=HEADERS).json()["status"] == "CANCELED"
@@ -0,0 +1,133 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.results import ENCODING_ZLIB, decode_result, iter_result, load_results, offload_result
+from app.db.models import Task, TaskStatus
+from app.main import app
+from app.settings import settings
+from app.workers.batching import CompletionBatcher, Outcome
+
+HEADERS = {"X-API-Key": settings.api_key}
+
+BIG = {"rows": [{"i": i, "text": "x" * 100} for i in range(1000)]}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def _insert(sync_engine, result: dict | None) -> str:
+    now = datetime.now(timezone.utc)
+    tid = str(uuid.uuid4())
+    result_json = json.dumps(result) if result is not None else None
+    blob = offload_result(result_json) if result_json else None
+    with Session(sync_engine) as s:
+        s.add(
+            Task(
+                id=tid,
+                task_type="data_transform",
+                payload_json=json.dumps({"data": {}}),
+                status=TaskStatus.COMPLETED if result is not None else TaskStatus.QUEUED,
+                priority=0,
+                attempts=0,
+                max_attempts=5,
+                created_at=now,
+                updated_at=now,
+                next_run_at=now,
+                result_json=None if blob else result_json,
+                result_offloaded=True if blob else None,
+            )
+        )
+        if blob:
+            s.add(blob.row(tid))
+        s.commit()
+    return tid
+
+
+def test_large_results_are_compressed_out_of_row():
+    assert offload_result(json.dumps({"ok": True})) is None
+
+    raw = json.dumps(BIG)
+    blob = offload_result(raw)
+    assert blob.encoding == ENCODING_ZLIB
+    assert blob.size == len(raw)
+    assert len(blob.data) < len(raw) // 10
+    assert decode_result(blob.data, blob.encoding) == raw
+
+    chunks = list(iter_result(blob.data, blob.encoding, chunk_size=4096))
+    assert len(chunks) > 1 and max(len(c) for c in chunks) <= 4096
+    assert b"".join(chunks).decode() == raw
+
+
+@pytest.mark.asyncio
+async def test_batcher_writes_offloaded_result(db):
+    tid = _insert(db.sync_engine, None)
+    with Session(db.sync_engine) as s:
+        s.get(Task, tid).status = TaskStatus.RUNNING
+        s.commit()
+
+    raw = json.dumps(BIG)
+    batcher = CompletionBatcher(db.sessions, interval_seconds=0, max_batch=10)
+    batcher.start()
+    outcome = Outcome(
+        task_id=tid, to_status=TaskStatus.COMPLETED, message="completed", claim_attempts=0, result_blob=offload_result(raw)
+    )
+    assert await batcher.submit(outcome)
+    await batcher.close()
+
+    async with db.sessions() as session:
+        t = await session.get(Task, tid)
+        assert t.result_json is None and t.result_offloaded
+        assert await load_results(session, [tid]) == {tid: raw}
+
+
+def test_offloaded_results_are_served(db, client):
+    big = _insert(db.sync_engine, BIG)
+    small = _insert(db.sync_engine, {"ok": True})
+
+    assert client.get(f"/v1/tasks/{big}", headers=HEADERS).json()["result"] == BIG
+    page = client.get("/v1/tasks", headers=HEADERS).json()["items"]
+    assert {t["id"]: t["result"] for t in page} == {big: BIG, small: {"ok": True}}
+
+    r = client.get(f"/v1/tasks/{big}/result", headers=HEADERS)
+    assert r.status_code == 200
+    assert r.json() == BIG
+    assert int(r.headers["content-length"]) == len(r.content)
+    assert client.get(f"/v1/tasks/{small}/result", headers=HEADERS).json() == {"ok": True}
+
+    lines = client.get("/v1/tasks/export", headers=HEADERS).text.splitlines()
+    assert {json.loads(line)["id"]: json.loads(line)["result"] for line in lines} == {big: BIG, small: {"ok": True}}
+
+
+def test_result_endpoint_without_result(db, client):
+    tid = _insert(db.sync_engine, None)
+    assert client.get(f"/v1/tasks/{tid}/result", headers=HEADERS).status_code == 404
+    assert client.get("/v1/tasks/missing/result", headers=HEADERS).status_code == 404
+
+
+def test_list_fields_projection_reads_only_requested_columns(db, client):
+    tids = {_insert(db.sync_engine, BIG) for _ in range(3)}
+
+    db.statements.clear()
+    r = client.get("/v1/tasks", params={"fields": "id,status", "limit": 2}, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.json()
+    assert all(set(item) == {"id", "status"} for item in body["items"])
+    assert body["next_cursor"]
+    sql = " ".join(q for q, _ in db.statements)
+    assert "result_json" not in sql and "payload_json" not in sql and "task_results" not in sql
+
+    rest = client.get("/v1/tasks", params={"fields": "id", "cursor": body["next_cursor"]}, headers=HEADERS).json()
+    assert {i["id"] for i in body["items"] + rest["items"]} == tids
+
+    with_result = client.get("/v1/tasks", params={"fields": "id,result"}, headers=HEADERS).json()
+    assert all(item["result"] == BIG for item in with_result["items"])
+
+    assert client.get("/v1/tasks", params={"fields": "id,payload"}, headers=HEADERS).status_code == 400
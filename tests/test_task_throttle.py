@@ -0,0 +1,150 @@
+from datetime import datetime, timezone
+
+import fakeredis
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base, Task, TaskStatus
+from app.queue.throttle import TaskThrottle
+from app.tasks import registry
+from app.tasks.registry import TaskPolicy, get_spec, register
+from app.workers.worker import ClaimingSource, WorkerContext
+from tests.conftest import task_row
+
+
+class FakeQueue:
+    def __init__(self, ids):
+        self.ids = ids
+        self.scheduled = []
+        self.redis = None
+
+    async def dequeue_batch(self, max_items, timeout_seconds):
+        ids, self.ids = self.ids[:max_items], self.ids[max_items:]
+        return ids
+
+    async def schedule_many(self, items):
+        self.scheduled += items
+
+
+class FakeThrottle:
+    """Admits the first `capacity` tasks per call and records releases."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.admitted = []
+        self.released = []
+
+    async def admit_many(self, items):
+        self.admitted += [tid for tid, _, _ in items[: self.capacity]]
+        return {tid: 0.5 for tid, _, _ in items[self.capacity :]}
+
+    async def release_many(self, items):
+        self.released += items
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 't.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def test_register_records_policy(monkeypatch):
+    monkeypatch.setattr(registry, "_registry", dict(registry._registry))
+
+    @register("test_limited", timeout_seconds=2.5, max_concurrency=3, rate_per_second=4.0)
+    async def _handler(payload):
+        return {}
+
+    policy = get_spec("test_limited").policy
+    assert policy == TaskPolicy(timeout_seconds=2.5, max_concurrency=3, rate_per_second=4.0, burst=4)
+    assert policy.throttled
+    assert not get_spec("data_transform").policy.throttled
+    assert get_spec("http_fetch").policy.max_concurrency == 64
+
+    with pytest.raises(ValueError):
+        register("test_bad", max_concurrency=0)
+    with pytest.raises(ValueError):
+        register("test_bad", rate_per_second=0)
+
+
+@pytest.mark.asyncio
+async def test_throttled_tasks_are_deferred_not_claimed(session_factory, monkeypatch):
+    monkeypatch.setattr("app.workers.worker.settings.publish_task_events", False)
+    now = datetime.now(timezone.utc)
+    limited = [task_row(now, task_type="http_fetch", priority=3) for _ in range(3)]
+    free = task_row(now, task_type="data_transform", priority=3)
+    async with session_factory() as s:
+        s.add_all([*limited, free])
+        await s.commit()
+
+    queue = FakeQueue([limited[0].id, free.id, limited[1].id, limited[2].id])
+    throttle = FakeThrottle(capacity=1)
+    ctx = WorkerContext(
+        queue=queue,
+        lock=None,
+        executor=None,
+        completions=None,
+        leases=None,
+        throttle=throttle,
+        session_factory=session_factory,
+    )
+    source = ClaimingSource(ctx)
+    assert "http_fetch" in source.limited_types
+
+    claimed = await source.dequeue_batch(10, 0)
+    assert [t.id for t in claimed] == [limited[0].id, free.id]
+    assert throttle.admitted == [limited[0].id]
+    assert throttle.released == []
+    assert sorted(tid for tid, _, _ in queue.scheduled) == sorted([limited[1].id, limited[2].id])
+    assert all(priority == 3 and run_at > now for _, run_at, priority in queue.scheduled)
+
+    async with session_factory() as s:
+        for t in limited[1:]:
+            row = await s.get(Task, t.id)
+            assert row.status == TaskStatus.QUEUED
+            assert row.attempts == 0
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_tasks_release_their_slots(session_factory, monkeypatch):
+    monkeypatch.setattr("app.workers.worker.settings.publish_task_events", False)
+    now = datetime.now(timezone.utc)
+    canceled = task_row(now, task_type="http_fetch", priority=3, status=TaskStatus.CANCELED)
+    async with session_factory() as s:
+        s.add(canceled)
+        await s.commit()
+
+    throttle = FakeThrottle(capacity=10)
+    ctx = WorkerContext(
+        queue=FakeQueue([canceled.id]),
+        lock=None,
+        executor=None,
+        completions=None,
+        leases=None,
+        throttle=throttle,
+        session_factory=session_factory,
+    )
+    assert await ClaimingSource(ctx).dequeue_batch(10, 0) == []
+    assert throttle.released == [(canceled.id, "http_fetch")]
+
+
+@pytest.mark.asyncio
+async def test_limits_are_kept_per_queue(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis()
+    throttle = TaskThrottle(redis)
+    policy = TaskPolicy(max_concurrency=1)
+    try:
+        monkeypatch.setattr("app.queue.throttle.settings.queue_name", "blue")
+        deferred = await throttle.admit_many([("b1", "http_fetch", policy), ("b2", "http_fetch", policy)])
+        assert list(deferred) == ["b2"]
+
+        # another deployment sharing the Redis database has its own slots
+        monkeypatch.setattr("app.queue.throttle.settings.queue_name", "green")
+        assert await throttle.admit_many([("g1", "http_fetch", policy)]) == {}
+
+        assert sorted(await redis.keys("*")) == [b"blue:limit:http_fetch:running", b"green:limit:http_fetch:running"]
+    finally:
+        await redis.aclose()
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base, Task, TaskEvent, TaskStatus
+from app.workers.batching import CompletionBatcher, Outcome
+from app.db.claims import claim_tasks
+from tests.conftest import task_row
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'w.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_claim_and_group_commit(session_factory):
+    now = datetime.now(timezone.utc) - timedelta(seconds=1)
+    ready = [task_row(now) for _ in range(5)]
+    future = task_row(now, next_run_at=now + timedelta(hours=1))
+    done = task_row(now, status=TaskStatus.COMPLETED)
+    async with session_factory() as s:
+        s.add_all([*ready, future, done])
+        await s.commit()
+
+    ids = [t.id for t in reversed(ready)] + [future.id, done.id, "missing"]
+    async with session_factory() as s:
+        claimed = await claim_tasks(s, ids, datetime.now(timezone.utc), lease_seconds=30)
+    assert [t.id for t in claimed] == [t.id for t in reversed(ready)]
+    assert all(t.status == TaskStatus.RUNNING for t in claimed)
+    assert all(t.locked_until is not None for t in claimed)
+
+    # one task gets canceled while it runs; its outcome must not be written
+    async with session_factory() as s:
+        (await s.get(Task, ready[0].id)).status = TaskStatus.CANCELED
+        await s.commit()
+
+    batcher = CompletionBatcher(session_factory, interval_seconds=0.05, max_batch=100)
+    batcher.start()
+    try:
+        results = await asyncio.gather(
+            *(
+                batcher.submit(
+                    Outcome(
+                        task_id=t.id,
+                        to_status=TaskStatus.COMPLETED,
+                        message="completed",
+                        claim_attempts=t.attempts,
+                        result_json="{}",
+                    )
+                )
+                for t in claimed
+            )
+        )
+    finally:
+        await batcher.close()
+
+    assert batcher.commits == 1
+    assert dict(zip([t.id for t in claimed], results)) == {
+        t.id: t.id != ready[0].id for t in claimed
+    }
+
+    async with session_factory() as s:
+        statuses = dict((await s.execute(select(Task.id, Task.status))).all())
+        completed_events = await s.scalar(
+            select(func.count()).select_from(TaskEvent).where(TaskEvent.to_status == "COMPLETED")
+        )
+    assert statuses[ready[0].id] == TaskStatus.CANCELED
+    assert sum(1 for t in ready[1:] if statuses[t.id] == TaskStatus.COMPLETED) == 4
+    assert statuses[future.id] == TaskStatus.QUEUED
+    assert completed_events == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_are_exclusive(session_factory):
+    now = datetime.now(timezone.utc) - timedelta(seconds=1)
+    tasks = [task_row(now) for _ in range(20)]
+    async with session_factory() as s:
+        s.add_all(tasks)
+        await s.commit()
+    ids = [t.id for t in tasks]
+
+    async def claim():
+        async with session_factory() as s:
+            return await claim_tasks(s, ids, datetime.now(timezone.utc), lease_seconds=30)
+
+    results = await asyncio.gather(*(claim() for _ in range(4)))
+    claimed_ids = [t.id for batch in results for t in batch]
+    assert sorted(claimed_ids) == sorted(ids)
+
+    async with session_factory() as s:
+        running_events = await s.scalar(
+            select(func.count()).select_from(TaskEvent).where(TaskEvent.to_status == "RUNNING")
+        )
+    assert running_events == 20
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.workers.runtime import WorkerRuntime
+
+
+class ListSource:
+    def __init__(self, task_ids):
+        self.items = list(task_ids)
+        self.dequeues_while_saturated = 0
+        self.active = 0
+        self.limit = None
+
+    async def dequeue_batch(self, max_items, timeout_seconds):
+        if self.limit is not None and self.active + max_items > self.limit:
+            self.dequeues_while_saturated += 1
+        if not self.items:
+            await asyncio.sleep(0.01)
+            return []
+        batch, self.items = self.items[:max_items], self.items[max_items:]
+        return batch
+
+
+@pytest.mark.asyncio
+async def test_runtime_bounds_in_flight_and_applies_backpressure():
+    source = ListSource([f"t{i}" for i in range(20)])
+    source.limit = 4
+    peak = 0
+    done = []
+
+    async def process(task_id):
+        nonlocal peak
+        source.active += 1
+        peak = max(peak, source.active)
+        await asyncio.sleep(0.02)
+        source.active -= 1
+        done.append(task_id)
+        if len(done) == 20:
+            runtime.stop()
+
+    runtime = WorkerRuntime(
+        source, process, concurrency=4, poll_timeout_seconds=1, drain_timeout_seconds=5, batch_size=3
+    )
+    await asyncio.wait_for(runtime.run(), timeout=5)
+
+    assert sorted(done) == sorted(f"t{i}" for i in range(20))
+    assert peak == 4
+    assert source.dequeues_while_saturated == 0
+
+
+@pytest.mark.asyncio
+async def test_runtime_drains_in_flight_on_stop():
+    source = ListSource(["a", "b", "c"])
+    finished = []
+
+    async def process(task_id):
+        await asyncio.sleep(0.05)
+        finished.append(task_id)
+
+    runtime = WorkerRuntime(source, process, concurrency=3, poll_timeout_seconds=1, drain_timeout_seconds=5)
+    run = asyncio.create_task(runtime.run())
+    while runtime.in_flight < 3:
+        await asyncio.sleep(0.001)
+    runtime.stop()
+    await asyncio.wait_for(run, timeout=5)
+
+    assert sorted(finished) == ["a", "b", "c"]
+    assert runtime.in_flight == 0